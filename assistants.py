@@ -0,0 +1,434 @@
+# assistants.py
+import logging
+import os
+import time
+from collections import deque
+from functools import partial
+
+import streamlit as st
+from dotenv import load_dotenv
+
+from knowledge_base import CSVKnowledgeBase
+from cassette import Cassette, RecordingBackend, ReplayBackend
+from conversation_memory import SUMMARY_TOKENS, ConversationMemory, extractive_summary, turn_messages
+from intent_router import IntentRouter
+from llm_backends import AnthropicBackend
+from model_routing import ModelRouter, RouteChoice
+from prompt_budget import ContextPiece, TokenBudget, estimate_tokens
+from rate_limit import RateLimited
+from semantic_cache import QuestionEmbedder, SemanticAnswerCache
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Configuration using environment variables
+CLAUDE_API_KEY = os.getenv('CLAUDE_API_KEY')
+# Set to a stub_llm_server.py URL to run the app without the real API
+CLAUDE_BASE_URL = os.getenv('CLAUDE_BASE_URL')
+# Record model calls to, or replay them from, a cassette file (see cassette.py)
+CLAUDE_CASSETTE = os.getenv('CLAUDE_CASSETTE')
+CLAUDE_CASSETTE_MODE = os.getenv('CLAUDE_CASSETTE_MODE', 'replay')
+CLAUDE_CASSETTE_LATENCY_SCALE = float(os.getenv('CLAUDE_CASSETTE_LATENCY_SCALE', '1.0'))
+
+class RealtyXperienceAI:
+    """Your AI Assistants powered by Snowflake knowledge and Claude"""
+    
+    # Each assistant leads with its own domain but can draw on the other
+    MR_X_DOMAIN_BOOSTS = {"property": 1.0, "land": 0.5}
+    LANDLORD_DOMAIN_BOOSTS = {"land": 1.0, "property": 0.5}
+    
+    # Token allowance for knowledge + platform context in each assistant's prompt
+    CONTEXT_TOKEN_BUDGETS = {"mr_x": 700, "landlord": 700}
+    
+    MR_X_WELCOME = """Welcome to MR X - Your Property Intelligence System!
+
+I'm your expert property advisor specializing in:
+
+- Smart property matching & recommendations
+- Investment analysis & market predictions  
+- Neighborhood insights & safety analysis
+- Portfolio optimization for property owners
+
+Ask me anything about properties, investments, or market trends!"""
+    
+    LANDLORD_WELCOME = """Welcome to LANDLORD - Your Land Investment Intelligence System!
+
+I'm your expert land investment advisor specializing in:
+
+- Strategic land acquisition recommendations
+- Development potential assessments
+- Market timing & growth predictions
+- Documentation & regulatory guidance
+
+Ask me anything about land investment, development, or market opportunities!"""
+    
+    # Welcome tailoring per user type: opening line and knowledge categories to suggest from
+    WELCOME_PROFILES = {
+        "mr_x": {
+            "guest": ("Looking to rent or buy? I'll match you with listings and explain every step.", ["Basics", "Legal"]),
+            "property host": ("Letting out a property? I can help with pricing, tenants and short-lets.", ["Property_Management", "Short_Term_Rentals"]),
+            "real estate agent": ("Advising clients? I can back you up with market and legal facts.", ["Market_Analysis", "Legal"]),
+            "property investor": ("Growing a portfolio? Let's look at returns, financing and exits.", ["Investment_Basics", "Financing"]),
+            "tenant": ("Renting? I can explain leases, rent payments and your options.", ["Property_Management", "Market_Analysis"]),
+        },
+        "landlord": {
+            "guest": ("New to land? I'll walk you through buying safely.", ["Basics", "Legal_Considerations"]),
+            "land developer": ("Planning a build? Let's cover permits, soil and access.", ["Development_Process", "Permits_and_Approvals"]),
+            "real estate agent": ("Advising land clients? I can help with valuation and zoning.", ["Land_Valuation", "Zoning_Basics"]),
+            "land owner": ("Holding land? Let's find what it's worth and how to grow its value.", ["Land_Valuation", "Investment_Strategies"]),
+            "investment firm": ("Deploying capital into land? Let's look at strategies and financing.", ["Investment_Strategies", "Financing"]),
+        },
+    }
+    
+    def __init__(self, api_key=None, base_url=None, answer_cache=None, model_router=None, llm=None, rate_limiter=None,
+                 knowledge_base=None, welcome_messages=None):
+        """base_url points the Claude client elsewhere, e.g. a local stub server;
+        llm replaces the Claude client with any LLMBackend.
+        
+        answer_cache is a SemanticAnswerCache, shared to let sessions reuse each other's answers;
+        model_router a ModelRouter, shared to pool latency observations;
+        rate_limiter an AssistantRateLimiter every model call must pass (none by default);
+        knowledge_base a loaded CSVKnowledgeBase and welcome_messages its build_welcome_messages,
+        shared so sessions don't each reload the knowledge (see use_knowledge).
+        """
+        self.use_knowledge(knowledge_base or CSVKnowledgeBase(), welcome_messages)
+        self.answer_cache = answer_cache or SemanticAnswerCache(QuestionEmbedder(self.knowledge_base.analyzer))
+        self.model_router = model_router or ModelRouter()
+        self.rate_limiter = rate_limiter
+        # Rolling summary of each assistant's conversation (context['history'])
+        self.conversations = {
+            "mr_x": ConversationMemory(self._summarize_turns),
+            "landlord": ConversationMemory(self._summarize_turns),
+        }
+        self.prompt_log = deque(maxlen=500)   # input size of recent Claude calls
+        try:
+            if llm is None and CLAUDE_CASSETTE and CLAUDE_CASSETTE_MODE == "replay":
+                llm = ReplayBackend(Cassette(CLAUDE_CASSETTE), CLAUDE_CASSETTE_LATENCY_SCALE)
+            self.llm = llm or AnthropicBackend(api_key=api_key or CLAUDE_API_KEY, base_url=base_url or CLAUDE_BASE_URL)
+            if CLAUDE_CASSETTE and CLAUDE_CASSETTE_MODE == "record":
+                self.llm = RecordingBackend(self.llm, Cassette(CLAUDE_CASSETTE))
+            self.claude_available = True
+        except Exception as e:
+            self.claude_available = False
+            st.warning(f"Claude API issue: {e}")
+    
+    @classmethod
+    def build_welcome_messages(cls, knowledge_base):
+        """Every assistant/user-type greeting, built from a knowledge base's content"""
+        tables = {"mr_x": knowledge_base.property_df, "landlord": knowledge_base.land_df}
+        bases = {"mr_x": cls.MR_X_WELCOME, "landlord": cls.LANDLORD_WELCOME}
+        messages = {}
+        for assistant, profiles in cls.WELCOME_PROFILES.items():
+            df = tables[assistant]
+            for user_type, (opening, categories) in profiles.items():
+                suggestions = []
+                if df is not None:
+                    for category in categories:
+                        suggestions.extend(df.loc[df["CATEGORY"] == category, "QUESTION"].dropna().head(2))
+                message = f"{bases[assistant]}\n\n{opening}"
+                if suggestions:
+                    message += "\n\nTry asking:\n" + "\n".join(f"- {q}" for q in suggestions[:3])
+                messages[(assistant, user_type)] = message
+        return messages
+    
+    def use_knowledge(self, knowledge_base, welcome_messages=None):
+        """Answer and greet from knowledge_base, e.g. one rebuilt after the knowledge files changed"""
+        if knowledge_base is getattr(self, "knowledge_base", None):
+            return
+        self.knowledge_base = knowledge_base
+        self.router = IntentRouter(knowledge_base.analyzer)
+        if welcome_messages is None:
+            welcome_messages = self.build_welcome_messages(knowledge_base)
+        self.welcome_messages = welcome_messages
+    
+    def welcome_message(self, assistant, user_type):
+        """Precomputed greeting for an assistant ("mr_x" or "landlord"); never calls the model"""
+        default = self.MR_X_WELCOME if assistant == "mr_x" else self.LANDLORD_WELCOME
+        return self.welcome_messages.get((assistant, user_type), default)
+    
+    def mr_x_response(self, user_question, context=None):
+        """MR X - Property Expert using your knowledge database"""
+        
+        # Get knowledge from YOUR Snowflake database
+        knowledge_filters = context.get('knowledge_filters') if context else None
+        knowledge = self.knowledge_base.search_knowledge(user_question, 3, knowledge_filters, domain_boosts=self.MR_X_DOMAIN_BOOSTS)
+        
+        if not knowledge:
+            return self._fallback_property_response(user_question, context)
+        
+        # FAQ-style questions with a near-exact knowledge match skip the model
+        if self.router.route(user_question, knowledge, "mr_x").direct:
+            return f"**Mr. X:** {knowledge[0]['answer']}"
+        
+        # Use Claude AI with your knowledge
+        if self.claude_available:
+            # Listings relevant to the question, already compact
+            platform_context = context.get('listing_digest', "") if context else ""
+            summary, recent = self._conversation("mr_x", context)
+            scope = self._cache_scope("mr_x", context, platform_context, summary, recent)
+            cached = self.answer_cache.lookup(scope, user_question) if scope is not None else None
+            if cached is not None:
+                return cached
+            try:
+                system_prompt = """You are Mr. X, a property investment expert assistant for RealtyXperience. Use the knowledge database information provided to give helpful, detailed answers about rental properties, ROI calculations, short-term rentals, and property investment strategies. Be specific and professional."""
+                
+                user_type = context.get('user_type') if context else None
+                user_prompt, budget_report = self._build_prompt("mr_x", user_question, knowledge, platform_context, user_type, summary)
+                return self._ask_claude_cached(scope, user_question, "mr_x", system_prompt, user_prompt, budget_report, context, recent)
+                
+            except RateLimited as e:
+                if context and context.get('fail_on_model_error'):
+                    raise
+                # Over the limit: answer from the knowledge base instead of waiting longer
+                st.warning(f"{e}. Here is what my knowledge base says meanwhile.")
+            except Exception as e:
+                if context and context.get('fail_on_model_error'):
+                    raise
+                st.error(f"Claude AI error: {e}")
+        
+        # Fallback: Direct knowledge database response
+        response = "**Mr. X:** Based on my knowledge database:\n\n"
+        for item in knowledge:
+            response += f"**{item['question']}**\n\n{item['answer']}\n\n---\n\n"
+        
+        return response
+    
+    def landlord_response(self, user_question, context=None):
+        """Landlord - Land Expert using your knowledge database"""
+        
+        # Get knowledge from YOUR Snowflake database
+        knowledge_filters = context.get('knowledge_filters') if context else None
+        knowledge = self.knowledge_base.search_knowledge(user_question, 3, knowledge_filters, domain_boosts=self.LANDLORD_DOMAIN_BOOSTS)
+        
+        if not knowledge:
+            return self._fallback_land_response(user_question, context)
+        
+        # FAQ-style questions with a near-exact knowledge match skip the model
+        if self.router.route(user_question, knowledge, "landlord").direct:
+            return f"**Landlord:** {knowledge[0]['answer']}"
+        
+        # Use Claude AI with your knowledge
+        if self.claude_available:
+            # Add platform context if available
+            platform_context = ""
+            if context:
+                land_plots = context.get('land_plots', [])
+                if land_plots:
+                    platform_context += f"Current platform has {len(land_plots)} land plots available."
+            summary, recent = self._conversation("landlord", context)
+            scope = self._cache_scope("landlord", context, platform_context, summary, recent)
+            cached = self.answer_cache.lookup(scope, user_question) if scope is not None else None
+            if cached is not None:
+                return cached
+            try:
+                system_prompt = """You are Landlord, a land development expert assistant for RealtyXperience. Use the knowledge database information provided to give helpful, detailed answers about zoning, land development, permits, and land investment strategies. Be specific and professional."""
+                
+                user_type = context.get('user_type') if context else None
+                user_prompt, budget_report = self._build_prompt("landlord", user_question, knowledge, platform_context, user_type, summary)
+                return self._ask_claude_cached(scope, user_question, "landlord", system_prompt, user_prompt, budget_report, context, recent)
+                
+            except RateLimited as e:
+                if context and context.get('fail_on_model_error'):
+                    raise
+                # Over the limit: answer from the knowledge base instead of waiting longer
+                st.warning(f"{e}. Here is what my knowledge base says meanwhile.")
+            except Exception as e:
+                if context and context.get('fail_on_model_error'):
+                    raise
+                st.error(f"Claude AI error: {e}")
+        
+        # Fallback: Direct knowledge database response
+        response = "**Landlord:** Based on my knowledge database:\n\n"
+        for item in knowledge:
+            response += f"**{item['question']}**\n\n{item['answer']}\n\n---\n\n"
+        
+        return response
+    
+    def _build_prompt(self, assistant, user_question, knowledge, platform_context="", user_type=None, summary=""):
+        """User prompt with knowledge and platform context fitted to the assistant's token budget.
+        
+        summary (of earlier conversation) has its own fixed allowance, see ConversationMemory.
+        """
+        pieces = [
+            ContextPiece(f"Q: {item['question']}\nA: {item['answer']}", rank, f"knowledge {rank + 1}")
+            for rank, item in enumerate(knowledge)
+        ]
+        if platform_context:
+            # Platform facts rank just behind the best knowledge match
+            pieces.append(ContextPiece(platform_context, 0.5, "platform"))
+        kept, report = TokenBudget(self.CONTEXT_TOKEN_BUDGETS[assistant]).fit(pieces)
+        
+        knowledge_context = "Here's what I know from my knowledge database:\n\n"
+        knowledge_context += "".join(f"{piece.text}\n\n" for piece in kept if piece.label != "platform")
+        platform_context = "".join(f"\n\n{piece.text}\n" for piece in kept if piece.label == "platform")
+        asked_by = f"\n\nThe user is a {user_type}." if user_type else ""
+        earlier = f"\n\nEarlier in this conversation:\n{summary}" if summary else ""
+        user_prompt = f"{knowledge_context}{platform_context}{asked_by}{earlier}\n\nUser question: {user_question}\n\nPlease provide a comprehensive answer using the knowledge database information above."
+        return user_prompt, report
+    
+    def _conversation(self, assistant, context):
+        """(summary, recent turns) of the conversation in context['history'], if any"""
+        history = context.get('history') if context else None
+        if history is None:
+            return "", []
+        summarize = partial(self._summarize_turns, assistant=assistant, user=context.get('current_user'))
+        return self.conversations[assistant].context(history, summarize)
+    
+    def _summarize_turns(self, previous, turns, assistant="conversation", user=None):
+        """Fold turns into the running conversation summary with the cheapest model tier.
+        
+        The call is charged to user like a question, but never queues: when
+        rate_limiter won't admit it at once the summary is built locally.
+        """
+        if not self.claude_available:
+            return extractive_summary(previous, turns)
+        transcript = "\n".join(f"User: {question}\nAssistant: {answer}" for question, answer, *_ in turns)
+        system_prompt = "Summarize this real-estate advice conversation in a few short bullet points: what the user wants (budget, places, property or land type) and what was already answered. No preamble."
+        user_prompt = f"Summary so far:\n{previous or '(none)'}\n\nNew turns:\n{transcript}"
+        route = RouteChoice(self.model_router.tiers[0], SUMMARY_TOKENS, 0, "summary")
+        try:
+            summary, _ = self._ask_claude_admitted(user, assistant, system_prompt, user_prompt, {"purpose": "summary"},
+                                                   route, timeout=0)
+        except RateLimited:
+            return extractive_summary(previous, turns)
+        return summary
+    
+    def _cache_scope(self, assistant, context, platform_context, summary="", recent=()):
+        """Everything besides the question's wording that a model answer depends on.
+        
+        None for follow-ups: their answers hang on one conversation, so they are
+        neither served from nor stored in the shared answer cache.
+        """
+        if summary or recent:
+            return None
+        context = context or {}
+        filters = context.get('knowledge_filters') or {}
+        return (assistant, self.knowledge_base.content_version, context.get('user_type') or "",
+                platform_context, repr(sorted(filters.items())))
+    
+    def _ask_claude_cached(self, scope, user_question, assistant, system_prompt, user_prompt, budget_report=None, context=None, recent=()):
+        """_ask_claude on the routed model tier, once rate_limiter admits the user.
+        
+        The answer is remembered in answer_cache for reworded repeats, unless scope is None.
+        """
+        context = context or {}
+        route = self.model_router.choose(user_question, (budget_report or {}).get("context_tokens", 0),
+                                         context.get('latency_budget'))
+        answer, seconds = self._ask_claude_admitted(context.get('current_user'), assistant, system_prompt, user_prompt,
+                                                    budget_report, route, recent)
+        if scope is not None:
+            self.answer_cache.store(scope, user_question, answer, seconds)
+        return answer
+    
+    def _ask_claude_admitted(self, user, assistant, system_prompt, user_prompt, budget_report=None, route=None, recent=(), timeout=None):
+        """(answer, seconds the model took) of _ask_claude once rate_limiter admits user.
+        
+        Every model call goes through here; raises RateLimited when user is
+        not admitted within timeout (the limiter's own wait allowance by default).
+        """
+        permit = self.rate_limiter.acquire(user, timeout) if self.rate_limiter else None
+        started = time.perf_counter()
+        try:
+            answer = self._ask_claude(assistant, system_prompt, user_prompt, budget_report, route, recent)
+        finally:
+            if permit:
+                permit.release()
+        return answer, time.perf_counter() - started
+    
+    def _ask_claude(self, assistant, system_prompt, user_prompt, budget_report=None, route=None, recent=()):
+        """One Claude call on route's model (the router's pick for user_prompt by default).
+        
+        recent conversation turns go ahead of user_prompt as earlier messages.
+        Records its size, route and latency in prompt_log and model_router.
+        """
+        route = route or self.model_router.choose(user_prompt)
+        started = time.perf_counter()
+        response = self.llm.complete(
+            model=route.model,
+            max_tokens=route.max_tokens,
+            temperature=0.7,
+            system=system_prompt,
+            messages=turn_messages(recent) + [{"role": "user", "content": user_prompt}]
+        )
+        seconds = time.perf_counter() - started
+        
+        record = dict(budget_report or {})
+        record.update({
+            "assistant": assistant,
+            "route": route.route,
+            "model": route.model,
+            "max_tokens": route.max_tokens,
+            "seconds": seconds,
+            "estimated_input_tokens": estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+                                      + sum(estimate_tokens(q) + estimate_tokens(a) for q, a, *_ in recent),
+            "input_tokens": response.input_tokens,
+            "output_tokens": response.output_tokens,
+        })
+        self.prompt_log.append(record)
+        self.model_router.record(route.route, seconds, record["input_tokens"], record["output_tokens"])
+        logger.info("claude call assistant=%s route=%s seconds=%.2f input_tokens=%s output_tokens=%s context_tokens=%s truncated=%s dropped=%s",
+                    assistant, route.route, seconds, record["input_tokens"], record["output_tokens"],
+                    record.get("context_tokens"), record.get("truncated"), record.get("dropped"))
+        return response.text
+    
+    def _fallback_property_response(self, user_question, context=None):
+        """Fallback response when no knowledge is found"""
+        message_lower = user_question.lower()
+        
+        if any(word in message_lower for word in ["invest", "investment", "roi", "return"]):
+            return """Property Investment Intelligence & Predictions
+
+I can provide comprehensive property investment analysis including:
+
+- Price Predictions & Market timing recommendations
+- ROI Analysis & Capital appreciation projections  
+- Investment Scoring & Risk assessment
+- Location Intelligence & Infrastructure impact analysis
+
+Which property or area would you like me to analyze for investment potential?"""
+
+        elif any(word in message_lower for word in ["find", "search", "recommend"]):
+            return """Smart Property Discovery Engine
+
+I can help you find the perfect property with:
+
+- AI-Powered Property Matching based on lifestyle preferences
+- Location Intelligence & Commute optimization
+- Market Intelligence & Price trend analysis
+- Smart Filters beyond basic search
+
+Let me know your preferences (budget, location, lifestyle needs) and I'll find your perfect property match!"""
+
+        return self.MR_X_WELCOME
+    
+    def _fallback_land_response(self, user_question, context=None):
+        """Fallback response when no knowledge is found"""
+        message_lower = user_question.lower()
+        
+        if any(word in message_lower for word in ["invest", "investment", "development"]):
+            return """Land Investment Intelligence & Development Analysis
+
+I provide comprehensive land investment analysis including:
+
+- Development potential assessments & ROI analysis
+- Market timing recommendations & Growth corridor identification
+- Feasibility studies & Zoning compliance guidance
+- Infrastructure development impact analysis
+
+Which land plot or area would you like me to analyze for investment potential?"""
+
+        elif any(word in message_lower for word in ["find", "search", "recommend"]):
+            return """Smart Land Discovery Engine
+
+I can help you find perfect land opportunities with:
+
+- AI matching based on investment goals
+- Development Intelligence & Future growth analysis
+- Strategic Filtering & Location intelligence
+- Market entry optimization
+
+Tell me your investment goals and I'll find your perfect land opportunity!"""
+
+        return self.LANDLORD_WELCOME
@@ -0,0 +1,136 @@
+# benchmark_chat.py
+# Chat throughput and tail latency against the local stub of the Messages API.
+#
+#   python benchmark_chat.py                                   # starts its own stub server
+#   python benchmark_chat.py --requests 500 --concurrency 16 --latency-ms lognormal:800:0.6
+#   python benchmark_chat.py --error-rate 0.05 --ms-per-token 10 --output-tokens 300
+#   python benchmark_chat.py --stream                          # time to first token, backend only
+#   python benchmark_chat.py --base-url http://127.0.0.1:8765  # an already running stub
+#
+# Questions come from knowledge_eval_queries.csv and go through the full
+# assistant path (knowledge search, routing, prompt building, model call).
+# The semantic answer cache is off unless --answer-cache is given, so
+# repeats still reach the model. Results are printed as JSON.
+
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from assistants import RealtyXperienceAI
+from llm_backends import AnthropicBackend
+from semantic_cache import SemanticAnswerCache
+from stub_llm_server import start_stub_server
+
+
+def load_questions(path="knowledge_eval_queries.csv"):
+    """(assistant, question) pairs from the evaluation queries"""
+    data = pd.read_csv(path)
+    return [("landlord" if domain == "land" else "mr_x", query) for query, domain in zip(data["QUERY"], data["DOMAIN"])]
+
+
+def chat_request(ai, assistant, question):
+    """Seconds for one full assistant answer"""
+    respond = ai.mr_x_response if assistant == "mr_x" else ai.landlord_response
+    started = time.perf_counter()
+    respond(question, {"user_type": "guest", "fail_on_model_error": True})
+    return time.perf_counter() - started, None
+
+
+def stream_request(ai, assistant, question):
+    """(total seconds, seconds to first chunk) for one streamed backend call"""
+    route = ai.model_router.choose(question)
+    started = time.perf_counter()
+    first = None
+    for _ in ai.llm.stream(route.model, route.max_tokens, "", [{"role": "user", "content": question}]):
+        if first is None:
+            first = time.perf_counter() - started
+    return time.perf_counter() - started, first
+
+
+def percentiles_ms(values):
+    if not values:
+        return {}
+    return {f"p{p}_ms": round(float(np.percentile(values, p)) * 1000, 1) for p in (50, 95, 99)}
+
+
+def run(ai, questions, requests, concurrency, stream=False):
+    """Summary dict of requests calls spread over concurrency threads"""
+    request = stream_request if stream else chat_request
+    errors = Counter()
+
+    def one(position):
+        assistant, question = questions[position % len(questions)]
+        try:
+            return request(ai, assistant, question)
+        except Exception as e:
+            errors[type(e).__name__] += 1
+            return None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = [r for r in pool.map(one, range(requests)) if r is not None]
+    elapsed = time.perf_counter() - started
+
+    summary = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "completed": len(results),
+        "errors": dict(errors),
+        "seconds": round(elapsed, 2),
+        "throughput_rps": round(len(results) / elapsed, 2) if elapsed else None,
+        "latency": percentiles_ms([total for total, _ in results]),
+    }
+    if stream:
+        summary["first_token"] = percentiles_ms([first for _, first in results if first is not None])
+    else:
+        summary["routes"] = dict(ai.router.stats)
+        summary["model_routes"] = {name: usage for name, usage in ai.model_router.report().items() if usage["calls"]}
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the chat path against a local Messages API stub")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--base-url", help="use a running stub server instead of starting one")
+    parser.add_argument("--latency-ms", default="lognormal:500:0.5", help="stub time to first token (see stub_llm_server.py)")
+    parser.add_argument("--ms-per-token", type=float, default=0)
+    parser.add_argument("--output-tokens", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-retries", type=int, default=2, help="SDK retries of failed calls")
+    parser.add_argument("--stream", action="store_true", help="stream straight from the backend and time the first token")
+    parser.add_argument("--answer-cache", action="store_true", help="keep the semantic answer cache on")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = start_stub_server(latency_ms=args.latency_ms, ms_per_token=args.ms_per_token,
+                                   output_tokens=args.output_tokens, error_rate=args.error_rate, seed=args.seed)
+        base_url = server.url
+
+    ai = RealtyXperienceAI(llm=AnthropicBackend(api_key="stub", base_url=base_url, max_retries=args.max_retries))
+    if not args.answer_cache:
+        # Cosine similarity never exceeds 1, so nothing is served from the cache
+        ai.answer_cache = SemanticAnswerCache(threshold=2.0)
+
+    try:
+        summary = run(ai, load_questions(), args.requests, args.concurrency, args.stream)
+        if server:
+            summary["stub"] = dict(server.stats)
+    finally:
+        if server:
+            server.shutdown()
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+# benchmark_knowledge.py
+# Knowledge search benchmark on synthetic Nigerian real-estate QA corpora.
+#
+#   python benchmark_knowledge.py                          # 1k, 100k and 1M rows
+#   python benchmark_knowledge.py --sizes 1000 --queries 50
+#   python benchmark_knowledge.py --baseline knowledge_benchmark.json
+#   python benchmark_knowledge.py --backends index sharded --shards 4 --shard-executor process
+#   python benchmark_knowledge.py --backends sqlite sqlite_ro      # default vs serving-mode SQLite
+#
+# Each backend/size pair runs in a fresh process so build time and peak
+# memory are measured in isolation. Results are written as JSON.
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from build_db import build_knowledge_db
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+COLUMNS = ["CATEGORY", "SUBCATEGORY", "QUESTION", "ANSWER", "TAGS", "DIFFICULTY_LEVEL"]
+
+CATEGORIES = {
+    "property": {
+        "Basics": ["Definitions", "Property_Types"],
+        "Investment_Basics": ["ROI_Calculation", "Rental_Yields", "Property_Valuation"],
+        "Financing": ["Down_Payment", "Mortgage_Options", "Payment_Plans"],
+        "Property_Management": ["Tenant_Screening", "Rent_Collection", "Maintenance_Costs"],
+        "Legal": ["Property_Documents", "Title_Verification", "Property_Taxes"],
+        "Short_Term_Rentals": ["Airbnb_Potential", "STR_Requirements"],
+    },
+    "land": {
+        "Basics": ["Definitions"],
+        "Zoning_Basics": ["Residential", "Commercial", "Industrial"],
+        "Land_Valuation": ["Factors", "Comparable_Sales"],
+        "Development_Process": ["Due_Diligence", "Survey", "Title_Search"],
+        "Permits_and_Approvals": ["Building_Permits", "Site_Plan"],
+        "Legal_Considerations": ["Deed_Types", "Excision"],
+    },
+}
+
+TOPICS = {
+    "property": [
+        "rental yield", "service charge", "caution fee", "agency fee", "boys quarter",
+        "self-contained apartment", "mini flat", "block of flats", "mortgage", "off-plan payment plan",
+        "short-let apartment", "tenant screening", "annual rent", "property valuation", "cash flow",
+        "capital gains tax", "land use charge", "facility management", "estate levy", "generator maintenance",
+    ],
+    "land": [
+        "certificate of occupancy", "governor's consent", "deed of assignment", "survey plan", "excision",
+        "gazette", "right of occupancy", "land banking", "zoning", "building permit",
+        "site plan approval", "perimeter fencing", "soil test", "drainage", "road access",
+        "omo onile", "family land", "subdivision", "layout approval", "land use act",
+    ],
+}
+
+LOCATIONS = [
+    "Lekki", "Ikoyi", "Victoria Island", "Ajah", "Yaba", "Ikeja GRA", "Magodo", "Surulere",
+    "Ibeju-Lekki", "Epe", "Maitama", "Wuse 2", "Gwarinpa", "Asokoro", "Lugbe", "Kubwa",
+    "Port Harcourt GRA", "Enugu", "Ibadan", "Abeokuta", "Uyo", "Asaba", "Kano", "Benin City",
+]
+
+PROPERTY_TYPES = ["duplex", "bungalow", "terrace", "apartment", "penthouse", "shop", "warehouse", "plot"]
+
+QUESTION_TEMPLATES = [
+    "What is {topic} in {location}?",
+    "How do I check {topic} before buying a {ptype} in {location}?",
+    "How much does {topic} cost for a {ptype} in {location}?",
+    "Is {topic} required for a {ptype} in {location}?",
+    "What should investors know about {topic} in {location}?",
+    "How long does {topic} take in {location}?",
+]
+
+ANSWER_SENTENCES = [
+    "In {location}, {topic} is a common consideration for any {ptype} transaction.",
+    "Buyers should confirm {topic} with the state lands registry before paying.",
+    "Costs vary by area, but budget between {low} and {high} percent of the property value.",
+    "A reputable lawyer and licensed surveyor can verify the documents within {weeks} weeks.",
+    "Demand for {ptype} units in {location} has grown with new roads and estates.",
+    "Always get receipts and written agreements for every payment you make.",
+]
+
+DIFFICULTIES = ["beginner", "intermediate", "advanced"]
+
+REAL_QUESTIONS = [
+    "How do I calculate ROI on a rental property in Lagos?",
+    "What is a C of O?",
+    "certifcate of ocupancy",
+    "Is shortlet profitable in Lekki?",
+    "What documents do I need when buying land?",
+    "How much is agency fee and caution fee?",
+    "governor's consent timeline",
+    "What does zoning mean for a plot in Abuja?",
+    "self con in Yaba",
+    "How do developer payment plans work?",
+]
+
+
+def generate_corpus(rows, domain, seed=0):
+    """Synthetic knowledge rows in the schema of the nigeria_*_knowledge.csv files"""
+    rng = random.Random(f"{domain}-{seed}")
+    categories = list(CATEGORIES[domain].items())
+    topics = TOPICS[domain]
+    records = []
+    for i in range(rows):
+        category, subcategories = categories[i % len(categories)]
+        subcategory = subcategories[(i // len(categories)) % len(subcategories)]
+        values = {
+            "topic": rng.choice(topics),
+            "location": rng.choice(LOCATIONS),
+            "ptype": rng.choice(PROPERTY_TYPES),
+            "low": rng.randint(1, 5),
+            "high": rng.randint(6, 15),
+            "weeks": rng.randint(2, 12),
+        }
+        question = rng.choice(QUESTION_TEMPLATES).format(**values)
+        answer = " ".join(sentence.format(**values) for sentence in rng.sample(ANSWER_SENTENCES, 3))
+        tags = "_".join(
+            f"{values['topic']} {values['location']} {values['ptype']} {subcategory}".lower()
+            .replace("'", "").replace("-", " ").split()
+        )
+        difficulty = DIFFICULTIES[i % 7] if i % 7 < len(DIFFICULTIES) else "beginner"
+        records.append([category, f"{subcategory}_{i // len(categories) + 1}", question, answer, tags,
+                        f"{difficulty}_{i + 1}"])
+    return pd.DataFrame(records, columns=COLUMNS)
+
+
+def write_corpus(rows, directory, seed=0):
+    """Write property/land CSVs (half the rows each) and return their paths"""
+    property_path = os.path.join(directory, f"property_{rows}.csv")
+    land_path = os.path.join(directory, f"land_{rows}.csv")
+    generate_corpus(rows // 2, "property", seed).to_csv(property_path, index=False)
+    generate_corpus(rows - rows // 2, "land", seed).to_csv(land_path, index=False)
+    return property_path, land_path
+
+
+def build_sqlite(property_path, land_path, db_path):
+    """Same load build_db.py performs, against the synthetic CSVs"""
+    build_knowledge_db(db_path, {'PROPERTY_KNOWLEDGE': property_path, 'LAND_KNOWLEDGE': land_path})
+
+
+def make_queries(property_path, land_path, count, seed=0):
+    """Mix of real user phrasings, exact corpus questions and typo'd corpus questions"""
+    rng = random.Random(seed)
+    samples = []
+    for domain, path in (("property", property_path), ("land", land_path)):
+        questions = pd.read_csv(path, usecols=["QUESTION"])["QUESTION"].tolist()
+        samples.extend((domain, q) for q in rng.sample(questions, min(len(questions), count)))
+    rng.shuffle(samples)
+
+    queries = [("property" if i % 2 == 0 else "land", q) for i, q in enumerate(REAL_QUESTIONS)]
+    for i, (domain, question) in enumerate(samples):
+        if len(queries) >= count:
+            break
+        if i % 3 == 0 and len(question) > 8:
+            cut = rng.randrange(1, len(question) - 1)
+            question = question[:cut] + question[cut + 1:]
+        queries.append((domain, question))
+    return queries[:count]
+
+
+def open_backend(backend, property_path, land_path, db_path, build_workers=None, shards=None,
+                 shard_executor="thread"):
+    """Build/open a knowledge backend; returns a search(domain, query, max_results=3) callable"""
+    if backend == "csv":
+        from knowledge_base import CSVKnowledgeBase
+        # Synthetic corpora are templated; dedupe would measure the ingestion pass, not search
+        kb = CSVKnowledgeBase(property_path, land_path, dedupe=False)
+    elif backend in ("sqlite", "sqlite_ro"):
+        from migrationscript import SQLiteKnowledgeBase
+        build_sqlite(property_path, land_path, db_path)
+        kb = SQLiteKnowledgeBase(db_path, read_only=backend == "sqlite_ro")
+    elif backend == "index":
+        from knowledge_index import KnowledgeIndex, QueryAnalyzer, SynonymExpander
+        index = KnowledgeIndex.from_domains(
+            {"property": pd.read_csv(property_path), "land": pd.read_csv(land_path)},
+            QueryAnalyzer(synonyms=SynonymExpander.from_csv()),
+            workers=build_workers,
+        )
+        masks = {domain: index.filter_bitmap({"DOMAIN": domain}) for domain in ("property", "land")}
+        return lambda domain, query, max_results=3: [
+            item for _, item in index.search(query, max_results, mask=masks[domain])
+        ]
+    elif backend == "sharded":
+        from knowledge_index import ShardedKnowledgeIndex, QueryAnalyzer, SynonymExpander
+        index = ShardedKnowledgeIndex.from_domains(
+            {"property": pd.read_csv(property_path), "land": pd.read_csv(land_path)},
+            QueryAnalyzer(synonyms=SynonymExpander.from_csv()),
+            shards=shards,
+            executor=shard_executor,
+        )
+        masks = {domain: index.filter_bitmap({"DOMAIN": domain}) for domain in ("property", "land")}
+        return lambda domain, query, max_results=3: [
+            item for _, item in index.search(query, max_results, mask=masks[domain])
+        ]
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+
+    def search(domain, query, max_results=3):
+        if domain == "property":
+            return kb.search_property_knowledge(query, max_results)
+        return kb.search_land_knowledge(query, max_results)
+    return search
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(backend, rows, property_path, land_path, db_path, queries, build_workers=None, shards=None,
+             shard_executor="thread"):
+    """Measure one backend on one corpus; runs inside a fresh worker process"""
+    rss_before = peak_rss_mb()
+    started = time.perf_counter()
+    search = open_backend(backend, property_path, land_path, db_path, build_workers, shards, shard_executor)
+    build_seconds = time.perf_counter() - started
+    rss_after = peak_rss_mb()
+
+    latencies = []
+    hits = 0
+    for domain, query in queries:
+        started = time.perf_counter()
+        results = search(domain, query)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += bool(results)
+
+    latencies = np.array(latencies)
+    return {
+        "backend": backend,
+        "rows": rows,
+        "build_seconds": round(build_seconds, 4),
+        "memory_mb": round(rss_after - rss_before, 1) if rss_before is not None else None,
+        "peak_rss_mb": round(rss_after, 1) if rss_after is not None else None,
+        "queries": len(queries),
+        "hit_rate": round(hits / len(queries), 4) if queries else 0.0,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 4),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 4),
+        "mean_ms": round(float(latencies.mean()), 4),
+    }
+
+
+def find_regressions(results, baseline, max_ratio):
+    """Cases whose build time or p99 latency grew beyond max_ratio of the baseline"""
+    previous = {(r["backend"], r["rows"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get((result["backend"], result["rows"]))
+        if not before:
+            continue
+        for metric in ("build_seconds", "p99_ms"):
+            if before[metric] and result[metric] > before[metric] * max_ratio:
+                regressions.append(f"{result['backend']} @ {result['rows']} rows: {metric} "
+                                   f"{before[metric]} -> {result[metric]}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark knowledge search backends on synthetic corpora")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--backends", nargs="+", default=["csv", "sqlite", "index"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--build-workers", type=int,
+                        help="processes for the index build (default: all cores on large corpora, 1 forces serial)")
+    parser.add_argument("--shards", type=int, help="shards for the sharded backend (default: one per core)")
+    parser.add_argument("--shard-executor", choices=["thread", "process"], default="thread",
+                        help="pool the sharded backend fans queries out on")
+    parser.add_argument("--output", default="knowledge_benchmark.json")
+    parser.add_argument("--baseline", help="earlier results file to check for regressions")
+    parser.add_argument("--max-regression", type=float, default=1.25,
+                        help="allowed slowdown ratio against --baseline before failing")
+    args = parser.parse_args(argv)
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.sizes:
+            print(f"Generating {rows:,} rows...")
+            property_path, land_path = write_corpus(rows, workdir, args.seed)
+            queries = make_queries(property_path, land_path, args.queries, args.seed)
+            for backend in args.backends:
+                db_path = os.path.join(workdir, f"knowledge_{rows}_{backend}.db")
+                # An executor worker (unlike a multiprocessing.Pool daemon) may start
+                # its own pools for the parallel build and process shards
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    result = pool.submit(run_case, backend, rows, property_path, land_path, db_path, queries,
+                                         args.build_workers, args.shards, args.shard_executor).result()
+                results.append(result)
+                print(f"  {backend:<8} build {result['build_seconds']:>9.3f}s  mem {result['memory_mb']} MB  "
+                      f"p50 {result['p50_ms']:.3f}ms  p99 {result['p99_ms']:.3f}ms  hits {result['hit_rate']:.0%}")
+
+    report = {
+        "generated_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "build_workers": args.build_workers,
+        "shards": args.shards,
+        "shard_executor": args.shard_executor,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION: {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,32 +1,122 @@
+import hashlib
+import os
+import shutil
 import sqlite3
+import stat
+import tempfile
 import pandas as pd
 
-print("Creating database...")
-
-# Create database
-conn = sqlite3.connect('realtyxperience_knowledge.db')
-
-# You need to have your CSV files here
-# If you don't have them, you'll need to export them from Snowflake first
-
-try:
-    # Load CSV files
-    property_df = pd.read_csv('nigeria_property_knowledge.csv')
-    land_df = pd.read_csv('nigeria_land_knowledge.csv')
-    
-    # Create tables with uppercase names to match your code
-    property_df.to_sql('PROPERTY_KNOWLEDGE', conn, if_exists='replace', index=False)
-    land_df.to_sql('LAND_KNOWLEDGE', conn, if_exists='replace', index=False)
-    
-    print(f"✅ Created PROPERTY_KNOWLEDGE with {len(property_df)} rows")
-    print(f"✅ Created LAND_KNOWLEDGE with {len(land_df)} rows")
-    print("✅ Database created successfully!")
-    
-except FileNotFoundError as e:
-    print(f"❌ CSV files not found: {e}")
-    print("Make sure you have:")
-    print("  - nigeria_property_knowledge.csv")
-    print("  - nigeria_land_knowledge.csv")
-    print("in the same folder as this script")
-
-conn.close()
+DB_PATH = 'realtyxperience_knowledge.db'
+
+# Table name -> source CSV (uppercase names to match your code)
+KNOWLEDGE_TABLES = {
+    'PROPERTY_KNOWLEDGE': 'nigeria_property_knowledge.csv',
+    'LAND_KNOWLEDGE': 'nigeria_land_knowledge.csv',
+}
+
+# Bump when the table layout or load logic changes; forces a full rebuild
+SCHEMA_VERSION = 1
+
+
+def file_hash(path):
+    """sha256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_metadata(db_path):
+    """KEY -> VALUE from the BUILD_METADATA table ({} for a missing or pre-metadata database)"""
+    if not os.path.exists(db_path):
+        return {}
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(conn.execute("SELECT KEY, VALUE FROM BUILD_METADATA").fetchall())
+    except sqlite3.DatabaseError:
+        return {}
+    finally:
+        conn.close()
+
+
+def served_file_mode(db_path):
+    """Permissions for a rebuilt db_path: the current file's, else what a plain create would get"""
+    try:
+        return stat.S_IMODE(os.stat(db_path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def build_knowledge_db(db_path=DB_PATH, tables=None, force=False):
+    """Build db_path from the knowledge CSVs, reloading only tables whose CSV changed.
+
+    The new database is written to a temp file in the same folder and
+    renamed over db_path, so readers see either the old or the new file.
+    Returns the list of tables rebuilt ([] when everything was current).
+    """
+    tables = tables or KNOWLEDGE_TABLES
+    hashes = {table: file_hash(path) for table, path in tables.items()}
+    metadata = read_metadata(db_path)
+    if force or metadata.get('schema_version') != str(SCHEMA_VERSION):
+        changed = list(tables)
+    else:
+        changed = [table for table in tables if metadata.get(f'hash:{table}') != hashes[table]]
+    if not changed:
+        return []
+
+    incremental = len(changed) < len(tables)
+    fd, temp_path = tempfile.mkstemp(prefix='.knowledge-', suffix='.db', dir=os.path.dirname(os.path.abspath(db_path)))
+    os.close(fd)
+    try:
+        if incremental:
+            # Carry the unchanged tables over untouched
+            shutil.copyfile(db_path, temp_path)
+        conn = sqlite3.connect(temp_path)
+        try:
+            for table in changed:
+                pd.read_csv(tables[table]).to_sql(table, conn, if_exists='replace', index=False)
+            conn.execute("CREATE TABLE IF NOT EXISTS BUILD_METADATA (KEY TEXT PRIMARY KEY, VALUE TEXT)")
+            rows = [('schema_version', str(SCHEMA_VERSION))] + [(f'hash:{table}', hashes[table]) for table in tables]
+            conn.executemany("INSERT OR REPLACE INTO BUILD_METADATA (KEY, VALUE) VALUES (?, ?)", rows)
+            # The app opens this file read-only: gather planner statistics and
+            # compact the pages once here, since it can't do either at serve time
+            conn.execute("ANALYZE")
+            conn.commit()
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        # mkstemp creates the file 0600; keep the database readable by the app's user
+        os.chmod(temp_path, served_file_mode(db_path))
+        os.replace(temp_path, db_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return changed
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("Creating database...")
+    try:
+        rebuilt = build_knowledge_db(force='--force' in sys.argv)
+        if not rebuilt:
+            print("✅ Knowledge CSVs unchanged - database is up to date")
+        else:
+            conn = sqlite3.connect(DB_PATH)
+            for table in rebuilt:
+                count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                print(f"✅ Created {table} with {count} rows")
+            conn.close()
+            print("✅ Database created successfully!")
+    except FileNotFoundError as e:
+        # You need to have your CSV files here
+        # If you don't have them, you'll need to export them from Snowflake first
+        print(f"❌ CSV files not found: {e}")
+        print("Make sure you have:")
+        print("  - nigeria_property_knowledge.csv")
+        print("  - nigeria_land_knowledge.csv")
+        print("in the same folder as this script")
@@ -0,0 +1,54 @@
+# canonical_prompts.py
+# The fixed questions behind the chat buttons. Answers to these are
+# pre-generated by pregenerate_answers.py and served from the response store.
+
+# Quick-action buttons: label -> prompt sent to the assistant
+MR_X_QUICK_ACTIONS = {
+    "Investment Analysis": "Analyze property investment potential in my budget",
+    "Neighborhood Guide": "Tell me about the best neighborhoods for my lifestyle",
+    "Market Trends": "What are current property market trends in Lagos and Abuja?",
+    "Price Predictions": "Predict property price movements in key areas"
+}
+
+LANDLORD_QUICK_ACTIONS = {
+    "Investment Analysis": "Analyze land investment opportunities in my budget range",
+    "Documentation Guide": "Guide me through land documentation requirements",
+    "Market Intelligence": "What are current land market trends and timing?",
+    "Development Planning": "Help me plan development strategy for my land"
+}
+
+# "Try These" sidebar buttons in migrationscript.py: label -> prompt
+MR_X_TRY_THESE = {
+    "What is ROI?": "How do I calculate ROI for rental property?",
+    "What is cash flow?": "What is cash flow?",
+}
+
+LANDLORD_TRY_THESE = {
+    "What is C of O?": "What is a Certificate of Occupancy?",
+    "Land valuation?": "How do I determine land value?",
+}
+
+# User types offered by each chat page's "I am a:" selector
+MR_X_USER_TYPES = ["Guest/Buyer", "Property Host/Owner", "Real Estate Agent", "Property Investor", "Tenant"]
+LANDLORD_USER_TYPES = ["Guest/Investor", "Land Developer", "Real Estate Agent", "Land Owner", "Investment Firm"]
+
+
+def user_type_key(user_type):
+    """Stable key for a selector value ("Guest/Buyer" -> "guest")"""
+    return (user_type or "").lower().split('/')[0]
+
+
+def canonical_prompts():
+    """(assistant, user type key, prompt) for every pre-generated answer"""
+    jobs = []
+    for assistant, actions, try_these, user_types in (
+        ("mr_x", MR_X_QUICK_ACTIONS, MR_X_TRY_THESE, MR_X_USER_TYPES),
+        ("landlord", LANDLORD_QUICK_ACTIONS, LANDLORD_TRY_THESE, LANDLORD_USER_TYPES),
+    ):
+        for user_type in user_types:
+            for prompt in actions.values():
+                jobs.append((assistant, user_type_key(user_type), prompt))
+        # The demo sidebar has no user type selector
+        for prompt in try_these.values():
+            jobs.append((assistant, "", prompt))
+    return jobs
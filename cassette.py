@@ -0,0 +1,154 @@
+# cassette.py
+# Record real assistant model calls once, replay them offline forever.
+#
+#   CLAUDE_CASSETTE=chat.jsonl CLAUDE_CASSETTE_MODE=record streamlit run merge.py
+#   CLAUDE_CASSETTE=chat.jsonl streamlit run merge.py          # replay, no API key needed
+#   CLAUDE_CASSETTE_LATENCY_SCALE=0 ...                        # replay without waiting
+#
+# A cassette is a JSON-lines file with one model call per line: the request,
+# the response with its usage, how long the call took and, for streamed
+# calls, when each chunk arrived. Requests are matched on model, max_tokens,
+# system prompt and messages; a request recorded several times is replayed
+# in recording order, then from the start again.
+
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from llm_backends import LLMBackend, LLMResponse, StreamedResponse
+
+
+def request_key(model, max_tokens, system, messages):
+    """Stable id of a model request (temperature aside)"""
+    request = {"model": model, "max_tokens": max_tokens, "system": system, "messages": messages}
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class CassetteMiss(KeyError):
+    """A replayed request that was never recorded"""
+
+
+class Cassette:
+    """Recorded model calls, appended to and read from a JSON-lines file"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = defaultdict(list)
+        self.positions = defaultdict(int)
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with self.path.open(encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["key"]].append(entry)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.entries.values())
+
+    def add(self, entry):
+        """Store one call in memory and on disk"""
+        with self._lock:
+            self.entries[entry["key"]].append(entry)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def take(self, key):
+        """Next recorded call for key; raises CassetteMiss"""
+        with self._lock:
+            entries = self.entries.get(key)
+            if not entries:
+                raise CassetteMiss(key)
+            entry = entries[self.positions[key] % len(entries)]
+            self.positions[key] += 1
+            return entry
+
+
+class RecordingBackend(LLMBackend):
+    """Passes calls to another backend and records each one in a cassette"""
+
+    name = "recording"
+
+    def __init__(self, backend, cassette):
+        self.backend = backend
+        self.cassette = cassette
+
+    def _record(self, request, response, seconds, chunks=None):
+        self.cassette.add({
+            "key": request_key(**request),
+            "request": request,
+            "response": vars(response),
+            "seconds": round(seconds, 4),
+            "chunks": chunks,
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        })
+
+    def complete(self, model, max_tokens, system, messages, temperature=None):
+        started = time.perf_counter()
+        response = self.backend.complete(model, max_tokens, system, messages, temperature)
+        self._record({"model": model, "max_tokens": max_tokens, "system": system, "messages": messages},
+                     response, time.perf_counter() - started)
+        return response
+
+    def stream(self, model, max_tokens, system, messages, temperature=None):
+        def chunks():
+            started = time.perf_counter()
+            recorded = []
+            streamed = self.backend.stream(model, max_tokens, system, messages, temperature)
+            for chunk in streamed:
+                recorded.append([round(time.perf_counter() - started, 4), chunk])
+                yield chunk
+            self._record({"model": model, "max_tokens": max_tokens, "system": system, "messages": messages},
+                         streamed.response, time.perf_counter() - started, recorded)
+            return streamed.response
+        return StreamedResponse(chunks())
+
+
+class ReplayBackend(LLMBackend):
+    """Serves calls from a cassette with their recorded latency times latency_scale.
+
+    Requests missing from the cassette raise CassetteMiss, or go to
+    fallback (another backend) when one is given.
+    """
+
+    name = "replay"
+
+    def __init__(self, cassette, latency_scale=1.0, fallback=None):
+        self.cassette = cassette
+        self.latency_scale = latency_scale
+        self.fallback = fallback
+
+    def _entry(self, model, max_tokens, system, messages):
+        try:
+            return self.cassette.take(request_key(model, max_tokens, system, messages))
+        except CassetteMiss:
+            if self.fallback is None:
+                raise
+            return None
+
+    def complete(self, model, max_tokens, system, messages, temperature=None):
+        entry = self._entry(model, max_tokens, system, messages)
+        if entry is None:
+            return self.fallback.complete(model, max_tokens, system, messages, temperature)
+        time.sleep(entry["seconds"] * self.latency_scale)
+        return LLMResponse(**entry["response"])
+
+    def stream(self, model, max_tokens, system, messages, temperature=None):
+        entry = self._entry(model, max_tokens, system, messages)
+        if entry is None:
+            return self.fallback.stream(model, max_tokens, system, messages, temperature)
+
+        def chunks():
+            response = LLMResponse(**entry["response"])
+            # Calls recorded without streaming arrive as one chunk at the end
+            timeline = entry.get("chunks") or [[entry["seconds"], response.text]]
+            started = time.perf_counter()
+            for offset, chunk in timeline:
+                time.sleep(max(0.0, offset * self.latency_scale - (time.perf_counter() - started)))
+                yield chunk
+            return response
+        return StreamedResponse(chunks())
@@ -0,0 +1,129 @@
+# chat_history.py
+# Assistant chat history: a bounded window in session state, everything in
+# the messages table.
+#
+# Each session keeps only its last CHAT_HISTORY_TURNS turns in memory, so
+# memory use and render time stay flat however long a conversation runs.
+# Every turn is also queued on a process-wide write-behind buffer, which
+# inserts the user and assistant Message rows in batches from a background
+# thread. Turns that have scrolled out of the window are read back a page
+# at a time when the user asks for them.
+
+import atexit
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+
+from database import SessionLocal, create_messages, get_messages
+
+logger = logging.getLogger(__name__)
+
+# Turns kept in session state per assistant
+CHAT_HISTORY_TURNS = 20
+# Turns per page of earlier history
+HISTORY_PAGE_TURNS = 10
+
+
+def new_chat_history():
+    """Empty in-session history: (question, answer, asked_at) turns, oldest dropped first"""
+    return deque(maxlen=CHAT_HISTORY_TURNS)
+
+
+class MessageWriteBehind:
+    """Buffers chat messages and batch-inserts them on a background thread.
+
+    A batch is written once batch_size messages are waiting or every
+    flush_seconds. Failed batches go back to the front of the buffer for
+    the next attempt; past max_pending messages the oldest are dropped.
+    Whatever is pending when the process exits is flushed.
+    """
+
+    def __init__(self, session_factory=SessionLocal, batch_size=50, flush_seconds=2.0, max_pending=5000):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.stats = {"written": 0, "batches": 0, "failures": 0, "dropped": 0}
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        atexit.register(self.flush)
+
+    def add(self, user_id, assistant_type, role, content, timestamp=None):
+        """Queue one message; returns immediately"""
+        row = {"user_id": user_id, "assistant_type": assistant_type, "role": role,
+               "content": content, "timestamp": timestamp or datetime.utcnow()}
+        with self._condition:
+            self._keep_room(1)
+            self.pending.append(row)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="chat-write-behind", daemon=True)
+                self._thread.start()
+            if len(self.pending) >= self.batch_size:
+                self._condition.notify()
+
+    def _keep_room(self, count):
+        while self.pending and len(self.pending) + count > self.max_pending:
+            self.pending.popleft()
+            self.stats["dropped"] += 1
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: len(self.pending) >= self.batch_size, self.flush_seconds)
+            self.flush()
+
+    def flush(self):
+        """Write everything pending now; returns the number of messages written"""
+        with self._flush_lock:
+            with self._condition:
+                rows = list(self.pending)
+                self.pending.clear()
+            if not rows:
+                return 0
+            db = self.session_factory()
+            try:
+                create_messages(db, rows)
+            except Exception as e:
+                db.rollback()
+                logger.warning("chat history write of %d messages failed: %s", len(rows), e)
+                with self._condition:
+                    self.stats["failures"] += 1
+                    self._keep_room(len(rows))
+                    self.pending.extendleft(reversed(rows[-self.max_pending:]))
+                return 0
+            finally:
+                db.close()
+            with self._condition:
+                self.stats["written"] += len(rows)
+                self.stats["batches"] += 1
+            return len(rows)
+
+
+def record_turn(history, writer, user_id, assistant_type, question, answer):
+    """Add a turn to the session window and, for a signed-in user, queue it for the database"""
+    asked_at = datetime.utcnow()
+    history.append((question, answer, asked_at))
+    if writer is not None and user_id is not None:
+        writer.add(user_id, assistant_type, "user", question, asked_at)
+        writer.add(user_id, assistant_type, "assistant", answer, asked_at)
+
+
+def load_earlier_turns(db, user_id, assistant_type, before, page=0, page_turns=HISTORY_PAGE_TURNS):
+    """(turns oldest first, whether older ones exist) for one page of history before a timestamp.
+
+    Page 0 holds the turns just before `before`, page 1 the ones before those.
+    """
+    rows = get_messages(db, user_id, assistant_type, before, page * page_turns * 2, page_turns * 2 + 1)
+    has_more = len(rows) > page_turns * 2
+    turns = []
+    for message in reversed(rows[:page_turns * 2]):
+        if message.role == "user":
+            turns.append([message.content, "", message.timestamp])
+        elif turns and not turns[-1][1]:
+            turns[-1][1] = message.content
+        else:
+            turns.append(["", message.content, message.timestamp])
+    return [tuple(turn) for turn in turns], has_more
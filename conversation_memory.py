@@ -0,0 +1,125 @@
+# conversation_memory.py
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from prompt_budget import estimate_tokens, shorten
+
+logger = logging.getLogger(__name__)
+
+# Token allowances for earlier conversation in each model call
+RECENT_TURN_TOKENS = 300
+SUMMARY_TOKENS = 120
+
+# Older turns wait until this many can be folded into the summary in one go
+MIN_FOLD_TURNS = 2
+
+# Shared by every conversation in the process; summaries never block a reply
+SUMMARY_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="conversation-summary")
+
+
+def extractive_summary(previous, turns, max_tokens=SUMMARY_TOKENS):
+    """Summary lines for turns (question and first answer sentence) after previous; oldest lines drop first"""
+    lines = [line for line in (previous or "").splitlines() if line.strip()]
+    for question, answer, *_ in turns:
+        answer = shorten(answer.replace("\n", " "), 30)
+        lines.append(f"- Asked: {shorten(question, 20)} Answered: {answer}")
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return shorten("\n".join(lines), max_tokens)
+
+
+def turn_messages(turns):
+    """Recent turns as alternating user/assistant Messages API entries"""
+    messages = []
+    for question, answer, *_ in turns:
+        messages.append({"role": "user", "content": question})
+        messages.append({"role": "assistant", "content": answer})
+    return messages
+
+
+class ConversationMemory:
+    """Rolling context for one conversation with an assistant.
+
+    context(turns) hands back the latest turns verbatim, as many as fit
+    recent_tokens (long answers are cut first), plus a summary of the
+    turns before them. Older turns are folded into the summary by
+    summarize(previous_summary, turns) on a background thread; until that
+    finishes the previous summary is used. Either way the conversation adds
+    at most recent_tokens + summary_tokens to a prompt.
+
+    Turns are (question, answer, asked_at) tuples, oldest first.
+    """
+
+    def __init__(self, summarize=extractive_summary, recent_tokens=RECENT_TURN_TOKENS,
+                 summary_tokens=SUMMARY_TOKENS, min_fold_turns=MIN_FOLD_TURNS, executor=SUMMARY_EXECUTOR):
+        self.summarize = summarize
+        self.recent_tokens = recent_tokens
+        self.summary_tokens = summary_tokens
+        self.min_fold_turns = min_fold_turns
+        self.executor = executor
+        self.summary = ""
+        self.summarized_until = None      # asked_at of the last turn in the summary
+        self._folding = None
+        self._generation = 0              # bumped by reset so late summaries are discarded
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Forget the summary, e.g. when the chat was cleared"""
+        with self._lock:
+            self.summary = ""
+            self.summarized_until = None
+            self._generation += 1
+
+    def recent(self, turns):
+        """Latest turns that fit recent_tokens, oldest first, answers cut to fit"""
+        kept, used = [], 0
+        # Cut long answers so a few turns fit rather than one essay
+        longest_answer = max(self.recent_tokens // 3, 1)
+        for question, answer, asked_at in reversed(turns):
+            question, answer = shorten(question, longest_answer), shorten(answer, longest_answer)
+            size = estimate_tokens(question) + estimate_tokens(answer)
+            if used + size > self.recent_tokens:
+                break
+            kept.append((question, answer, asked_at))
+            used += size
+        kept.reverse()
+        return kept
+
+    def context(self, turns, summarize=None):
+        """(summary, recent turns) to send with the next question.
+
+        summarize, if given, replaces the memory's own for a fold this call
+        starts, e.g. one bound to the user asking.
+        """
+        turns = list(turns)
+        if not turns:
+            # A new or cleared conversation
+            self.reset()
+            return "", []
+        recent = self.recent(turns)
+        older = turns[:len(turns) - len(recent)]
+        with self._lock:
+            unsummarized = [t for t in older if self.summarized_until is None or t[2] > self.summarized_until]
+            if len(unsummarized) >= self.min_fold_turns and self._folding is None:
+                self._folding = self.executor.submit(self._fold, summarize or self.summarize, self.summary,
+                                                     unsummarized, self._generation)
+            return self.summary, recent
+
+    def _fold(self, summarize, previous, turns, generation):
+        try:
+            summary = shorten(summarize(previous, turns), self.summary_tokens)
+        except Exception as e:
+            logger.warning("conversation summary failed: %s", e)
+            summary = extractive_summary(previous, turns, self.summary_tokens)
+        with self._lock:
+            if generation == self._generation:
+                self.summary = summary
+                self.summarized_until = turns[-1][2]
+            self._folding = None
+
+    def wait(self):
+        """Block until a running summary is done (tests, shutdown)"""
+        folding = self._folding
+        if folding is not None:
+            folding.result()
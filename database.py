@@ -261,6 +261,16 @@ class Inquiry(Base):
 
 # ==================== DATABASE FUNCTIONS ====================
 
+# Callbacks run after a property is created, updated or deleted (e.g. cache invalidation)
+property_change_listeners = []
+
+
+def notify_property_change():
+    """Tell every registered listener that property rows changed"""
+    for listener in property_change_listeners:
+        listener()
+
+
 def init_db():
     """Initialize database - create all tables"""
     Base.metadata.create_all(bind=engine)
@@ -308,6 +318,7 @@ def create_property(db, owner_id, **property_data):
     db.add(property)
     db.commit()
     db.refresh(property)
+    notify_property_change()
     return property
 
 
@@ -329,6 +340,7 @@ def update_property(db, property_id, **updates):
             setattr(property, key, value)
         db.commit()
         db.refresh(property)
+        notify_property_change()
     return property
 
 
@@ -338,10 +350,26 @@ def delete_property(db, property_id):
     if property:
         db.delete(property)
         db.commit()
+        notify_property_change()
         return True
     return False
 
 
+def create_messages(db, rows):
+    """Insert many chat messages (dicts of Message columns) in one batch"""
+    db.bulk_insert_mappings(Message, rows)
+    db.commit()
+    return len(rows)
+
+
+def get_messages(db, user_id, assistant_type, before=None, offset=0, limit=20):
+    """A user's messages with one assistant, newest first, optionally only those before a timestamp"""
+    query = db.query(Message).filter(Message.user_id == user_id, Message.assistant_type == assistant_type)
+    if before is not None:
+        query = query.filter(Message.timestamp < before)
+    return query.order_by(Message.timestamp.desc(), Message.id.desc()).offset(offset).limit(limit).all()
+
+
 if __name__ == "__main__":
     print("Testing database connection...")
     init_db()
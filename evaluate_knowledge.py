@@ -0,0 +1,104 @@
+# evaluate_knowledge.py
+# Offline retrieval quality check for the knowledge search backends.
+#
+#   python evaluate_knowledge.py
+#   python evaluate_knowledge.py --backends csv index --k 3 --min-recall 0.8
+#
+# Labelled queries come from knowledge_eval_queries.csv (QUERY, DOMAIN and
+# EXPECTED_QUESTIONS separated by ';'), plus every question in the knowledge
+# CSVs asked verbatim. A faster backend should not score lower here.
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmark_knowledge import open_backend
+
+PROPERTY_PATH = 'nigeria_property_knowledge.csv'
+LAND_PATH = 'nigeria_land_knowledge.csv'
+LABELS_PATH = 'knowledge_eval_queries.csv'
+
+
+def load_labels(labels_path=LABELS_PATH, property_path=PROPERTY_PATH, land_path=LAND_PATH, include_exact=True):
+    """(domain, query, expected question set) triples"""
+    labels = []
+    for row in pd.read_csv(labels_path).fillna("").to_dict("records"):
+        expected = {q.strip() for q in row["EXPECTED_QUESTIONS"].split(";") if q.strip()}
+        labels.append((row["DOMAIN"], row["QUERY"], expected))
+
+    if include_exact:
+        for domain, path in (("property", property_path), ("land", land_path)):
+            for question in pd.read_csv(path)["QUESTION"].dropna():
+                labels.append((domain, question, {question}))
+    return labels
+
+
+def evaluate(search, labels, k=3):
+    """recall@k, MRR@k and latency for one backend's search(domain, query, max_results)"""
+    recalls, reciprocal_ranks, latencies, misses = [], [], [], []
+    for domain, query, expected in labels:
+        started = time.perf_counter()
+        results = search(domain, query, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        returned = [item["question"] for item in results[:k]]
+        found = expected.intersection(returned)
+        recalls.append(len(found) / len(expected))
+        rank = next((i + 1 for i, question in enumerate(returned) if question in expected), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+        if not found:
+            misses.append({"domain": domain, "query": query, "returned": returned})
+
+    latencies = np.array(latencies)
+    return {
+        "queries": len(labels),
+        f"recall@{k}": round(float(np.mean(recalls)), 4),
+        "mrr": round(float(np.mean(reciprocal_ranks)), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 4),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 4),
+        "misses": misses,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate knowledge retrieval quality per backend")
+    parser.add_argument("--backends", nargs="+", default=["csv", "sqlite", "index"])
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--labels", default=LABELS_PATH)
+    parser.add_argument("--no-exact", action="store_true", help="skip the verbatim-question labels")
+    parser.add_argument("--output", help="write the full report (including misses) as JSON")
+    parser.add_argument("--min-recall", type=float, help="exit non-zero if any backend falls below this recall@k")
+    args = parser.parse_args(argv)
+
+    labels = load_labels(args.labels, include_exact=not args.no_exact)
+    report = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for backend in args.backends:
+            search = open_backend(backend, PROPERTY_PATH, LAND_PATH, os.path.join(workdir, f"{backend}.db"))
+            report[backend] = evaluate(search, labels, args.k)
+
+    print(f"{'backend':<10}{'recall@' + str(args.k):>10}{'MRR':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for backend, result in report.items():
+        print(f"{backend:<10}{result[f'recall@{args.k}']:>10.3f}{result['mrr']:>8.3f}"
+              f"{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.min_recall is not None:
+        failing = [b for b, r in report.items() if r[f"recall@{args.k}"] < args.min_recall]
+        if failing:
+            print(f"Recall below {args.min_recall}: {', '.join(failing)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
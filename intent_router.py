@@ -0,0 +1,73 @@
+# intent_router.py
+import logging
+
+from knowledge_index import QueryAnalyzer, tokenize
+
+logger = logging.getLogger(__name__)
+
+# A knowledge question this close to the user's question is served as-is
+DIRECT_ANSWER_THRESHOLD = 0.8
+
+# Words that ask for comparison, planning or personal advice: worth a model call
+SYNTHESIS_CUES = {
+    "compare", "comparison", "versus", "vs", "better", "best", "should", "recommend",
+    "advise", "advice", "plan", "strategy", "my", "our", "afford", "worth",
+}
+
+
+class RouteDecision:
+    """Where one question was sent and why"""
+
+    def __init__(self, route, similarity, matched_question, reason):
+        self.route = route                        # "knowledge" or "llm"
+        self.similarity = similarity
+        self.matched_question = matched_question
+        self.reason = reason
+
+    @property
+    def direct(self):
+        return self.route == "knowledge"
+
+
+class IntentRouter:
+    """Answers FAQ-style questions straight from the knowledge base.
+
+    A question goes to the model only when it asks for synthesis (comparison,
+    advice, figures of its own) or when the best knowledge row does not match
+    it closely. Similarity is the Dice overlap of the analyzed terms of the
+    question and of the top hit's question. Every decision is logged and
+    counted in stats.
+    """
+
+    def __init__(self, analyzer=None, threshold=DIRECT_ANSWER_THRESHOLD):
+        self.analyzer = analyzer or QueryAnalyzer()
+        self.threshold = threshold
+        self.stats = {"knowledge": 0, "llm": 0}
+
+    def similarity(self, question, knowledge_question):
+        """Dice overlap of the two questions' search terms"""
+        asked = set(self.analyzer.terms(question))
+        known = set(self.analyzer.terms(knowledge_question))
+        if not asked or not known:
+            return 0.0
+        return 2.0 * len(asked & known) / (len(asked) + len(known))
+
+    def route(self, question, knowledge, assistant=""):
+        """RouteDecision for question given its knowledge hits, best first"""
+        words = tokenize(question)
+        top_question = knowledge[0]["question"] if knowledge else None
+        similarity = self.similarity(question, top_question) if top_question else 0.0
+
+        if not knowledge:
+            decision = RouteDecision("llm", 0.0, None, "no knowledge match")
+        elif any(word in SYNTHESIS_CUES or word.isdigit() for word in words):
+            decision = RouteDecision("llm", similarity, top_question, "synthesis question")
+        elif similarity >= self.threshold:
+            decision = RouteDecision("knowledge", similarity, top_question, "close knowledge match")
+        else:
+            decision = RouteDecision("llm", similarity, top_question, "weak knowledge match")
+
+        self.stats[decision.route] += 1
+        logger.info("route=%s assistant=%s similarity=%.2f reason=%s question=%r matched=%r",
+                    decision.route, assistant, similarity, decision.reason, question, top_question)
+        return decision
@@ -0,0 +1,136 @@
+# knowledge_base.py
+import functools
+import hashlib
+import os
+import streamlit as st
+import pandas as pd
+from knowledge_index import KnowledgeIndex, QueryAnalyzer, ShardedKnowledgeIndex, SynonymExpander, SYNONYMS_PATH
+from knowledge_dedup import merge_duplicates
+
+def knowledge_content_version(property_path='nigeria_property_knowledge.csv', land_path='nigeria_land_knowledge.csv',
+                              synonyms_path=SYNONYMS_PATH):
+    """Short hash of the knowledge files; answers built on other content are stale
+
+    The app asks on every rerun, so the files are only read and hashed again
+    when one of them has a new inode, mtime or size.
+    """
+    files = []
+    for path in (property_path, land_path, synonyms_path):
+        try:
+            info = os.stat(path)
+            files.append((path, info.st_ino, info.st_mtime_ns, info.st_size))
+        except FileNotFoundError:
+            files.append((path, None, None, None))
+    return _content_hash(tuple(files))
+
+@functools.lru_cache(maxsize=16)
+def _content_hash(files):
+    """sha256 prefix of the files listed by knowledge_content_version"""
+    digest = hashlib.sha256()
+    for path, *_ in files:
+        try:
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        except FileNotFoundError:
+            digest.update(b"-")
+    return digest.hexdigest()[:16]
+
+class CSVKnowledgeBase:
+    """Connects to your CSV knowledge database.
+    
+    shards splits the index so each query fans out across a pool
+    (shard_executor "thread" or "process"); None keeps one index.
+    dedupe merges near-duplicate rows before indexing, so the top results
+    carry distinct answers; duplicate_groups records what was merged.
+    """
+    
+    def __init__(self, property_path='nigeria_property_knowledge.csv', land_path='nigeria_land_knowledge.csv',
+                 synonyms_path=SYNONYMS_PATH, shards=None, shard_executor="thread", dedupe=True):
+        self.property_path = property_path
+        self.land_path = land_path
+        self.synonyms_path = synonyms_path
+        self.shards = shards
+        self.shard_executor = shard_executor
+        self.dedupe = dedupe
+        self.duplicate_groups = {}
+        self.property_df = None
+        self.land_df = None
+        self.index = None
+        self.analyzer = QueryAnalyzer()
+        self.content_version = None
+        self.connect()
+    
+    def connect(self):
+        """Load CSV files and build one search index over both domains"""
+        try:
+            self.property_df = pd.read_csv(self.property_path)
+            self.land_df = pd.read_csv(self.land_path)
+            self.content_version = knowledge_content_version(self.property_path, self.land_path, self.synonyms_path)
+            self.analyzer = analyzer = QueryAnalyzer(synonyms=SynonymExpander.from_csv(self.synonyms_path))
+            tables = {"property": self.property_df, "land": self.land_df}
+            if self.dedupe:
+                for domain, df in tables.items():
+                    tables[domain], groups = merge_duplicates(df)
+                    questions = df["QUESTION"].tolist()
+                    self.duplicate_groups[domain] = [[questions[i] for i in group] for group in groups]
+            if self.shards:
+                self.index = ShardedKnowledgeIndex.from_domains(tables, analyzer, self.shards, self.shard_executor)
+            else:
+                self.index = KnowledgeIndex.from_domains(tables, analyzer)
+            return True
+        except Exception as e:
+            st.error(f"CSV loading issue: {e}")
+            return False
+    
+    def search_knowledge(self, query, max_results=3, filters=None, domains=None, domain_boosts=None):
+        """Search property and/or land knowledge in one pass.
+        
+        domains limits the corpora ("property", "land"); domain_boosts weights them,
+        e.g. {"property": 1.0, "land": 0.5}.
+        """
+        if self.index is None or not query or not query.strip():
+            return []
+        
+        try:
+            filters = dict(filters or {})
+            if domains:
+                filters["DOMAIN"] = list(domains)
+            mask = self.index.filter_bitmap(filters) if filters else None
+            hits = self.index.search(query, max_results, mask=mask, domain_boosts=domain_boosts)
+            knowledge = [item for _, item in hits]
+            
+            # Second pass: catch misspellings the term search misses
+            if len(knowledge) < max_results:
+                matched_rows = [row_id for row_id, _ in hits]
+                for _, item in self.index.fuzzy_search(query, max_results - len(knowledge), exclude=matched_rows, mask=mask):
+                    knowledge.append(item)
+            
+            return knowledge
+        except Exception as e:
+            st.error(f"Error searching knowledge CSV: {e}")
+            return []
+    
+    def search_property_knowledge(self, query, max_results=3, filters=None):
+        """Search your property knowledge database, optionally restricted by facet filters"""
+        return self.search_knowledge(query, max_results, filters, domains=["property"])
+    
+    def search_land_knowledge(self, query, max_results=3, filters=None):
+        """Search your land knowledge database, optionally restricted by facet filters"""
+        return self.search_knowledge(query, max_results, filters, domains=["land"])
+    
+    def facet_counts(self, filters=None, domains=None):
+        """Counts per CATEGORY / SUBCATEGORY / DIFFICULTY_LEVEL value"""
+        if self.index is None:
+            return {}
+        filters = dict(filters or {})
+        if domains:
+            filters["DOMAIN"] = list(domains)
+        return self.index.facet_counts(filters)
+    
+    def property_facet_counts(self, filters=None):
+        """Facet counts for property knowledge"""
+        return self.facet_counts(filters, domains=["property"])
+    
+    def land_facet_counts(self, filters=None):
+        """Facet counts for land knowledge"""
+        return self.facet_counts(filters, domains=["land"])
@@ -0,0 +1,181 @@
+# knowledge_dedup.py
+# Near-duplicate detection for knowledge rows (MinHash + LSH).
+#
+#   python knowledge_dedup.py nigeria_property_knowledge.csv nigeria_land_knowledge.csv
+#   python knowledge_dedup.py nigeria_land_knowledge.csv --threshold 0.7 --output land_deduped.csv
+#
+# Each row's question + answer is cut into word shingles and summarized by a
+# MinHash signature. Signatures are split into bands; rows sharing any band
+# become candidate pairs, and only those are compared exactly. Cost grows
+# with the number of rows, not the number of pairs.
+
+import argparse
+import sys
+import zlib
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from knowledge_index import tokenize, table_records
+
+# Smallest prime above 2**32; with 32-bit hashes and multipliers a*x + b fits in uint64
+HASH_PRIME = (1 << 32) + 15
+
+
+def shingles(text, size=3):
+    """Set of overlapping word n-grams (the whole text when it is shorter than size)"""
+    words = tokenize(text)
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a, b):
+    """Overlap of two shingle sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class NearDuplicateDetector:
+    """Finds clusters of knowledge rows whose question + answer text nearly match.
+
+    threshold is the Jaccard similarity of word shingles a pair must reach.
+    num_perm hash functions are split into bands; more bands find more
+    candidates (higher recall) at the cost of more exact comparisons.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=64, bands=16, shingle_size=3, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.band_rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, HASH_PRIME, num_perm, dtype=np.uint64)
+
+    def row_shingles(self, row):
+        """Shingles of one knowledge row's question and answer"""
+        return shingles(f"{row.get('QUESTION', '')} {row.get('ANSWER', '')}", self.shingle_size)
+
+    def signatures(self, shingle_sets, chunk=200000):
+        """MinHash signatures, one row per shingle set.
+
+        Per hash function a signature holds the smallest permuted shingle hash.
+        All shingles are permuted together in chunks and reduced per row, so
+        the work is a few large numpy operations rather than one per row.
+        """
+        counts = np.array([len(s) for s in shingle_sets], dtype=np.int64)
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode()) for shingle_set in shingle_sets for shingle in shingle_set),
+            dtype=np.uint64, count=int(counts.sum()),
+        )
+        result = np.full((len(shingle_sets), len(self.a)), HASH_PRIME, dtype=np.uint64)
+        ends = np.cumsum(counts)
+        starts = ends - counts
+        row = 0
+        while row < len(shingle_sets):
+            # Whole rows per chunk so reduceat never splits one
+            last = max(row + 1, int(np.searchsorted(ends, starts[row] + chunk, side="right")))
+            rows = np.arange(row, last)
+            rows = rows[counts[rows] > 0]
+            if len(rows):
+                block = hashes[starts[rows[0]]:ends[rows[-1]]]
+                permuted = (np.outer(block, self.a) + self.b) % np.uint64(HASH_PRIME)
+                result[rows] = np.minimum.reduceat(permuted, starts[rows] - starts[rows[0]], axis=0)
+            row = last
+        return result
+
+    def candidate_pairs(self, signatures):
+        """Row pairs sharing at least one LSH band.
+
+        A bucket pairs its first row with each other row rather than every
+        row with every other, which keeps templated corpora (thousands of
+        rows per bucket) linear; clustering links the rest transitively.
+        """
+        pairs = set()
+        for band in range(self.bands):
+            buckets = defaultdict(list)
+            columns = slice(band * self.band_rows, (band + 1) * self.band_rows)
+            for row_id, key in enumerate(map(bytes, signatures[:, columns])):
+                buckets[key].append(row_id)
+            for first, *others in buckets.values():
+                pairs.update((first, second) for second in others)
+        return pairs
+
+    def clusters(self, data):
+        """Groups of near-duplicate row positions, each in table order, earliest group first"""
+        records = table_records(data)
+        row_shingles = [self.row_shingles(row) for row in records]
+        if not records:
+            return []
+        signatures = self.signatures(row_shingles)
+
+        parent = list(range(len(records)))
+
+        def find(row_id):
+            while parent[row_id] != row_id:
+                parent[row_id] = parent[parent[row_id]]
+                row_id = parent[row_id]
+            return row_id
+
+        for first, second in self.candidate_pairs(signatures):
+            root_first, root_second = find(first), find(second)
+            if root_first != root_second and jaccard(row_shingles[first], row_shingles[second]) >= self.threshold:
+                parent[max(root_first, root_second)] = min(root_first, root_second)
+
+        groups = defaultdict(list)
+        for row_id in range(len(records)):
+            groups[find(row_id)].append(row_id)
+        return sorted(members for members in groups.values() if len(members) > 1)
+
+
+def merge_duplicates(data, detector=None):
+    """Drop near-duplicate rows, keeping the first of each cluster.
+
+    The kept row gains any tag words its duplicates had. Returns
+    (records, clusters) where clusters are the row positions that were merged.
+    """
+    records = table_records(data)
+    clusters = (detector or NearDuplicateDetector()).clusters(records)
+    dropped = set()
+    for keeper, *duplicates in clusters:
+        tags = list(dict.fromkeys(str(records[keeper].get("TAGS", "")).split("_")))
+        for row_id in duplicates:
+            tags.extend(t for t in str(records[row_id].get("TAGS", "")).split("_") if t not in tags)
+            dropped.add(row_id)
+        records[keeper] = dict(records[keeper], TAGS="_".join(t for t in tags if t))
+    return [row for row_id, row in enumerate(records) if row_id not in dropped], clusters
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report or merge near-duplicate knowledge rows")
+    parser.add_argument("paths", nargs="+", help="knowledge CSVs to check")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--output", help="write the merged rows of a single input CSV here")
+    args = parser.parse_args(argv)
+    if args.output and len(args.paths) != 1:
+        parser.error("--output needs exactly one input CSV")
+
+    detector = NearDuplicateDetector(args.threshold)
+    found = 0
+    for path in args.paths:
+        records = table_records(pd.read_csv(path))
+        merged, clusters = merge_duplicates(records, detector)
+        found += sum(len(cluster) - 1 for cluster in clusters)
+        print(f"{path}: {len(records)} rows, {len(clusters)} near-duplicate groups")
+        for cluster in clusters:
+            for row_id in cluster:
+                print(f"  row {row_id + 1}: {records[row_id].get('QUESTION', '')}")
+            print()
+        if args.output:
+            pd.DataFrame(merged).to_csv(args.output, index=False)
+            print(f"{len(merged)} rows written to {args.output}")
+    return 1 if found and not args.output else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
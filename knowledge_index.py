@@ -0,0 +1,858 @@
+# knowledge_index.py
+import csv
+import heapq
+import math
+import os
+import re
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+# Words that carry no meaning for search
+STOP_WORDS = {
+    "a", "about", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does",
+    "for", "from", "how", "i", "in", "is", "it", "me", "my", "of", "on", "or",
+    "should", "that", "the", "there", "this", "to", "what", "when", "where",
+    "which", "who", "why", "with", "you", "your", "i'm", "im", "tell", "please",
+    "want", "would", "like", "get", "give", "whats"
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Structured columns exposed as filters; values like "beginner_7" group as "beginner"
+FACETS = ["CATEGORY", "SUBCATEGORY", "DIFFICULTY_LEVEL"]
+FACET_SUFFIX = re.compile(r"_\d+$")
+
+# How much a term counts depending on where it appears in a row
+FIELD_WEIGHTS = {"QUESTION": 3.0, "TAGS": 2.0, "ANSWER": 1.0}
+
+# Corpora at least this large are indexed across a process pool by default
+PARALLEL_BUILD_MIN_ROWS = 50000
+
+# Shards per sharded index when not given (one per core)
+DEFAULT_SHARDS = os.cpu_count() or 1
+
+# Curated aliases ("C of O" -> "certificate of occupancy"), maintained by content staff
+SYNONYMS_PATH = 'nigeria_real_estate_synonyms.csv'
+
+
+def tokenize(text):
+    """Lowercase text and split it into words (tag underscores become word breaks)"""
+    if text is None:
+        return []
+    return TOKEN_PATTERN.findall(str(text).lower().replace("'", ""))
+
+
+def word_trigrams(word):
+    """Character trigrams of a word, padded like Postgres pg_trgm"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def stem(word):
+    """Light suffix stripping so "taxes", "taxed" and "tax" share a term"""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    for suffix in ("ing", "ed"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in "lsz":
+                word = word[:-1]
+            return word
+    if word.endswith(("sses", "xes", "zes", "ches", "shes")):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    if len(word) > 4 and word.endswith("e"):
+        word = word[:-1]
+    return word
+
+
+class SynonymExpander:
+    """Alias table compiled into a word-level trie for longest-match lookup.
+
+    Each group is a canonical phrase plus its aliases; any member found in a
+    query pulls in every other member of its group.
+    """
+
+    END = "$"
+
+    def __init__(self, groups=()):
+        self.groups = []     # group_id -> list of member phrases (as word lists)
+        self.trie = {}
+        for group in groups:
+            members = [tokenize(phrase) for phrase in group]
+            members = [words for words in members if words]
+            if len(members) < 2:
+                continue
+            group_id = len(self.groups)
+            self.groups.append(members)
+            for words in members:
+                node = self.trie
+                for word in words:
+                    node = node.setdefault(word, {})
+                node.setdefault(self.END, set()).add(group_id)
+
+    @classmethod
+    def from_csv(cls, path=SYNONYMS_PATH):
+        """Load CANONICAL,ALIASES rows (aliases separated by ';'); a missing file means no synonyms"""
+        groups = []
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    canonical = (row.get("CANONICAL") or "").strip()
+                    aliases = [a.strip() for a in (row.get("ALIASES") or "").split(";") if a.strip()]
+                    if canonical and aliases:
+                        groups.append([canonical] + aliases)
+        except FileNotFoundError:
+            pass
+        return cls(groups)
+
+    def __len__(self):
+        return len(self.groups)
+
+    def matches(self, words):
+        """(start, end, group ids) for each longest alias match, left to right"""
+        found = []
+        i = 0
+        while i < len(words):
+            node = self.trie
+            match_end, match_groups = None, None
+            for j in range(i, len(words)):
+                node = node.get(words[j])
+                if node is None:
+                    break
+                if self.END in node:
+                    match_end, match_groups = j + 1, node[self.END]
+            if match_end is None:
+                i += 1
+            else:
+                found.append((i, match_end, match_groups))
+                i = match_end
+        return found
+
+    def expansions(self, words):
+        """Words from every other member of the groups matched in words"""
+        extra = []
+        for start, end, group_ids in self.matches(words):
+            matched = words[start:end]
+            for group_id in sorted(group_ids):
+                for member in self.groups[group_id]:
+                    if member != matched:
+                        extra.extend(member)
+        return extra
+
+    def canonicalize(self, words):
+        """words with each alias replaced by its group's canonical (first) member"""
+        canonical = []
+        i = 0
+        for start, end, group_ids in self.matches(words):
+            canonical.extend(words[i:start])
+            canonical.extend(self.groups[min(group_ids)][0])
+            i = end
+        canonical.extend(words[i:])
+        return canonical
+
+    def expand_phrases(self, text):
+        """The query itself plus each synonym phrase it mentions, for substring backends"""
+        words = tokenize(text)
+        phrases = [text]
+        for start, end, group_ids in self.matches(words):
+            matched = words[start:end]
+            for group_id in sorted(group_ids):
+                for member in self.groups[group_id]:
+                    phrase = " ".join(member)
+                    if member != matched and phrase not in phrases:
+                        phrases.append(phrase)
+        return phrases
+
+
+class AnalyzedQuery:
+    """Search terms and the phrase a query was built from"""
+
+    def __init__(self, terms, phrase):
+        self.terms = terms
+        self.phrase = phrase
+
+    def __bool__(self):
+        return bool(self.terms)
+
+
+class QueryAnalyzer:
+    """Tokenizes, drops stop words and stems queries and indexed text alike.
+
+    Queries (not indexed text) are first expanded through the synonym table.
+    """
+
+    def __init__(self, stop_words=None, synonyms=None):
+        self.stop_words = STOP_WORDS if stop_words is None else stop_words
+        self.synonyms = synonyms
+        self._stems = {}
+
+    def stem(self, word):
+        """Memoized stem(); index builds see the same words millions of times"""
+        stemmed = self._stems.get(word)
+        if stemmed is None:
+            stemmed = self._stems[word] = stem(word)
+        return stemmed
+
+    def is_term(self, word):
+        """Single letters ("C of O") and stop words carry no search signal"""
+        return len(word) > 1 and word not in self.stop_words
+
+    def terms(self, text):
+        """Stemmed content terms of text, in order, with repeats"""
+        return [self.stem(word) for word in tokenize(text) if self.is_term(word)]
+
+    def canonical_terms(self, text):
+        """Unique stemmed terms of text with aliases mapped to one canonical phrase, for comparing questions"""
+        words = self.synonyms.canonicalize(tokenize(text)) if self.synonyms else tokenize(text)
+        return list(dict.fromkeys(self.stem(word) for word in words if self.is_term(word)))
+
+    def analyze(self, text):
+        """Parse a user query into unique terms plus the raw phrase for boosting"""
+        words = tokenize(text)
+        expanded = words + self.synonyms.expansions(words) if self.synonyms else words
+        terms = list(dict.fromkeys(self.stem(word) for word in expanded if self.is_term(word)))
+        return AnalyzedQuery(terms, " ".join(words))
+
+
+def facet_value(value):
+    """Normalize a facet cell so numbered variants share one value"""
+    return FACET_SUFFIX.sub("", str(value).strip()).lower()
+
+
+def bitmap_from_ids(row_ids):
+    """Build a bitmap in one pass instead of OR-ing one bit at a time"""
+    if not row_ids:
+        return 0
+    data = bytearray((max(row_ids) >> 3) + 1)
+    for row_id in row_ids:
+        data[row_id >> 3] |= 1 << (row_id & 7)
+    return int.from_bytes(data, "little")
+
+
+def iter_bits(bitmap):
+    """Row ids set in a bitmap, lowest first"""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for byte_index, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield (byte_index << 3) + low.bit_length() - 1
+            byte ^= low
+
+
+def bitmap_contains(bitmap, row_ids):
+    """0/1 numpy vector: whether each of row_ids is set in bitmap, for masking candidate scores"""
+    data = np.frombuffer(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+    row_ids = row_ids.astype(np.int64)
+    inside = (row_ids >> 3) < len(data)
+    found = np.zeros(len(row_ids), dtype=np.uint8)
+    found[inside] = (data[row_ids[inside] >> 3] >> (row_ids[inside] & 7)) & 1
+    return found
+
+
+def dense_postings(count, size):
+    """Whether count posting entries cover enough of size rows that a dense
+    row-sized array beats sorting them; otherwise the sort keeps the cost
+    proportional to the query"""
+    return count * 8 >= size
+
+
+def sum_by_row(row_ids, values, size):
+    """(distinct row ids ascending, summed values) of parallel posting arrays over size rows"""
+    if dense_postings(len(row_ids), size):
+        sums = np.bincount(row_ids, weights=values, minlength=size)
+        rows = np.flatnonzero(sums > 0)
+        return rows, sums[rows]
+    rows, positions = np.unique(row_ids, return_inverse=True)
+    return rows, np.bincount(positions, weights=values, minlength=len(rows))
+
+
+def max_by_row(postings, values):
+    """(distinct row ids ascending, largest value per row) of row-id arrays carrying one value each"""
+    order = np.argsort(values)[::-1]
+    row_ids = np.concatenate([postings[i] for i in order])
+    repeated = np.repeat(values[order], [len(postings[i]) for i in order])
+    # return_index gives each row's first entry, which holds its largest value
+    rows, first = np.unique(row_ids, return_index=True)
+    return rows, repeated[first]
+
+
+def top_rows(scores, k):
+    """Indices of the k highest positive scores, ties broken by lower index"""
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > k:
+        kth = np.partition(scores[candidates], len(candidates) - k)[len(candidates) - k]
+        candidates = candidates[scores[candidates] >= kth]
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:k]
+
+
+def knowledge_record(row):
+    """Turn a knowledge CSV/SQL row into the dict the assistants consume"""
+    record = {
+        "question": row.get("QUESTION", ""),
+        "answer": str(row.get("ANSWER", "")),
+        "category": str(row.get("CATEGORY", "")),
+        "tags": row.get("TAGS", "")
+    }
+    if row.get("DOMAIN"):
+        record["domain"] = row["DOMAIN"]
+    return record
+
+
+def table_records(data):
+    """Rows of a DataFrame (blanks for missing cells) or an existing list of dicts"""
+    if data is None:
+        return []
+    if hasattr(data, "to_dict"):
+        return data.fillna("").to_dict("records")
+    return list(data)
+
+
+class KnowledgeIndex:
+    """In-memory index over knowledge rows, built once at load time.
+
+    Rows may carry a DOMAIN ("property", "land") so one index can serve both
+    assistants; see from_domains. Posting lists are compact typed arrays and
+    scoring runs vectorized in numpy, so the index holds up at millions of rows.
+    """
+
+    def __init__(self, data, analyzer=None):
+        self.analyzer = analyzer or QueryAnalyzer()
+        self.rows = []
+        self.domain_names = [""]                 # domain code -> domain name ("" when untagged)
+        self.question_phrases = []               # row_id -> question words joined by spaces
+        self.words = []                          # word_id -> word
+        self.word_ids = {}                       # word -> word_id
+        self.word_rows = []                      # word_id -> row ids containing the word
+        self.word_gram_counts = []               # word_id -> number of trigrams
+        self.trigram_postings = defaultdict(list)  # trigram -> word ids
+        self.term_postings = {}                  # stemmed term -> (row ids, field-weighted frequencies)
+        self.tag_bitmaps = {}                    # tag keyword -> row bitmap
+        self.facet_bitmaps = {}                  # facet -> value -> row bitmap
+        self.domain_bitmaps = {}                 # domain -> row bitmap
+        self.corpus_stats = None                 # (total rows, term -> df) when this is a shard
+
+        domain_codes = array("B")
+        tag_rows = defaultdict(list)
+        facet_rows = {facet: defaultdict(list) for facet in FACETS}
+        for row_id, row in enumerate(table_records(data)):
+            self.rows.append(knowledge_record(row))
+            domain_codes.append(self._domain_code(row.get("DOMAIN") or ""))
+            self.question_phrases.append(" ".join(tokenize(row.get("QUESTION"))))
+            for tag in set(tokenize(row.get("TAGS"))):
+                tag_rows[tag].append(row_id)
+            for facet in FACETS:
+                value = facet_value(row.get(facet, ""))
+                if value:
+                    facet_rows[facet][value].append(row_id)
+
+            frequencies = {}
+            for field, weight in FIELD_WEIGHTS.items():
+                for term in self.analyzer.terms(row.get(field)):
+                    frequencies[term] = frequencies.get(term, 0.0) + weight
+            for term, frequency in frequencies.items():
+                postings = self.term_postings.get(term)
+                if postings is None:
+                    postings = self.term_postings[term] = (array("I"), array("f"))
+                postings[0].append(row_id)
+                postings[1].append(frequency)
+
+            for word in set(tokenize(row.get("QUESTION")) + tokenize(row.get("TAGS"))):
+                if word in STOP_WORDS:
+                    continue
+                self.word_rows[self._word_id(word)].append(row_id)
+
+        # Freeze the build buffers into numpy views for vectorized scoring
+        self.term_postings = {
+            term: (np.frombuffer(ids, dtype=np.uint32), np.frombuffer(frequencies, dtype=np.float32))
+            for term, (ids, frequencies) in self.term_postings.items()
+        }
+        self.word_rows = [np.frombuffer(ids, dtype=np.uint32) for ids in self.word_rows]
+        self.domain_codes = np.frombuffer(domain_codes, dtype=np.uint8)
+
+        self.tag_bitmaps = {tag: bitmap_from_ids(ids) for tag, ids in tag_rows.items()}
+        self.facet_bitmaps = {
+            facet: {value: bitmap_from_ids(ids) for value, ids in values.items()}
+            for facet, values in facet_rows.items()
+        }
+        self._finish()
+
+    def _finish(self):
+        """Derive the domain bitmaps and the all-rows mask once rows are in place"""
+        self.domain_bitmaps = {
+            domain: bitmap_from_ids(np.flatnonzero(self.domain_codes == code).tolist())
+            for code, domain in enumerate(self.domain_names) if domain
+        }
+        self.all_rows = (1 << len(self.question_phrases)) - 1
+
+    @classmethod
+    def from_domains(cls, tables, analyzer=None, workers=None):
+        """One index over several corpora, e.g. {"property": property_df, "land": land_df}.
+
+        Large corpora are built with build_parallel; workers=1 forces a
+        single-process build.
+        """
+        records = domain_records(tables)
+        if workers != 1 and len(records) >= PARALLEL_BUILD_MIN_ROWS:
+            return cls.build_parallel(records, analyzer, workers)
+        return cls(records, analyzer)
+
+    @classmethod
+    def build_parallel(cls, data, analyzer=None, workers=None, partitions=None):
+        """Build across a process pool and merge the partial indexes.
+
+        The corpus is cut into consecutive partitions (one per worker by
+        default). Each worker indexes its slice from row 0, and merge()
+        stitches the slices back together in partition order. The result
+        matches a single-process build whatever the worker count.
+        """
+        records = table_records(data)
+        analyzer = analyzer or QueryAnalyzer()
+        workers = workers or os.cpu_count() or 1
+        partitions = partitions or workers
+        size = max(1, math.ceil(len(records) / partitions))
+        chunks = [records[start:start + size] for start in range(0, len(records), size)]
+        if workers <= 1 or len(chunks) <= 1:
+            return cls(records, analyzer)
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            futures = [pool.submit(_build_partial, chunk, analyzer) for chunk in chunks]
+            # Row dicts are cheap to rebuild here and expensive to ship back
+            rows = [knowledge_record(row) for row in records]
+            parts = [future.result() for future in futures]
+        return cls.merge(parts, analyzer, rows)
+
+    @classmethod
+    def merge(cls, parts, analyzer=None, rows=None):
+        """Combine indexes built over consecutive slices of one corpus, in slice order.
+
+        Row ids of each part are shifted by the rows before it. rows replaces
+        the merged knowledge dicts when the parts were built without them.
+        """
+        merged = cls(None, analyzer or (parts[0].analyzer if parts else None))
+        term_ids, term_frequencies = defaultdict(list), defaultdict(list)
+        word_parts = defaultdict(list)
+        tag_bitmaps = defaultdict(int)
+        facet_bitmaps = {facet: defaultdict(int) for facet in FACETS}
+        domain_codes = []
+
+        offset = 0
+        for part in parts:
+            merged.rows.extend(part.rows)
+            merged.question_phrases.extend(part.question_phrases)
+            code_map = np.array([merged._domain_code(name) for name in part.domain_names], dtype=np.uint8)
+            domain_codes.append(code_map[part.domain_codes])
+            for term, (ids, frequencies) in part.term_postings.items():
+                term_ids[term].append(ids + np.uint32(offset))
+                term_frequencies[term].append(frequencies)
+            for word_id, word in enumerate(part.words):
+                word_parts[merged._word_id(word)].append(part.word_rows[word_id] + np.uint32(offset))
+            for tag, bitmap in part.tag_bitmaps.items():
+                tag_bitmaps[tag] |= bitmap << offset
+            for facet, values in part.facet_bitmaps.items():
+                for value, bitmap in values.items():
+                    facet_bitmaps[facet][value] |= bitmap << offset
+            offset += len(part.question_phrases)
+
+        if rows is not None:
+            if len(rows) != offset:
+                raise ValueError(f"merge() got {len(rows)} rows for {offset} indexed rows")
+            merged.rows = rows
+        merged.term_postings = {
+            term: (np.concatenate(ids), np.concatenate(term_frequencies[term]))
+            for term, ids in term_ids.items()
+        }
+        merged.word_rows = [np.concatenate(word_parts[word_id]) for word_id in range(len(merged.words))]
+        merged.domain_codes = np.concatenate(domain_codes) if domain_codes else np.zeros(0, dtype=np.uint8)
+        merged.tag_bitmaps = dict(tag_bitmaps)
+        merged.facet_bitmaps = {facet: dict(values) for facet, values in facet_bitmaps.items()}
+        merged._finish()
+        return merged
+
+    def _domain_code(self, domain):
+        """Small integer code for a domain name"""
+        if domain not in self.domain_names:
+            self.domain_names.append(domain)
+        return self.domain_names.index(domain)
+
+    def _word_id(self, word):
+        """Register a vocabulary word and its trigrams"""
+        word_id = self.word_ids.get(word)
+        if word_id is None:
+            word_id = len(self.words)
+            self.word_ids[word] = word_id
+            self.words.append(word)
+            self.word_rows.append(array("I"))
+            grams = word_trigrams(word)
+            self.word_gram_counts.append(len(grams))
+            for gram in grams:
+                self.trigram_postings[gram].append(word_id)
+        return word_id
+
+    def __len__(self):
+        return len(self.question_phrases)
+
+    def filter_bitmap(self, filters=None):
+        """Bitmap of rows matching every filter.
+
+        filters maps a facet name to a value or list of values (any may match),
+        "TAGS" to a keyword or list of keywords (all must match), and "DOMAIN"
+        to one or more domains, e.g. {"CATEGORY": "Legal", "DIFFICULTY_LEVEL": "beginner"}.
+        """
+        mask = self.all_rows
+        for name, wanted in (filters or {}).items():
+            if isinstance(wanted, str):
+                wanted = [wanted]
+            name = name.upper()
+            if name == "TAGS":
+                for tag in wanted:
+                    mask &= self.tag_bitmaps.get(str(tag).lower(), 0)
+            elif name == "DOMAIN":
+                allowed = 0
+                for domain in wanted:
+                    allowed |= self.domain_bitmaps.get(domain, 0)
+                mask &= allowed
+            elif name in self.facet_bitmaps:
+                values = self.facet_bitmaps[name]
+                allowed = 0
+                for value in wanted:
+                    allowed |= values.get(facet_value(value), 0)
+                mask &= allowed
+            else:
+                raise ValueError(f"Unknown knowledge filter: {name}")
+        return mask
+
+    def facet_counts(self, filters=None):
+        """Row counts per facet value among the rows matching filters"""
+        mask = self.filter_bitmap(filters)
+        counts = {}
+        for facet, values in self.facet_bitmaps.items():
+            counts[facet] = {value: (bitmap & mask).bit_count() for value, bitmap in values.items() if bitmap & mask}
+        return counts
+
+    def filtered_rows(self, filters=None):
+        """Knowledge rows matching filters, in table order"""
+        return [self.rows[row_id] for row_id in iter_bits(self.filter_bitmap(filters))]
+
+    def term_weight(self, term):
+        """Inverse document frequency: rare terms decide the ranking"""
+        postings = self.term_postings.get(term)
+        if postings is None:
+            return 0.0
+        if self.corpus_stats is not None:
+            # A shard scores with whole-corpus statistics so shards stay comparable
+            total, frequencies = self.corpus_stats
+            df = frequencies.get(term, 0)
+        else:
+            total, df = len(self.question_phrases), len(postings[0])
+        return math.log(1.0 + (total - df + 0.5) / (df + 0.5))
+
+    def document_frequencies(self):
+        """Rows per term, for combining shard statistics"""
+        return {term: len(ids) for term, (ids, _) in self.term_postings.items()}
+
+    def summary(self):
+        """Bitmaps and term statistics a sharded index combines across shards"""
+        return self.tag_bitmaps, self.facet_bitmaps, self.domain_bitmaps, self.document_frequencies()
+
+    def set_corpus_stats(self, total_rows, document_frequencies):
+        """Score IDF against a whole corpus this index is one shard of"""
+        self.corpus_stats = (total_rows, document_frequencies)
+
+    def search(self, query, max_results=3, mask=None, phrase_boost=0.5, min_relative_score=0.3, domain_boosts=None):
+        """Scored retrieval for a multi-term query.
+
+        Each term adds its IDF times a saturated field-weighted frequency, so a
+        title match outweighs a passing mention in an answer. Rows whose
+        question contains the query phrase get phrase_boost extra (0 disables).
+        domain_boosts multiplies scores per domain, e.g. {"land": 0.5}.
+        Rows scoring under min_relative_score of the best hit are dropped.
+        Returns (row_id, knowledge) pairs, best first.
+        """
+        hits = self.top_hits(query, max_results, mask, phrase_boost, domain_boosts)
+        if not hits:
+            return []
+        cutoff = hits[0][1] * min_relative_score
+        return [(row_id, knowledge) for row_id, score, knowledge in hits if score >= cutoff]
+
+    def top_hits(self, query, max_results=3, mask=None, phrase_boost=0.5, domain_boosts=None):
+        """(row_id, score, knowledge) triples behind search(), before the relative cutoff"""
+        analyzed = query if isinstance(query, AnalyzedQuery) else self.analyzer.analyze(query)
+        if not analyzed or not self.rows:
+            return []
+
+        # Only rows in the query terms' posting lists can score, so sum over those
+        ids, contributions = [], []
+        for term in analyzed.terms:
+            postings = self.term_postings.get(term)
+            if postings is None:
+                continue
+            term_ids, frequencies = postings
+            ids.append(term_ids)
+            contributions.append(self.term_weight(term) * frequencies / (frequencies + 1.2))
+        if not ids:
+            return []
+        candidates, scores = sum_by_row(np.concatenate(ids), np.concatenate(contributions), len(self.rows))
+
+        if mask is not None:
+            scores *= bitmap_contains(mask, candidates)
+        if domain_boosts:
+            boosts = np.array([domain_boosts.get(name, 1.0) for name in self.domain_names])
+            scores *= boosts[self.domain_codes[candidates]]
+
+        pool = top_rows(scores, max_results)
+        if not len(pool):
+            return []
+        if phrase_boost and len(analyzed.phrase.split()) > 1:
+            # A boost lifts a row by at most (1 + phrase_boost), so only rows
+            # within that factor of the max_results-th best score can reach
+            # the top; every one of them gets the phrase check
+            pool = np.flatnonzero(scores >= scores[pool[-1]] / (1.0 + phrase_boost))
+            for position in pool:
+                if analyzed.phrase in self.question_phrases[candidates[position]]:
+                    scores[position] *= 1.0 + phrase_boost
+
+        # candidates are ascending, so ties still go to the lower row id
+        ranked = pool[np.lexsort((pool, -scores[pool]))][:max_results]
+        return [(int(candidates[p]), float(scores[p]), self.rows[candidates[p]]) for p in ranked]
+
+    def similar_words(self, word, min_similarity=0.5):
+        """Vocabulary words whose trigram Dice similarity to word clears the threshold"""
+        grams = word_trigrams(word)
+        shared = defaultdict(int)
+        for gram in grams:
+            for word_id in self.trigram_postings.get(gram, ()):
+                shared[word_id] += 1
+
+        matches = {}
+        for word_id, count in shared.items():
+            dice = 2.0 * count / (len(grams) + self.word_gram_counts[word_id])
+            if dice >= min_similarity:
+                matches[word_id] = dice
+        return matches
+
+    def fuzzy_search(self, query, max_results=3, min_similarity=0.5, min_score=0.35, exclude=(), mask=None):
+        """Typo-tolerant search over questions and tags.
+
+        Each query word is matched to vocabulary words through the trigram
+        posting lists, so the cost depends on the query, not the table size.
+        A row scores the average best similarity of the query words it contains.
+        mask, from filter_bitmap, restricts which rows may be returned.
+        Returns (row_id, knowledge) pairs, best first.
+        """
+        hits = self.fuzzy_hits(query, max_results, min_similarity, min_score, exclude, mask)
+        return [(row_id, knowledge) for row_id, _, knowledge in hits]
+
+    def fuzzy_hits(self, query, max_results=3, min_similarity=0.5, min_score=0.35, exclude=(), mask=None):
+        """(row_id, score, knowledge) triples behind fuzzy_search()"""
+        # Single letters have no trigrams worth comparing
+        query_words = [w for w in dict.fromkeys(tokenize(query)) if len(w) > 1 and w not in STOP_WORDS]
+        if not query_words or not self.rows:
+            return []
+
+        # Per query word, each row keeps its best similarity among the matched vocabulary words
+        matched = []
+        for word in query_words:
+            matches = self.similar_words(word, min_similarity)
+            if matches:
+                matched.append(([self.word_rows[word_id] for word_id in matches],
+                                np.fromiter(matches.values(), dtype=np.float64, count=len(matches))))
+        if not matched:
+            return []
+        size = len(self.rows)
+        if dense_postings(sum(len(ids) for postings, _ in matched for ids in postings), size):
+            row_scores = np.zeros(size)
+            for postings, similarities in matched:
+                best = np.zeros(size)
+                for i in np.argsort(similarities):
+                    # Ascending similarity, so each row ends with its largest
+                    best[postings[i]] = similarities[i]
+                row_scores += best
+            candidates = np.flatnonzero(row_scores > 0)
+            row_scores = row_scores[candidates]
+        else:
+            parts = [max_by_row(postings, similarities) for postings, similarities in matched]
+            candidates, row_scores = sum_by_row(np.concatenate([rows for rows, _ in parts]),
+                                                np.concatenate([best for _, best in parts]), size)
+
+        row_scores /= len(query_words)
+        row_scores[row_scores < min_score] = 0.0
+        if mask is not None:
+            row_scores *= bitmap_contains(mask, candidates)
+        excluded = list(exclude)
+        if excluded:
+            row_scores[np.isin(candidates, excluded)] = 0.0
+        return [(int(candidates[p]), float(row_scores[p]), self.rows[candidates[p]]) for p in top_rows(row_scores, max_results)]
+
+
+def _build_partial(records, analyzer):
+    """Process-pool worker: index one partition, leaving the row dicts to the parent"""
+    part = KnowledgeIndex(records, analyzer)
+    part.rows = []
+    return part
+
+
+def domain_records(tables):
+    """Rows of several corpora tagged with their DOMAIN, in table order"""
+    records = []
+    for domain, data in tables.items():
+        for row in table_records(data):
+            records.append(dict(row, DOMAIN=domain))
+    return records
+
+
+# The shard held by a process-pool worker (see ShardedKnowledgeIndex)
+_SHARD = None
+
+
+def _load_shard(records, analyzer):
+    """Process-pool initializer: build this worker's shard once"""
+    global _SHARD
+    _SHARD = KnowledgeIndex(records, analyzer)
+
+
+def _call_shard(method, *args):
+    """Process-pool task: run one index method against this worker's shard"""
+    return getattr(_SHARD, method)(*args)
+
+
+class ShardedKnowledgeIndex:
+    """KnowledgeIndex split into shards that are searched in parallel.
+
+    Each query fans out to every shard and the per-shard top hits are merged
+    into one top-k. Shards score IDF with whole-corpus document frequencies,
+    so the ranking matches a single index over the same rows.
+
+    executor="thread" keeps the shards in this process; numpy releases the
+    GIL during scoring, so shards overlap on several cores. executor="process"
+    pins each shard to its own worker process for full core usage, at the
+    cost of pickling queries and hits across the process boundary.
+    Filtering (filter_bitmap, facet_counts) works on corpus-wide row ids
+    exactly as on KnowledgeIndex.
+    """
+
+    def __init__(self, data, analyzer=None, shards=None, executor="thread"):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown shard executor: {executor}")
+        records = table_records(data)
+        self.analyzer = analyzer or QueryAnalyzer()
+        self.executor = executor
+        shards = max(1, min(shards or DEFAULT_SHARDS, len(records) or 1))
+        size = max(1, math.ceil(len(records) / shards))
+        chunks = [records[start:start + size] for start in range(0, len(records), size)] or [[]]
+        self.offsets = [i * size for i in range(len(chunks))]
+        self.sizes = [len(chunk) for chunk in chunks]
+        self.row_count = len(records)
+
+        if executor == "thread":
+            self.shards = [KnowledgeIndex(chunk, self.analyzer) for chunk in chunks]
+            self.pools = [ThreadPoolExecutor(max_workers=len(chunks))]
+        else:
+            self.shards = []
+            self.pools = [
+                ProcessPoolExecutor(max_workers=1, initializer=_load_shard, initargs=(chunk, self.analyzer))
+                for chunk in chunks
+            ]
+
+        # Corpus-wide bitmaps and IDF statistics, assembled from the shards
+        self.tag_bitmaps = defaultdict(int)
+        self.facet_bitmaps = {facet: defaultdict(int) for facet in FACETS}
+        self.domain_bitmaps = defaultdict(int)
+        frequencies = defaultdict(int)
+        summaries = self._fan_out("summary")
+        for offset, (tags, facets, domains, shard_frequencies) in zip(self.offsets, summaries):
+            for tag, bitmap in tags.items():
+                self.tag_bitmaps[tag] |= bitmap << offset
+            for facet, values in facets.items():
+                for value, bitmap in values.items():
+                    self.facet_bitmaps[facet][value] |= bitmap << offset
+            for domain, bitmap in domains.items():
+                self.domain_bitmaps[domain] |= bitmap << offset
+            for term, df in shard_frequencies.items():
+                frequencies[term] += df
+        self.tag_bitmaps = dict(self.tag_bitmaps)
+        self.facet_bitmaps = {facet: dict(values) for facet, values in self.facet_bitmaps.items()}
+        self.domain_bitmaps = dict(self.domain_bitmaps)
+        self.all_rows = (1 << self.row_count) - 1
+        frequencies = dict(frequencies)
+        self._fan_out("set_corpus_stats", [(self.row_count, frequencies)] * len(self.offsets))
+
+    @classmethod
+    def from_domains(cls, tables, analyzer=None, shards=None, executor="thread"):
+        """Sharded counterpart of KnowledgeIndex.from_domains"""
+        return cls(domain_records(tables), analyzer, shards, executor)
+
+    def __len__(self):
+        return self.row_count
+
+    def _fan_out(self, method, shard_args=None):
+        """Run one index method on every shard in parallel; results in shard order"""
+        shard_args = shard_args or [()] * len(self.offsets)
+        if self.executor == "thread":
+            futures = [
+                self.pools[0].submit(getattr(shard, method), *args)
+                for shard, args in zip(self.shards, shard_args)
+            ]
+        else:
+            futures = [pool.submit(_call_shard, method, *args) for pool, args in zip(self.pools, shard_args)]
+        return [future.result() for future in futures]
+
+    def _shard_mask(self, mask, shard):
+        """Slice a corpus-wide bitmap down to one shard's local row ids"""
+        if mask is None:
+            return None
+        return (mask >> self.offsets[shard]) & ((1 << self.sizes[shard]) - 1)
+
+    def _merge(self, shard_hits, max_results):
+        """Global top-k over per-shard hits, ties broken by row id like a single index"""
+        hits = (
+            (offset + row_id, score, knowledge)
+            for offset, shard in zip(self.offsets, shard_hits)
+            for row_id, score, knowledge in shard
+        )
+        return heapq.nsmallest(max_results, hits, key=lambda hit: (-hit[1], hit[0]))
+
+    def filter_bitmap(self, filters=None):
+        """Corpus-wide bitmap of rows matching filters (see KnowledgeIndex.filter_bitmap)"""
+        return KnowledgeIndex.filter_bitmap(self, filters)
+
+    def facet_counts(self, filters=None):
+        """Row counts per facet value across all shards"""
+        return KnowledgeIndex.facet_counts(self, filters)
+
+    def search(self, query, max_results=3, mask=None, phrase_boost=0.5, min_relative_score=0.3, domain_boosts=None):
+        """Same contract as KnowledgeIndex.search, fanned out over the shards"""
+        analyzed = query if isinstance(query, AnalyzedQuery) else self.analyzer.analyze(query)
+        if not analyzed or not self.row_count:
+            return []
+        shard_args = [
+            (analyzed, max_results, self._shard_mask(mask, shard), phrase_boost, domain_boosts)
+            for shard in range(len(self.offsets))
+        ]
+        hits = self._merge(self._fan_out("top_hits", shard_args), max_results)
+        if not hits:
+            return []
+        cutoff = hits[0][1] * min_relative_score
+        return [(row_id, knowledge) for row_id, score, knowledge in hits if score >= cutoff]
+
+    def fuzzy_search(self, query, max_results=3, min_similarity=0.5, min_score=0.35, exclude=(), mask=None):
+        """Same contract as KnowledgeIndex.fuzzy_search, fanned out over the shards"""
+        excluded = list(exclude)
+        shard_args = []
+        for shard, (offset, size) in enumerate(zip(self.offsets, self.sizes)):
+            local = [row_id - offset for row_id in excluded if offset <= row_id < offset + size]
+            shard_args.append((query, max_results, min_similarity, min_score, local, self._shard_mask(mask, shard)))
+        hits = self._merge(self._fan_out("fuzzy_hits", shard_args), max_results)
+        return [(row_id, knowledge) for row_id, _, knowledge in hits]
+
+    def close(self):
+        """Stop the shard workers"""
+        for pool in self.pools:
+            pool.shutdown()
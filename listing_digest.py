@@ -0,0 +1,150 @@
+# listing_digest.py
+import re
+
+from prompt_budget import estimate_tokens
+
+NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8}
+
+BEDROOMS_PATTERN = re.compile(r"\b(\d+|" + "|".join(NUMBER_WORDS) + r")\s*-?\s*(?:bedrooms?|beds?|br|bdr?m?s?)\b")
+# "₦500,000", "500k", "2m", "1.5 million", "N250000"
+BUDGET_PATTERN = re.compile(
+    r"(?:₦|\bngn\s*|\bn(?=\d))?(\d+(?:,\d{3})*(?:\.\d+)?)\s*(k|thousand|m|mn|million)?\b"
+)
+MULTIPLIERS = {"k": 1_000, "thousand": 1_000, "m": 1_000_000, "mn": 1_000_000, "million": 1_000_000}
+
+
+def parse_listing_filters(question, places=()):
+    """City/area, budget (max monthly rent) and bedrooms mentioned in a question.
+
+    places are the lowercase city and area names listings use; the longest
+    one found in the question wins.
+    """
+    text = (question or "").lower()
+    filters = {}
+
+    matches = [place for place in places if re.search(rf"\b{re.escape(place)}\b", text)]
+    if matches:
+        filters["place"] = max(matches, key=len)
+
+    bedrooms = BEDROOMS_PATTERN.search(text)
+    if bedrooms:
+        value = bedrooms.group(1)
+        filters["bedrooms"] = NUMBER_WORDS.get(value) or int(value)
+        text = text[:bedrooms.start()] + text[bedrooms.end():]
+
+    for amount, unit in BUDGET_PATTERN.findall(text):
+        value = float(amount.replace(",", "")) * MULTIPLIERS.get(unit, 1)
+        # Bare small numbers are counts or years, not naira amounts
+        if unit or value >= 10_000:
+            filters["max_rent"] = int(value)
+            break
+    return filters
+
+
+def listing_places(listing):
+    """Lowercase city and area names a listing can be found by"""
+    places = set()
+    for value in (listing.get("city"), listing.get("location")):
+        if value:
+            places.add(str(value).strip().lower())
+            places.update(part.strip().lower() for part in str(value).split(",") if part.strip())
+    return places
+
+
+def matches(listing, filters):
+    """Whether a listing satisfies every filter"""
+    if "place" in filters and filters["place"] not in listing_places(listing):
+        return False
+    if "bedrooms" in filters and listing.get("bedrooms") != filters["bedrooms"]:
+        return False
+    if "max_rent" in filters and (listing.get("rent_monthly") or 0) > filters["max_rent"]:
+        return False
+    return True
+
+
+def select_listings(listings, filters):
+    """(listings best first, filters actually applied).
+
+    When nothing matches, bedrooms then budget then place are relaxed in
+    turn. Within a budget the priciest affordable listings come first,
+    otherwise the newest.
+    """
+    applied = dict(filters)
+    for relax in (None, "bedrooms", "max_rent", "place"):
+        applied.pop(relax, None)
+        selected = [listing for listing in listings if matches(listing, applied)]
+        if selected:
+            break
+    if "max_rent" in applied:
+        selected.sort(key=lambda l: (-(l.get("rent_monthly") or 0), -(l.get("id") or 0)))
+    else:
+        selected.sort(key=lambda l: -(l.get("id") or 0))
+    return selected, applied
+
+
+def format_listing(listing):
+    """One listing as a single compact line"""
+    rooms = f"{listing.get('bedrooms') or '?'}bd/{listing.get('bathrooms') or '?'}ba"
+    kind = listing.get("property_type") or "property"
+    where = ", ".join(str(v) for v in dict.fromkeys((listing.get("location"), listing.get("city"))) if v)
+    rent = listing.get("rent_monthly")
+    price = f"₦{rent:,}/mo" if rent else "price on request"
+    return f"- #{listing.get('id')} {listing.get('name')}: {rooms} {kind}, {where}, {price}"
+
+
+class ListingDigest:
+    """Compact, question-relevant listing context for the assistants.
+
+    load_listings returns the current listing dicts, e.g.
+    ListingSnapshot.get. Digests are cached per filter signature, so
+    questions about the same city/budget/bedrooms share one, until
+    load_listings hands back a different snapshot.
+    """
+
+    def __init__(self, load_listings, max_tokens=200):
+        self.load_listings = load_listings
+        self.max_tokens = max_tokens
+        self.listings = None
+        self.places = set()
+        self.digests = {}
+
+    def invalidate(self):
+        """Drop every cached digest"""
+        self.listings = None
+        self.digests = {}
+
+    def _pool(self):
+        """Current listings; a new snapshot resets the digest cache"""
+        listings = self.load_listings()
+        if listings is not self.listings:
+            self.places = set().union(*(listing_places(listing) for listing in listings))
+            self.digests = {}
+            self.listings = listings
+        return listings
+
+    def digest(self, question):
+        """Digest text for a question ("" when there are no listings)"""
+        listings = self._pool()
+        filters = parse_listing_filters(question, self.places)
+        signature = tuple(sorted(filters.items()))
+        if signature not in self.digests:
+            self.digests[signature] = self._build(listings, filters)
+        return self.digests[signature]
+
+    def _build(self, listings, filters):
+        if not listings:
+            return ""
+        selected, applied = select_listings(listings, filters)
+        wanted = ", ".join(f"{name}={value}" for name, value in sorted(applied.items())) or "no filters"
+        header = f"Platform listings ({len(selected)} of {len(listings)} match {wanted}):"
+        if applied != filters:
+            header = f"No listings match every request; closest ({len(selected)} of {len(listings)}, {wanted}):"
+        lines = [header]
+        used = estimate_tokens(header)
+        for listing in selected:
+            line = format_listing(listing)
+            if used + estimate_tokens(line) > self.max_tokens:
+                break
+            lines.append(line)
+            used += estimate_tokens(line)
+        return "\n".join(lines)
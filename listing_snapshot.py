@@ -0,0 +1,109 @@
+# listing_snapshot.py
+import logging
+import threading
+import time
+
+from database import SessionLocal, Property, property_change_listeners
+
+logger = logging.getLogger(__name__)
+
+# How long a snapshot serves reads before a background refresh is started
+SNAPSHOT_TTL_SECONDS = 60
+
+
+def load_published_listings():
+    """Published, priced listings as plain dicts, newest first"""
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(Property)
+            .filter(Property.is_published == True, Property.rent_monthly > 0)
+            .order_by(Property.id.desc())
+            .all()
+        )
+        return tuple(
+            {
+                "id": p.id,
+                "name": p.name,
+                "city": p.city,
+                "location": p.location,
+                "bedrooms": p.bedrooms,
+                "bathrooms": p.bathrooms,
+                "property_type": p.property_type,
+                "rent_monthly": p.rent_monthly,
+                "description": p.description
+            }
+            for p in rows
+        )
+    finally:
+        db.close()
+
+
+class ListingSnapshot:
+    """Process-wide, read-mostly copy of the published listings.
+
+    get() never waits on the database once a snapshot exists: a stale
+    snapshot is still returned while one background thread reloads it.
+    invalidate() starts that reload right away. The snapshot is an
+    immutable tuple, replaced whole, so readers need no lock.
+    """
+
+    def __init__(self, load=load_published_listings, ttl_seconds=SNAPSHOT_TTL_SECONDS):
+        self.load = load
+        self.ttl_seconds = ttl_seconds
+        self.listings = None
+        self.loaded_at = 0.0
+        self.version = 0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._pending = False     # invalidated again while a refresh was running
+
+    def get(self):
+        """Current listings; loads synchronously only the very first time"""
+        if self.listings is None:
+            self.refresh()
+        elif time.monotonic() - self.loaded_at > self.ttl_seconds:
+            self.refresh_in_background()
+        return self.listings
+
+    def refresh(self):
+        """Reload now; on failure keep serving the previous snapshot"""
+        try:
+            listings = tuple(self.load())
+        except Exception:
+            logger.exception("Listing snapshot refresh failed")
+            if self.listings is None:
+                self.listings = ()
+            return
+        self.listings = listings
+        self.loaded_at = time.monotonic()
+        self.version += 1
+
+    def refresh_in_background(self):
+        """Start a reload thread unless one is already running"""
+        with self._lock:
+            if self._refreshing:
+                # The running refresh may have read before the latest write
+                self._pending = True
+                return
+            self._refreshing = True
+
+        def run():
+            while True:
+                self.refresh()
+                with self._lock:
+                    if not self._pending:
+                        self._refreshing = False
+                        return
+                    self._pending = False
+
+        threading.Thread(target=run, name="listing-snapshot", daemon=True).start()
+
+    def invalidate(self):
+        """Listings changed: reload in the background"""
+        self.loaded_at = 0.0
+        self.refresh_in_background()
+
+
+published_listings = ListingSnapshot()
+property_change_listeners.append(published_listings.invalidate)
@@ -0,0 +1,88 @@
+# llm_backends.py
+# The model behind the assistants, behind one small interface.
+#
+# AnthropicBackend talks to the Messages API through the anthropic SDK;
+# pointed at a stub_llm_server.py instance (base_url, or CLAUDE_BASE_URL)
+# it exercises the whole chat path offline. Other backends only need
+# complete(), and stream() if they can do better than one chunk.
+
+import inspect
+
+import anthropic
+
+
+class LLMResponse:
+    """Text and usage of one finished model call"""
+
+    def __init__(self, text, model=None, input_tokens=None, output_tokens=None, stop_reason=None):
+        self.text = text
+        self.model = model
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.stop_reason = stop_reason
+
+
+class StreamedResponse:
+    """Iterate for text chunks; .response is the LLMResponse once iteration ends"""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self.response = None
+
+    def __iter__(self):
+        self.response = yield from self._chunks
+
+
+class LLMBackend:
+    """Interface every model backend implements"""
+
+    name = "llm"
+
+    def complete(self, model, max_tokens, system, messages, temperature=None):
+        """LLMResponse for one Messages API style request"""
+        raise NotImplementedError
+
+    def stream(self, model, max_tokens, system, messages, temperature=None):
+        """StreamedResponse; backends without streaming hand back the whole answer as one chunk"""
+        def chunks():
+            response = self.complete(model, max_tokens, system, messages, temperature)
+            yield response.text
+            return response
+        return StreamedResponse(chunks())
+
+
+class AnthropicBackend(LLMBackend):
+    """The anthropic SDK client; base_url points it at another server, e.g. the local stub"""
+
+    name = "anthropic"
+
+    def __init__(self, api_key=None, base_url=None, max_retries=2, timeout=None):
+        options = {"max_retries": max_retries}
+        if timeout is not None:
+            options["timeout"] = timeout
+        self.client = anthropic.Anthropic(api_key=api_key, base_url=base_url, **options)
+        # Some SDK releases dropped the temperature parameter
+        self.takes_temperature = "temperature" in inspect.signature(self.client.messages.create).parameters
+
+    def _request(self, model, max_tokens, system, messages, temperature):
+        request = {"model": model, "max_tokens": max_tokens, "system": system, "messages": messages}
+        if temperature is not None and self.takes_temperature:
+            request["temperature"] = temperature
+        return request
+
+    def complete(self, model, max_tokens, system, messages, temperature=None):
+        message = self.client.messages.create(**self._request(model, max_tokens, system, messages, temperature))
+        return self._response(message)
+
+    def stream(self, model, max_tokens, system, messages, temperature=None):
+        def chunks():
+            with self.client.messages.stream(**self._request(model, max_tokens, system, messages, temperature)) as stream:
+                yield from stream.text_stream
+                return self._response(stream.get_final_message())
+        return StreamedResponse(chunks())
+
+    def _response(self, message):
+        usage = getattr(message, "usage", None)
+        text = "".join(getattr(block, "text", "") for block in message.content)
+        return LLMResponse(text, getattr(message, "model", None), getattr(usage, "input_tokens", None),
+                           getattr(usage, "output_tokens", None), getattr(message, "stop_reason", None))
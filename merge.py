@@ -1,23 +1,28 @@
 import streamlit as st
 import numpy as np
-import pandas as pd
 import time
 import json
 from datetime import datetime, timedelta
 import random
 import math
 import hashlib
-import anthropic
-import os
 from dotenv import load_dotenv
-from database import SessionLocal, get_user_by_username, create_user, Property, RentPayment, Lead, Showing
+from database import SessionLocal, get_user_by_username, create_user, Property, RentPayment, Lead, Showing, notify_property_change
+from assistants import RealtyXperienceAI
+from knowledge_base import CSVKnowledgeBase, knowledge_content_version
+from listing_digest import ListingDigest
+from listing_snapshot import published_listings
+from canonical_prompts import (MR_X_QUICK_ACTIONS, LANDLORD_QUICK_ACTIONS, MR_X_USER_TYPES, LANDLORD_USER_TYPES,
+                               user_type_key)
+from response_store import ResponseStore
+from semantic_cache import QuestionEmbedder, SemanticAnswerCache
+from model_routing import ModelRouter
+from rate_limit import AssistantRateLimiter
+from chat_history import MessageWriteBehind, new_chat_history, record_turn, load_earlier_turns
 
 # Load environment variables
 load_dotenv()
 
-# Configuration using environment variables
-CLAUDE_API_KEY = os.getenv('CLAUDE_API_KEY')
-
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
@@ -39,8 +44,8 @@ session_state_defaults = {
     "land_database": {},
     "next_property_id": 100,
     "next_land_id": 200,
-    "mr_x_chat_history": [],
-    "landlord_chat_history": [],
+    "mr_x_chat_history": new_chat_history(),
+    "landlord_chat_history": new_chat_history(),
     "user_profile": {"type": None, "preferences": {}, "booking_history": []},
     "market_data": {},
     "user_accounts": {},
@@ -58,270 +63,6 @@ for key, default_value in session_state_defaults.items():
     if key not in st.session_state:
         st.session_state[key] = default_value
 
-class CSVKnowledgeBase:
-    """Connects to your CSV knowledge database"""
-    
-    def __init__(self):
-        self.property_df = None
-        self.land_df = None
-        self.connect()
-    
-    def connect(self):
-        """Load CSV files"""
-        try:
-            self.property_df = pd.read_csv('nigeria_property_knowledge.csv')
-            self.land_df = pd.read_csv('nigeria_land_knowledge.csv')
-            return True
-        except Exception as e:
-            st.error(f"CSV loading issue: {e}")
-            return False
-    
-    def search_property_knowledge(self, query, max_results=3):
-        """Search your property knowledge database"""
-        if self.property_df is None or self.property_df.empty:
-            return []
-        
-        try:
-            query_lower = query.lower()
-            knowledge = []
-            
-            for _, row in self.property_df.iterrows():
-                question = str(row.get("QUESTION", "")).lower()
-                answer = str(row.get("ANSWER", ""))
-                category = str(row.get("CATEGORY", ""))
-                tags = str(row.get("TAGS", "")).lower()
-                
-                if query_lower in question or query_lower in tags or query_lower in answer.lower():
-                    knowledge.append({
-                        "question": row.get("QUESTION", ""),
-                        "answer": answer,
-                        "category": category,
-                        "tags": row.get("TAGS", "")
-                    })
-                
-                if len(knowledge) >= max_results:
-                    break
-            
-            return knowledge
-        except Exception as e:
-            st.error(f"Error searching property CSV: {e}")
-            return []
-    def search_land_knowledge(self, query, max_results=3):
-        """Search your land knowledge database"""
-        if self.land_df is None or self.land_df.empty:
-            return []
-        
-        try:
-            query_lower = query.lower()
-            knowledge = []
-            
-            for _, row in self.land_df.iterrows():
-                question = str(row.get("QUESTION", "")).lower()
-                answer = str(row.get("ANSWER", ""))
-                category = str(row.get("CATEGORY", ""))
-                tags = str(row.get("TAGS", "")).lower()
-                
-                if query_lower in question or query_lower in tags or query_lower in answer.lower():
-                    knowledge.append({
-                        "question": row.get("QUESTION", ""),
-                        "answer": answer,
-                        "category": category,
-                        "tags": row.get("TAGS", "")
-                    })
-                
-                if len(knowledge) >= max_results:
-                    break
-            
-            return knowledge
-        except Exception as e:
-            st.error(f"Error searching land CSV: {e}")
-            return []
-class RealtyXperienceAI:
-    """Your AI Assistants powered by Snowflake knowledge and Claude"""
-    
-    def __init__(self):
-        self.knowledge_base = CSVKnowledgeBase()
-        try:
-            self.claude_client = anthropic.Anthropic(api_key=CLAUDE_API_KEY)
-            self.claude_available = True
-        except Exception as e:
-            self.claude_available = False
-            st.warning(f"Claude API issue: {e}")
-    
-    def mr_x_response(self, user_question, context=None):
-        """MR X - Property Expert using your knowledge database"""
-        
-        # Get knowledge from YOUR Snowflake database
-        knowledge = self.knowledge_base.search_property_knowledge(user_question, 3)
-        
-        if not knowledge:
-            return self._fallback_property_response(user_question, context)
-        
-        # Use Claude AI with your knowledge
-        if self.claude_available:
-            try:
-                # Build context from YOUR knowledge database
-                knowledge_context = "Here's what I know from my knowledge database:\n\n"
-                for item in knowledge:
-                    knowledge_context += f"Q: {item['question']}\nA: {item['answer']}\n\n"
-                
-                # Add platform context if available
-                platform_context = ""
-                if context:
-                    properties = context.get('properties', [])
-                    if properties:
-                        platform_context += f"\n\nCurrent platform has {len(properties)} properties available.\n"
-                
-                system_prompt = """You are Mr. X, a property investment expert assistant for RealtyXperience. Use the knowledge database information provided to give helpful, detailed answers about rental properties, ROI calculations, short-term rentals, and property investment strategies. Be specific and professional."""
-                
-                user_prompt = f"{knowledge_context}{platform_context}\n\nUser question: {user_question}\n\nPlease provide a comprehensive answer using the knowledge database information above."
-                
-                response = self.claude_client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=1000,
-                    temperature=0.7,
-                    system=system_prompt,
-                    messages=[{"role": "user", "content": user_prompt}]
-                )
-                
-                return response.content[0].text
-                
-            except Exception as e:
-                st.error(f"Claude AI error: {e}")
-        
-        # Fallback: Direct knowledge database response
-        response = "**Mr. X:** Based on my knowledge database:\n\n"
-        for item in knowledge:
-            response += f"**{item['question']}**\n\n{item['answer']}\n\n---\n\n"
-        
-        return response
-    
-    def landlord_response(self, user_question, context=None):
-        """Landlord - Land Expert using your knowledge database"""
-        
-        # Get knowledge from YOUR Snowflake database
-        knowledge = self.knowledge_base.search_land_knowledge(user_question, 3)
-        
-        if not knowledge:
-            return self._fallback_land_response(user_question, context)
-        
-        # Use Claude AI with your knowledge
-        if self.claude_available:
-            try:
-                # Build context from YOUR knowledge database
-                knowledge_context = "Here's what I know from my knowledge database:\n\n"
-                for item in knowledge:
-                    knowledge_context += f"Q: {item['question']}\nA: {item['answer']}\n\n"
-                
-                # Add platform context if available
-                platform_context = ""
-                if context:
-                    land_plots = context.get('land_plots', [])
-                    if land_plots:
-                        platform_context += f"\n\nCurrent platform has {len(land_plots)} land plots available.\n"
-                
-                system_prompt = """You are Landlord, a land development expert assistant for RealtyXperience. Use the knowledge database information provided to give helpful, detailed answers about zoning, land development, permits, and land investment strategies. Be specific and professional."""
-                
-                user_prompt = f"{knowledge_context}{platform_context}\n\nUser question: {user_question}\n\nPlease provide a comprehensive answer using the knowledge database information above."
-                
-                response = self.claude_client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=1000,
-                    temperature=0.7,
-                    system=system_prompt,
-                    messages=[{"role": "user", "content": user_prompt}]
-                )
-                
-                return response.content[0].text
-                
-            except Exception as e:
-                st.error(f"Claude AI error: {e}")
-        
-        # Fallback: Direct knowledge database response
-        response = "**Landlord:** Based on my knowledge database:\n\n"
-        for item in knowledge:
-            response += f"**{item['question']}**\n\n{item['answer']}\n\n---\n\n"
-        
-        return response
-    
-    def _fallback_property_response(self, user_question, context=None):
-        """Fallback response when no knowledge is found"""
-        message_lower = user_question.lower()
-        
-        if any(word in message_lower for word in ["invest", "investment", "roi", "return"]):
-            return """Property Investment Intelligence & Predictions
-
-I can provide comprehensive property investment analysis including:
-
-- Price Predictions & Market timing recommendations
-- ROI Analysis & Capital appreciation projections  
-- Investment Scoring & Risk assessment
-- Location Intelligence & Infrastructure impact analysis
-
-Which property or area would you like me to analyze for investment potential?"""
-
-        elif any(word in message_lower for word in ["find", "search", "recommend"]):
-            return """Smart Property Discovery Engine
-
-I can help you find the perfect property with:
-
-- AI-Powered Property Matching based on lifestyle preferences
-- Location Intelligence & Commute optimization
-- Market Intelligence & Price trend analysis
-- Smart Filters beyond basic search
-
-Let me know your preferences (budget, location, lifestyle needs) and I'll find your perfect property match!"""
-
-        return """Welcome to MR X - Your Property Intelligence System!
-
-I'm your expert property advisor specializing in:
-
-- Smart property matching & recommendations
-- Investment analysis & market predictions  
-- Neighborhood insights & safety analysis
-- Portfolio optimization for property owners
-
-Ask me anything about properties, investments, or market trends!"""
-    
-    def _fallback_land_response(self, user_question, context=None):
-        """Fallback response when no knowledge is found"""
-        message_lower = user_question.lower()
-        
-        if any(word in message_lower for word in ["invest", "investment", "development"]):
-            return """Land Investment Intelligence & Development Analysis
-
-I provide comprehensive land investment analysis including:
-
-- Development potential assessments & ROI analysis
-- Market timing recommendations & Growth corridor identification
-- Feasibility studies & Zoning compliance guidance
-- Infrastructure development impact analysis
-
-Which land plot or area would you like me to analyze for investment potential?"""
-
-        elif any(word in message_lower for word in ["find", "search", "recommend"]):
-            return """Smart Land Discovery Engine
-
-I can help you find perfect land opportunities with:
-
-- AI matching based on investment goals
-- Development Intelligence & Future growth analysis
-- Strategic Filtering & Location intelligence
-- Market entry optimization
-
-Tell me your investment goals and I'll find your perfect land opportunity!"""
-
-        return """Welcome to LANDLORD - Your Land Investment Intelligence System!
-
-I'm your expert land investment advisor specializing in:
-
-- Strategic land acquisition recommendations
-- Development potential assessments
-- Market timing & growth predictions
-- Documentation & regulatory guidance
-
-Ask me anything about land investment, development, or market opportunities!"""
-
 class UserAuth:
     @staticmethod
     def hash_password(password):
@@ -438,35 +179,113 @@ def load_initial_land():
     }
     return initial_land
 
-# Initialize AI System
+@st.cache_resource(max_entries=1)
+def get_knowledge(content_version):
+    """Knowledge base and greetings for one version of the knowledge files, loaded once per process"""
+    knowledge_base = CSVKnowledgeBase()
+    return knowledge_base, RealtyXperienceAI.build_welcome_messages(knowledge_base)
+
+@st.cache_resource(max_entries=1)
+def get_answer_cache(content_version, _analyzer):
+    """Process-wide semantic answer cache, so sessions reuse each other's model answers"""
+    return SemanticAnswerCache(QuestionEmbedder(_analyzer))
+
+@st.cache_resource
+def get_model_router():
+    """Process-wide model router, so every session's calls inform the latency estimates"""
+    return ModelRouter()
+
+@st.cache_resource
+def get_rate_limiter():
+    """Process-wide limiter on assistant model calls, per user and in total"""
+    return AssistantRateLimiter()
+
+def assistant_spinner(name):
+    """Spinner that tells the user when their question is queued behind others"""
+    wait = get_rate_limiter().expected_wait(st.session_state.current_user)
+    if wait >= 1:
+        return st.spinner(f"{name} is answering other questions; you're in the queue (about {wait:.0f}s)...")
+    return st.spinner(f"{name} is thinking...")
+
+@st.cache_resource
+def get_message_writer():
+    """Process-wide write-behind buffer that batch-inserts chat messages"""
+    return MessageWriteBehind()
+
+def save_chat_turn(assistant_type, question, answer):
+    """Add a turn to the session's recent history and queue it for the messages table"""
+    record_turn(st.session_state[f"{assistant_type}_chat_history"], get_message_writer(),
+                st.session_state.get("current_user_id"), assistant_type, question, answer)
+
+def show_earlier_turns(assistant_type, label):
+    """Turns older than the session window, a page at a time from the messages table"""
+    user_id = st.session_state.get("current_user_id")
+    if user_id is None or not st.toggle("Show earlier messages", key=f"{assistant_type}_show_earlier"):
+        return
+    page_key = f"{assistant_type}_history_page"
+    page = st.session_state.get(page_key, 0)
+    history = st.session_state[f"{assistant_type}_chat_history"]
+    get_message_writer().flush()
+    db = SessionLocal()
+    try:
+        turns, has_more = load_earlier_turns(db, user_id, assistant_type, history[0][2] if history else None, page)
+    finally:
+        db.close()
+    if not turns:
+        st.caption("No earlier messages")
+    for user_msg, bot_response, asked_at in turns:
+        st.caption(asked_at.strftime("%d %b %Y %H:%M"))
+        if user_msg:
+            st.success(f"**You:** {user_msg}")
+        st.info(f"**{label}:** {bot_response}")
+    older, newer = st.columns(2)
+    if older.button("Older", key=f"{assistant_type}_older", disabled=not has_more):
+        st.session_state[page_key] = page + 1
+        st.rerun()
+    if newer.button("Newer", key=f"{assistant_type}_newer", disabled=page == 0):
+        st.session_state[page_key] = page - 1
+        st.rerun()
+    st.markdown("---")
+
+# Initialize AI System on the shared knowledge, switching when the knowledge files change
+knowledge_version = knowledge_content_version()
+knowledge_base, welcome_messages = get_knowledge(knowledge_version)
+answer_cache = get_answer_cache(knowledge_version, knowledge_base.analyzer)
 if not st.session_state.ai_system:
-    st.session_state.ai_system = RealtyXperienceAI()
+    st.session_state.ai_system = RealtyXperienceAI(answer_cache=answer_cache, model_router=get_model_router(),
+                                                   rate_limiter=get_rate_limiter(), knowledge_base=knowledge_base,
+                                                   welcome_messages=welcome_messages)
+st.session_state.ai_system.use_knowledge(knowledge_base, welcome_messages)
+st.session_state.ai_system.answer_cache = answer_cache
 
 # Initialize databases
 if not st.session_state.land_database:
     st.session_state.land_database = load_initial_land()
 
 def get_real_properties(limit=20):
-    """Get real properties from database for MR X context"""
-    db = SessionLocal()
-    try:
-        db_props = db.query(Property).filter(Property.rent_monthly > 0).limit(limit).all()
-        props_list = []
-        for p in db_props:
-            props_list.append({
-                "id": p.id,
-                "name": p.name,
-                "city": p.city,
-                "location": p.location,
-                "bedrooms": p.bedrooms,
-                "bathrooms": p.bathrooms,
-                "property_type": p.property_type,
-                "rent_monthly": p.rent_monthly,
-                "description": p.description
-            })
-        return props_list
-    finally:
-        db.close()
+    """Get real properties for MR X context from the process-wide listing snapshot"""
+    return [dict(p) for p in published_listings.get()[:limit]]
+
+@st.cache_resource
+def get_listing_digest():
+    """Process-wide listing digest for MR X, shared by every session"""
+    return ListingDigest(published_listings.get)
+
+@st.cache_resource
+def get_response_store():
+    """Process-wide store of pre-generated answers (see pregenerate_answers.py)"""
+    return ResponseStore()
+
+def stored_or_live_response(assistant, prompt, context):
+    """Pre-generated answer for a canonical prompt, else a live assistant call"""
+    ai = st.session_state.ai_system
+    response = get_response_store().get(assistant, user_type_key(context.get("user_type")), prompt,
+                                         ai.knowledge_base.content_version)
+    if response is not None:
+        return response
+    if assistant == "mr_x":
+        return ai.mr_x_response(prompt, context)
+    return ai.landlord_response(prompt, context)
 
 def get_all_land():
     all_land = []
@@ -589,19 +408,20 @@ def show_mr_x_chat():
     col1, col2, col3 = st.columns(3)
     
     with col2:
-        user_type = st.selectbox("I am a:", ["Guest/Buyer", "Property Host/Owner", "Real Estate Agent", "Property Investor", "Tenant"])
+        user_type = st.selectbox("I am a:", MR_X_USER_TYPES)
     with col3:
         if st.button("Clear Chat History"):
-            st.session_state.mr_x_chat_history = []
+            st.session_state.mr_x_chat_history = new_chat_history()
             st.rerun()
     
     chat_container = st.container()
     with chat_container:
+        show_earlier_turns("mr_x", "MR X")
         if not st.session_state.mr_x_chat_history:
-            welcome_msg = st.session_state.ai_system.mr_x_response("", {"user_type": user_type.lower().split('/')[0]})
+            welcome_msg = st.session_state.ai_system.welcome_message("mr_x", user_type_key(user_type))
             st.info(f"**MR X:** {welcome_msg}")
         
-        for user_msg, bot_response in st.session_state.mr_x_chat_history:
+        for user_msg, bot_response, _ in st.session_state.mr_x_chat_history:
             st.success(f"**You:** {user_msg}")
             st.info(f"**MR X:** {bot_response}")
     
@@ -612,33 +432,30 @@ def show_mr_x_chat():
     
     if st.button("Send Message", type="primary", key="send_mr_x") and user_input:
         context = {
-            "properties": get_real_properties(),
+            "listing_digest": get_listing_digest().digest(user_input),
             "user_type": user_type,
-            "current_user": st.session_state.current_user
+            "current_user": st.session_state.current_user,
+            "history": st.session_state.mr_x_chat_history
         }
         
-        response = st.session_state.ai_system.mr_x_response(user_input, context)
+        with assistant_spinner("MR X"):
+            response = st.session_state.ai_system.mr_x_response(user_input, context)
         
-        st.session_state.mr_x_chat_history.append((user_input, response))
+        save_chat_turn("mr_x", user_input, response)
         st.rerun()
     
     st.markdown("### Quick Actions")
     col1, col2, col3, col4 = st.columns(4)
     
-    quick_actions = {
-        "Investment Analysis": "Analyze property investment potential in my budget",
-        "Neighborhood Guide": "Tell me about the best neighborhoods for my lifestyle",
-        "Market Trends": "What are current property market trends in Lagos and Abuja?",
-        "Price Predictions": "Predict property price movements in key areas"
-    }
-    
-    for i, (action, prompt) in enumerate(quick_actions.items()):
+    for i, (action, prompt) in enumerate(MR_X_QUICK_ACTIONS.items()):
         col = [col1, col2, col3, col4][i]
         with col:
             if st.button(action, key=f"property_action_{i}"):
-                context = {"properties": get_real_properties(), "user_type": user_type}
-                response = st.session_state.ai_system.mr_x_response(prompt, context)
-                st.session_state.mr_x_chat_history.append((action, response))
+                context = {"listing_digest": get_listing_digest().digest(prompt), "user_type": user_type,
+                           "current_user": st.session_state.current_user}
+                with assistant_spinner("MR X"):
+                    response = stored_or_live_response("mr_x", prompt, context)
+                save_chat_turn("mr_x", action, response)
                 st.rerun()
 
 def show_landlord_chat():
@@ -648,19 +465,20 @@ def show_landlord_chat():
     col1, col2, col3 = st.columns(3)
     
     with col2:
-        user_type = st.selectbox("I am a:", ["Guest/Investor", "Land Developer", "Real Estate Agent", "Land Owner", "Investment Firm"], key="landlord_user_type")
+        user_type = st.selectbox("I am a:", LANDLORD_USER_TYPES, key="landlord_user_type")
     with col3:
         if st.button("Clear Chat History", key="clear_landlord"):
-            st.session_state.landlord_chat_history = []
+            st.session_state.landlord_chat_history = new_chat_history()
             st.rerun()
     
     chat_container = st.container()
     with chat_container:
+        show_earlier_turns("landlord", "LANDLORD")
         if not st.session_state.landlord_chat_history:
-            welcome_msg = st.session_state.ai_system.landlord_response("", {"user_type": user_type.lower().split('/')[0]})
+            welcome_msg = st.session_state.ai_system.welcome_message("landlord", user_type_key(user_type))
             st.info(f"**LANDLORD:** {welcome_msg}")
         
-        for user_msg, bot_response in st.session_state.landlord_chat_history:
+        for user_msg, bot_response, _ in st.session_state.landlord_chat_history:
             st.success(f"**You:** {user_msg}")
             st.info(f"**LANDLORD:** {bot_response}")
     
@@ -673,31 +491,28 @@ def show_landlord_chat():
         context = {
             "land_plots": get_all_land(),
             "user_type": user_type,
-            "current_user": st.session_state.current_user
+            "current_user": st.session_state.current_user,
+            "history": st.session_state.landlord_chat_history
         }
         
-        response = st.session_state.ai_system.landlord_response(user_input, context)
+        with assistant_spinner("LANDLORD"):
+            response = st.session_state.ai_system.landlord_response(user_input, context)
         
-        st.session_state.landlord_chat_history.append((user_input, response))
+        save_chat_turn("landlord", user_input, response)
         st.rerun()
     
     st.markdown("### Quick Actions")
     col1, col2, col3, col4 = st.columns(4)
     
-    quick_actions = {
-        "Investment Analysis": "Analyze land investment opportunities in my budget range",
-        "Documentation Guide": "Guide me through land documentation requirements",
-        "Market Intelligence": "What are current land market trends and timing?",
-        "Development Planning": "Help me plan development strategy for my land"
-    }
-    
-    for i, (action, prompt) in enumerate(quick_actions.items()):
+    for i, (action, prompt) in enumerate(LANDLORD_QUICK_ACTIONS.items()):
         col = [col1, col2, col3, col4][i]
         with col:
             if st.button(action, key=f"land_action_{i}"):
-                context = {"land_plots": get_all_land(), "user_type": user_type}
-                response = st.session_state.ai_system.landlord_response(prompt, context)
-                st.session_state.landlord_chat_history.append((action, response))
+                context = {"land_plots": get_all_land(), "user_type": user_type,
+                           "current_user": st.session_state.current_user}
+                with assistant_spinner("LANDLORD"):
+                    response = stored_or_live_response("landlord", prompt, context)
+                save_chat_turn("landlord", action, response)
                 st.rerun()
 
 def show_property_search():
@@ -995,6 +810,7 @@ def save_property_to_database(property_data):
         db.add(new_property)
         db.commit()
         db.refresh(new_property)
+        notify_property_change()
         
         return new_property.id
     except Exception as e:
@@ -1191,6 +1007,7 @@ def show_property_details(property_id):
                     # Actually delete
                     db.delete(prop)
                     db.commit()
+                    notify_property_change()
                     st.success("Property deleted successfully!")
                     st.session_state.confirm_delete = None
                     st.rerun()
@@ -2590,6 +2407,10 @@ def main_app():
             st.success("🤖 AI Assistants: Online")
         else:
             st.warning("🤖 AI Assistants: Limited")
+        cache_report = st.session_state.ai_system.answer_cache.report()
+        if cache_report["hits"]:
+            st.caption(f"Answer cache: {cache_report['hit_rate']:.0%} hit rate, "
+                       f"{cache_report['saved_seconds']:.0f}s of model time saved")
         
         user_type = st.session_state.user_type
         
@@ -61,39 +61,84 @@ def create_database():
     conn.close()
 
 # Step 2: Updated AI Assistant Code using SQLite
+import os
 import streamlit as st
 import sqlite3
+import threading
+from pathlib import Path
 import anthropic
+from knowledge_index import SynonymExpander
+from knowledge_base import knowledge_content_version
+from canonical_prompts import MR_X_TRY_THESE, LANDLORD_TRY_THESE
+from response_store import ResponseStore
+
+# Tuning for the read-only serving connection
+SERVING_PRAGMAS = {
+    "mmap_size": 256 * 1024 * 1024,   # map the file instead of copying pages through read()
+    "cache_size": -64 * 1024,         # 64 MB page cache (negative means KiB)
+    "temp_store": "MEMORY",           # sorts for ORDER BY stay off disk
+}
 
 # Your Claude API key
 CLAUDE_API_KEY = "sk-ant-REDACTED"
 
 class SQLiteKnowledgeBase:
-    """SQLite knowledge base - no monthly fees"""
+    """SQLite knowledge base - no monthly fees
+    
+    read_only=True is the serving mode: the file is opened with
+    mode=ro&immutable=1 and SERVING_PRAGMAS, and each thread keeps its
+    connection. Nothing may write to the file in place while serving, since
+    an immutable open never sees those changes; build_knowledge_db swaps in
+    a new file instead, and the next query reopens on it.
+    """
     
-    def __init__(self, db_path='realtyxperience_knowledge.db'):
+    def __init__(self, db_path='realtyxperience_knowledge.db', read_only=False):
         self.db_path = db_path
+        self.read_only = read_only
+        self.synonyms = SynonymExpander.from_csv()
+        self._local = threading.local()
     
-    def search_property_knowledge(self, query, max_results=3):
-        """Search property knowledge"""
-        conn = sqlite3.connect(self.db_path)
+    def _serving_connection(self):
+        """This thread's read-only connection, reopened when the file is replaced"""
+        info = os.stat(self.db_path)
+        opened = (info.st_ino, info.st_mtime_ns, info.st_size)
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.opened != opened:
+            # A rebuild renamed a new file over db_path; this connection
+            # still reads the old, unlinked one
+            conn.close()
+            conn = None
+        if conn is None:
+            uri = Path(self.db_path).resolve().as_uri() + "?mode=ro&immutable=1"
+            conn = sqlite3.connect(uri, uri=True)
+            for pragma, value in SERVING_PRAGMAS.items():
+                conn.execute(f"PRAGMA {pragma} = {value}")
+            self._local.conn = conn
+            self._local.opened = opened
+        return conn
+    
+    def _search(self, table, query, max_results):
+        """LIKE search matching the query or any synonym phrase it contains"""
+        conn = self._serving_connection() if self.read_only else sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        sql = """
+        search_terms = [f'%{phrase}%' for phrase in self.synonyms.expand_phrases(query)]
+        any_term = lambda column: "(" + " OR ".join(f"{column} LIKE LOWER(?)" for _ in search_terms) + ")"
+        
+        sql = f"""
         SELECT QUESTION, ANSWER, CATEGORY, TAGS 
-        FROM PROPERTY_KNOWLEDGE 
-        WHERE LOWER(QUESTION || ' ' || ANSWER || ' ' || TAGS) LIKE LOWER(?)
+        FROM {table} 
+        WHERE {any_term("LOWER(QUESTION || ' ' || ANSWER || ' ' || TAGS)")}
         ORDER BY 
             CASE 
-                WHEN LOWER(QUESTION) LIKE LOWER(?) THEN 1
-                WHEN LOWER(CATEGORY) LIKE LOWER(?) THEN 2
+                WHEN {any_term("LOWER(QUESTION)")} THEN 1
+                WHEN {any_term("LOWER(CATEGORY)")} THEN 2
                 ELSE 3
             END
         LIMIT ?
         """
         
-        search_term = f'%{query}%'
-        cursor.execute(sql, (search_term, search_term, search_term, max_results))
+        cursor.execute(sql, (*search_terms, *search_terms, *search_terms, max_results))
         results = cursor.fetchall()
         
         knowledge = []
@@ -105,48 +150,23 @@ class SQLiteKnowledgeBase:
                 'tags': row[3]
             })
         
-        conn.close()
+        if not self.read_only:
+            conn.close()
         return knowledge
     
+    def search_property_knowledge(self, query, max_results=3):
+        """Search property knowledge"""
+        return self._search('PROPERTY_KNOWLEDGE', query, max_results)
+    
     def search_land_knowledge(self, query, max_results=3):
         """Search land knowledge"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        sql = """
-        SELECT QUESTION, ANSWER, CATEGORY, TAGS 
-        FROM LAND_KNOWLEDGE 
-        WHERE LOWER(QUESTION || ' ' || ANSWER || ' ' || TAGS) LIKE LOWER(?)
-        ORDER BY 
-            CASE 
-                WHEN LOWER(QUESTION) LIKE LOWER(?) THEN 1
-                WHEN LOWER(CATEGORY) LIKE LOWER(?) THEN 2
-                ELSE 3
-            END
-        LIMIT ?
-        """
-        
-        search_term = f'%{query}%'
-        cursor.execute(sql, (search_term, search_term, search_term, max_results))
-        results = cursor.fetchall()
-        
-        knowledge = []
-        for row in results:
-            knowledge.append({
-                'question': row[0],
-                'answer': row[1],
-                'category': row[2],
-                'tags': row[3]
-            })
-        
-        conn.close()
-        return knowledge
+        return self._search('LAND_KNOWLEDGE', query, max_results)
 
 class RealtyXperienceAI:
     """Your AI Assistants - now with SQLite"""
     
     def __init__(self):
-        self.knowledge_base = SQLiteKnowledgeBase()
+        self.knowledge_base = SQLiteKnowledgeBase(read_only=True)
         try:
             self.claude_client = anthropic.Anthropic(api_key=CLAUDE_API_KEY)
             self.claude_available = True
@@ -233,16 +253,10 @@ def main():
     # Quick tests
     st.sidebar.markdown("---")
     st.sidebar.subheader("Try These")
-    if "Mr. X" in assistant:
-        if st.sidebar.button("What is ROI?"):
-            st.session_state.test_q = "How do I calculate ROI for rental property?"
-        if st.sidebar.button("What is cash flow?"):
-            st.session_state.test_q = "What is cash flow?"
-    else:
-        if st.sidebar.button("What is C of O?"):
-            st.session_state.test_q = "What is a Certificate of Occupancy?"
-        if st.sidebar.button("Land valuation?"):
-            st.session_state.test_q = "How do I determine land value?"
+    try_these = MR_X_TRY_THESE if "Mr. X" in assistant else LANDLORD_TRY_THESE
+    for label, question in try_these.items():
+        if st.sidebar.button(label):
+            st.session_state.test_q = question
     
     # Chat
     if "messages" not in st.session_state:
@@ -252,11 +266,18 @@ def main():
         prompt = st.session_state.test_q
         del st.session_state.test_q
         st.session_state.messages.append({"role": "user", "content": prompt})
-        with st.spinner("Thinking..."):
-            if "Mr. X" in assistant:
-                response = st.session_state.ai.mr_x_response(prompt)
-            else:
-                response = st.session_state.ai.landlord_response(prompt)
+        # Pre-generated by pregenerate_answers.py when available
+        if 'response_store' not in st.session_state:
+            st.session_state.response_store = ResponseStore()
+            st.session_state.content_version = knowledge_content_version()
+        response = st.session_state.response_store.get("mr_x" if "Mr. X" in assistant else "landlord", "",
+                                                       prompt, st.session_state.content_version)
+        if response is None:
+            with st.spinner("Thinking..."):
+                if "Mr. X" in assistant:
+                    response = st.session_state.ai.mr_x_response(prompt)
+                else:
+                    response = st.session_state.ai.landlord_response(prompt)
         st.session_state.messages.append({"role": "assistant", "content": response})
     
     for message in st.session_state.messages:
@@ -0,0 +1,148 @@
+# model_routing.py
+import logging
+import os
+import threading
+from collections import deque
+
+import numpy as np
+
+from intent_router import SYNTHESIS_CUES
+from knowledge_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Seconds a chat answer may take before a cheaper, faster tier is preferred
+DEFAULT_LATENCY_BUDGET_SECONDS = 15.0
+
+# Observed latencies a tier needs before they replace its expected latency
+MIN_LATENCY_SAMPLES = 5
+
+
+class ModelTier:
+    """A model and output allowance, with the latency expected before any is observed"""
+
+    def __init__(self, name, model, max_tokens, expected_seconds):
+        self.name = name
+        self.model = model
+        self.max_tokens = max_tokens
+        self.expected_seconds = expected_seconds
+
+
+# Cheapest first; CLAUDE_LIGHT_MODEL, CLAUDE_STANDARD_MODEL and
+# CLAUDE_HEAVY_MODEL override a tier's model (see model_tiers)
+MODEL_TIERS = [
+    ModelTier("light", "claude-haiku-4-5-20251001", 400, 3.0),
+    ModelTier("standard", "claude-sonnet-4-5-20250929", 700, 8.0),
+    ModelTier("heavy", "claude-sonnet-4-5-20250929", 1000, 14.0),
+]
+
+
+def model_tiers():
+    """MODEL_TIERS with any CLAUDE_<TIER>_MODEL environment overrides applied"""
+    return [ModelTier(tier.name, os.getenv(f"CLAUDE_{tier.name.upper()}_MODEL") or tier.model,
+                      tier.max_tokens, tier.expected_seconds)
+            for tier in MODEL_TIERS]
+
+
+class RouteChoice:
+    """The tier picked for one question and why"""
+
+    def __init__(self, tier, max_tokens, complexity, reason):
+        self.route = tier.name
+        self.model = tier.model
+        self.max_tokens = max_tokens
+        self.complexity = complexity
+        self.reason = reason
+
+
+class ModelRouter:
+    """Picks a model tier and max_tokens for each model call.
+
+    Complexity points come from the question (length, advice/comparison
+    cues, figures, several questions in one) and the size of the retrieved
+    context; they choose the tier. If that tier's latency (p90 of recent
+    calls, or its expected latency until enough are seen) exceeds the
+    latency budget, cheaper tiers are tried, and as a last resort
+    max_tokens is cut in proportion. Per-route latency and token usage are
+    kept for report().
+    """
+
+    def __init__(self, tiers=None, latency_budget=DEFAULT_LATENCY_BUDGET_SECONDS, window=200):
+        self.tiers = tiers or model_tiers()
+        self.latency_budget = latency_budget
+        self.latencies = {tier.name: deque(maxlen=window) for tier in self.tiers}
+        self.usage = {tier.name: {"calls": 0, "seconds": 0.0, "input_tokens": 0, "output_tokens": 0}
+                      for tier in self.tiers}
+        self._lock = threading.Lock()
+
+    def complexity(self, question, context_tokens=0):
+        """Complexity points of a question; 0-1 is a one-liner, 4+ a multi-part analysis"""
+        words = tokenize(question)
+        points = 0
+        if len(words) > 25:
+            points += 2
+        elif len(words) > 12:
+            points += 1
+        if any(word in SYNTHESIS_CUES for word in words):
+            points += 2
+        if any(word.isdigit() for word in words):
+            points += 1
+        points += min(2, max(0, (question or "").count("?") - 1))
+        if context_tokens > 400:
+            points += 1
+        return points
+
+    def expected_seconds(self, tier):
+        """p90 of the tier's recent calls, or its expected latency until enough are seen"""
+        with self._lock:
+            observed = list(self.latencies[tier.name])
+        if len(observed) < MIN_LATENCY_SAMPLES:
+            return tier.expected_seconds
+        return float(np.percentile(observed, 90))
+
+    def choose(self, question, context_tokens=0, latency_budget=None):
+        """RouteChoice for a question with context_tokens of retrieved context"""
+        budget = latency_budget or self.latency_budget
+        points = self.complexity(question, context_tokens)
+        wanted = 0 if points <= 1 else 1 if points <= 3 else 2
+        wanted = min(wanted, len(self.tiers) - 1)
+        reason = "complexity"
+
+        position = wanted
+        while position > 0 and self.expected_seconds(self.tiers[position]) > budget:
+            position -= 1
+        tier = self.tiers[position]
+        max_tokens = tier.max_tokens
+        if position < wanted:
+            reason = "latency budget"
+        expected = self.expected_seconds(tier)
+        if expected > budget:
+            # Output length drives latency; even the cheapest tier is too slow, so answer shorter
+            max_tokens = max(150, int(tier.max_tokens * budget / expected))
+            reason = "latency budget"
+
+        choice = RouteChoice(tier, max_tokens, points, reason)
+        logger.info("model route=%s model=%s max_tokens=%s complexity=%s reason=%s",
+                    choice.route, choice.model, choice.max_tokens, points, reason)
+        return choice
+
+    def record(self, route, seconds, input_tokens=None, output_tokens=None):
+        """Account one finished call on a route"""
+        with self._lock:
+            self.latencies[route].append(seconds)
+            usage = self.usage[route]
+            usage["calls"] += 1
+            usage["seconds"] += seconds
+            usage["input_tokens"] += input_tokens or 0
+            usage["output_tokens"] += output_tokens or 0
+
+    def report(self):
+        """Per-route calls, token totals and p50/p95 latency"""
+        with self._lock:
+            report = {}
+            for name, usage in self.usage.items():
+                observed = list(self.latencies[name])
+                report[name] = dict(usage)
+                report[name]["p50_seconds"] = float(np.percentile(observed, 50)) if observed else None
+                report[name]["p95_seconds"] = float(np.percentile(observed, 95)) if observed else None
+        return report
@@ -0,0 +1,83 @@
+# pregenerate_answers.py
+# Pre-generates answers for the fixed chat prompts (quick actions and the
+# "Try These" buttons) and writes them to the response store.
+#
+#   python pregenerate_answers.py                          # real Claude API
+#   python pregenerate_answers.py --concurrency 8 --force
+#   python stub_llm_server.py --port 8765 &                # offline run
+#   python pregenerate_answers.py --base-url http://127.0.0.1:8765
+#
+# Answers are tagged with the knowledge content version, so rerun this
+# after the knowledge CSVs change; prompts already answered for the current
+# version are skipped.
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from assistants import RealtyXperienceAI
+from canonical_prompts import canonical_prompts
+from response_store import ResponseStore, STORE_PATH
+
+
+def pregenerate(ai, store, jobs=None, concurrency=4, force=False):
+    """Answer every (assistant, user type, prompt) job on at most concurrency threads.
+
+    Returns a summary dict. Prompts whose model call fails are reported and
+    left unstored, so a fallback answer never passes for a generated one.
+    """
+    version = ai.knowledge_base.content_version
+    jobs = canonical_prompts() if jobs is None else jobs
+    pending = [job for job in jobs if force or store.get(*job, version) is None]
+
+    def run(job):
+        assistant, user_type, prompt = job
+        respond = ai.mr_x_response if assistant == "mr_x" else ai.landlord_response
+        try:
+            answer = respond(prompt, {"user_type": user_type, "fail_on_model_error": True})
+        except Exception as e:
+            return job, str(e)
+        store.put(assistant, user_type, prompt, version, answer)
+        return job, None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        results = list(pool.map(run, pending))
+    failed = [(job, error) for job, error in results if error]
+    return {
+        "content_version": version,
+        "prompts": len(jobs),
+        "skipped": len(jobs) - len(pending),
+        "generated": len(pending) - len(failed),
+        "failed": failed,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate answers for the canonical chat prompts")
+    parser.add_argument("--store", default=STORE_PATH)
+    parser.add_argument("--concurrency", type=int, default=4, help="simultaneous model calls")
+    parser.add_argument("--base-url", help="Claude API base URL, e.g. a stub_llm_server.py instance")
+    parser.add_argument("--force", action="store_true", help="regenerate answers that already exist")
+    args = parser.parse_args(argv)
+
+    # The stub server accepts any key
+    ai = RealtyXperienceAI(api_key="stub" if args.base_url else None, base_url=args.base_url)
+    if not ai.claude_available:
+        print("Claude client unavailable; set CLAUDE_API_KEY or --base-url")
+        return 1
+
+    store = ResponseStore(args.store)
+    summary = pregenerate(ai, store, concurrency=args.concurrency, force=args.force)
+    store.close()
+    print(f"{summary['generated']} generated, {summary['skipped']} already stored, "
+          f"{len(summary['failed'])} failed in {summary['seconds']}s (content {summary['content_version']})")
+    for (assistant, user_type, prompt), error in summary["failed"]:
+        print(f"  FAILED {assistant}/{user_type or '-'}: {prompt}: {error}")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
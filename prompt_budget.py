@@ -0,0 +1,80 @@
+# prompt_budget.py
+import re
+
+# Rough size of an English token in characters; close enough for budgeting
+CHARS_PER_TOKEN = 4
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text):
+    """Approximate token count of text"""
+    if not text:
+        return 0
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def shorten(text, max_tokens):
+    """Leading whole sentences of text that fit max_tokens.
+
+    Falls back to cutting at a word boundary when even the first sentence
+    is too long.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    kept = []
+    for sentence in SENTENCE_END.split(text):
+        if estimate_tokens(" ".join(kept + [sentence])) > max_tokens:
+            break
+        kept.append(sentence)
+    if kept:
+        return " ".join(kept)
+    cut = text[:max(0, max_tokens * CHARS_PER_TOKEN - 1)].rsplit(" ", 1)[0]
+    return cut + "…" if cut else ""
+
+
+class ContextPiece:
+    """One block of prompt context; lower priority numbers are kept first"""
+
+    def __init__(self, text, priority=0, label=""):
+        self.text = text
+        self.priority = priority
+        self.label = label
+
+
+class TokenBudget:
+    """Fits ranked context pieces into a fixed token allowance.
+
+    Pieces are taken in priority order (ties keep their given order). A piece
+    that no longer fits whole is cut to its leading sentences when at least
+    min_piece_tokens remain, otherwise it is dropped.
+    """
+
+    def __init__(self, max_tokens, min_piece_tokens=40):
+        self.max_tokens = max_tokens
+        self.min_piece_tokens = min_piece_tokens
+
+    def fit(self, pieces):
+        """(kept pieces in priority order, report dict)"""
+        remaining = self.max_tokens
+        kept, truncated, dropped = [], [], []
+        for piece in sorted(pieces, key=lambda p: p.priority):
+            size = estimate_tokens(piece.text)
+            if size <= remaining:
+                kept.append(piece)
+                remaining -= size
+                continue
+            text = shorten(piece.text, remaining) if remaining >= self.min_piece_tokens else ""
+            if text:
+                kept.append(ContextPiece(text, piece.priority, piece.label))
+                truncated.append(piece.label)
+                remaining -= estimate_tokens(text)
+            else:
+                dropped.append(piece.label)
+        report = {
+            "budget_tokens": self.max_tokens,
+            "context_tokens": self.max_tokens - remaining,
+            "truncated": truncated,
+            "dropped": dropped,
+        }
+        return kept, report
@@ -0,0 +1,189 @@
+# rate_limit.py
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Per user: a burst of 5 model calls, then one every 6 seconds
+USER_BURST = 5
+USER_RATE_PER_SECOND = 1 / 6
+# Whole process: a burst of 20, then 2 a second, at most 8 in flight
+GLOBAL_BURST = 20
+GLOBAL_RATE_PER_SECOND = 2.0
+MAX_CONCURRENT_CALLS = 8
+# Longest a request waits in line before it is turned away
+MAX_QUEUE_SECONDS = 20.0
+
+
+class RateLimited(Exception):
+    """A model call that could not be admitted within the wait allowance"""
+
+    def __init__(self, message, retry_after, scope):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.scope = scope              # "user" or "global"
+
+
+class TokenBucket:
+    """capacity tokens, refilled at rate per second; reservations may run into debt"""
+
+    def __init__(self, capacity, rate, clock=time.monotonic):
+        self.capacity = capacity
+        self.rate = rate
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost=1):
+        """Seconds until cost tokens are available"""
+        self._refill()
+        return max(0.0, (cost - self.tokens) / self.rate)
+
+    def reserve(self, cost=1):
+        """Take cost tokens now, going into debt if needed; returns seconds to wait before use"""
+        wait = self.wait_time(cost)
+        self.tokens -= cost
+        return wait
+
+    def refund(self, cost=1):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + cost)
+
+
+class Permit:
+    """One admitted model call; release it (or leave the with block) when the call ends"""
+
+    def __init__(self, limiter, waited):
+        self.limiter = limiter
+        self.waited = waited
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.limiter._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class AssistantRateLimiter:
+    """Admits assistant model calls through per-user and global token buckets.
+
+    A user's own bucket is charged first; a user who would wait longer than
+    max_wait is refused at once. Admitted requests then queue for the
+    global bucket and the concurrency cap. The queue is served round-robin
+    across users, so a user with many requests waiting cannot starve one
+    with a single request. One limiter is meant to be shared by every
+    session in the process.
+    """
+
+    def __init__(self, user_burst=USER_BURST, user_rate=USER_RATE_PER_SECOND,
+                 global_burst=GLOBAL_BURST, global_rate=GLOBAL_RATE_PER_SECOND,
+                 max_concurrent=MAX_CONCURRENT_CALLS, max_wait=MAX_QUEUE_SECONDS,
+                 clock=time.monotonic, max_users=10000):
+        self.user_burst = user_burst
+        self.user_rate = user_rate
+        self.global_bucket = TokenBucket(global_burst, global_rate, clock)
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self.clock = clock
+        self.max_users = max_users
+        self.user_buckets = OrderedDict()
+        self.waiting = OrderedDict()          # user -> deque of tickets, in round-robin order
+        self.active = 0
+        self.stats = {"admitted": 0, "refused_user": 0, "refused_global": 0, "wait_seconds": 0.0}
+        self._condition = threading.Condition()
+
+    def _user_bucket(self, user):
+        bucket = self.user_buckets.get(user)
+        if bucket is None:
+            bucket = self.user_buckets[user] = TokenBucket(self.user_burst, self.user_rate, self.clock)
+            while len(self.user_buckets) > self.max_users:
+                self.user_buckets.popitem(last=False)
+        self.user_buckets.move_to_end(user)
+        return bucket
+
+    def expected_wait(self, user):
+        """Rough seconds a call by user would wait now, for UI messages"""
+        user = user or "anonymous"
+        with self._condition:
+            return max(self._user_bucket(user).wait_time(), self._queue_wait())
+
+    def queue_length(self):
+        """Requests waiting for the global bucket or a free slot"""
+        with self._condition:
+            return self._queued()
+
+    def acquire(self, user, timeout=None):
+        """Permit for one model call by user; raises RateLimited"""
+        timeout = self.max_wait if timeout is None else timeout
+        user = user or "anonymous"
+        started = self.clock()
+        with self._condition:
+            bucket = self._user_bucket(user)
+            user_wait = bucket.wait_time()
+            if user_wait > timeout:
+                self.stats["refused_user"] += 1
+                raise RateLimited(f"Too many questions; try again in {user_wait:.0f}s", user_wait, "user")
+            bucket.reserve()
+        if user_wait:
+            time.sleep(user_wait)
+
+        ticket = object()
+        deadline = started + timeout
+        with self._condition:
+            self.waiting.setdefault(user, deque()).append(ticket)
+            while True:
+                head_user = next(iter(self.waiting))
+                my_turn = head_user == user and self.waiting[user][0] is ticket
+                if my_turn and self.active < self.max_concurrent:
+                    global_wait = self.global_bucket.wait_time()
+                    if not global_wait:
+                        self.global_bucket.reserve()
+                        self._dequeue(user)
+                        self.active += 1
+                        waited = self.clock() - started
+                        self.stats["admitted"] += 1
+                        self.stats["wait_seconds"] += waited
+                        self._condition.notify_all()
+                        return Permit(self, waited)
+                else:
+                    global_wait = None
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    self.waiting[user].remove(ticket)
+                    if not self.waiting[user]:
+                        del self.waiting[user]
+                    bucket.refund()
+                    self.stats["refused_global"] += 1
+                    self._condition.notify_all()
+                    raise RateLimited("The assistants are busy; please try again shortly",
+                                      self._queue_wait(), "global")
+                self._condition.wait(min(remaining, global_wait) if global_wait else remaining)
+
+    def _queue_wait(self):
+        """Seconds until the global bucket could admit everyone queued plus one more"""
+        return self.global_bucket.wait_time(self._queued() + 1)
+
+    def _queued(self):
+        return sum(len(tickets) for tickets in self.waiting.values())
+
+    def _dequeue(self, user):
+        """Drop user's admitted ticket and send the user to the back of the rotation"""
+        tickets = self.waiting.pop(user)
+        tickets.popleft()
+        if tickets:
+            self.waiting[user] = tickets
+
+    def _release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
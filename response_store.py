@@ -0,0 +1,61 @@
+# response_store.py
+import sqlite3
+import threading
+from datetime import datetime
+
+STORE_PATH = 'realtyxperience_responses.db'
+
+
+class ResponseStore:
+    """Pre-generated assistant answers, keyed by assistant, user type and prompt.
+
+    Each answer records the knowledge content_version it was built from;
+    get() only returns answers for the version asked for, so a knowledge
+    update retires old answers without a cleanup step.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS RESPONSES (
+                ASSISTANT TEXT NOT NULL,
+                USER_TYPE TEXT NOT NULL,
+                PROMPT TEXT NOT NULL,
+                CONTENT_VERSION TEXT NOT NULL,
+                ANSWER TEXT NOT NULL,
+                CREATED_AT TEXT NOT NULL,
+                PRIMARY KEY (ASSISTANT, USER_TYPE, PROMPT, CONTENT_VERSION)
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, assistant, user_type, prompt, content_version):
+        """Stored answer or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ANSWER FROM RESPONSES WHERE ASSISTANT = ? AND USER_TYPE = ? AND PROMPT = ? AND CONTENT_VERSION = ?",
+                (assistant, user_type, prompt, content_version),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, assistant, user_type, prompt, content_version, answer):
+        """Store (or replace) one answer"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO RESPONSES VALUES (?, ?, ?, ?, ?, ?)",
+                (assistant, user_type, prompt, content_version, answer, datetime.utcnow().isoformat(timespec="seconds")),
+            )
+            self._conn.commit()
+
+    def count(self, content_version=None):
+        """Number of stored answers (for one content version when given)"""
+        sql, args = "SELECT COUNT(*) FROM RESPONSES", ()
+        if content_version is not None:
+            sql, args = sql + " WHERE CONTENT_VERSION = ?", (content_version,)
+        with self._lock:
+            return self._conn.execute(sql, args).fetchone()[0]
+
+    def close(self):
+        self._conn.close()
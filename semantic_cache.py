@@ -0,0 +1,172 @@
+# semantic_cache.py
+# Answers repeated and reworded questions from recent answers instead of the model.
+#
+# Questions are embedded locally (hashed terms, each alias mapped to its
+# canonical phrase, plus character trigrams; no model download) and compared
+# with one matrix-vector product against the recent questions of the same
+# scope. A scope is everything the answer depended on besides the wording:
+# assistant, knowledge content version, user type, listing context, and the
+# numbers and negations in the question, so "2 bedroom" never gets the
+# "3 bedroom" answer.
+
+import logging
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from knowledge_index import QueryAnalyzer, tokenize, word_trigrams
+
+logger = logging.getLogger(__name__)
+
+# Cosine similarity a cached question needs to answer a new one
+SEMANTIC_CACHE_THRESHOLD = 0.87
+
+# Words that flip a question's meaning without changing its terms much
+NEGATIONS = {"no", "not", "never", "without", "dont", "cant", "isnt", "wont", "shouldnt"}
+
+
+class QuestionEmbedder:
+    """Hashes a question's canonical terms and their character trigrams into a unit vector.
+
+    Terms carry the weight; trigrams (at trigram_weight) let typos and
+    inflections still land close. Aliases ("ROI", "work out") count as their
+    canonical phrase, so a whole synonym group weighs what one mention does.
+    """
+
+    def __init__(self, analyzer=None, dims=1024, trigram_weight=0.4):
+        self.analyzer = analyzer or QueryAnalyzer()
+        self.dims = dims
+        self.trigram_weight = trigram_weight
+
+    def features(self, question):
+        """(feature, weight) pairs of a question"""
+        for term in self.analyzer.canonical_terms(question):
+            yield f"t:{term}", 1.0
+            for gram in word_trigrams(term):
+                yield f"g:{gram}", self.trigram_weight
+
+    def embed(self, question):
+        """Unit-length float32 vector (all zeros when the question has no terms)"""
+        vector = np.zeros(self.dims, dtype=np.float32)
+        for feature, weight in self.features(question):
+            code = zlib.crc32(feature.encode())
+            # The top bit picks a sign so colliding features tend to cancel, not pile up
+            vector[code % self.dims] += weight if code >> 31 else -weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+def question_guard(question):
+    """Numbers and negations in a question; cached answers must share them exactly"""
+    words = tokenize(question)
+    return tuple(sorted({w for w in words if any(c.isdigit() for c in w) or w in NEGATIONS}))
+
+
+class _ScopeEntries:
+    """Ring buffer of one scope's embedded questions and their answers.
+
+    The vector matrix starts small and doubles up to capacity, so the many
+    scopes that only ever see a few questions stay cheap.
+    """
+
+    def __init__(self, capacity, dims):
+        self.capacity = capacity
+        self.vectors = np.zeros((min(8, capacity), dims), dtype=np.float32)
+        self.entries = []
+        self.next = 0
+
+    def add(self, vector, entry):
+        slot = self.next % self.capacity
+        if slot == len(self.entries):
+            if slot == len(self.vectors):
+                grown = np.zeros((min(2 * slot, self.capacity), self.vectors.shape[1]), dtype=np.float32)
+                grown[:slot] = self.vectors
+                self.vectors = grown
+            self.entries.append(entry)
+        else:
+            self.entries[slot] = entry
+        self.vectors[slot] = vector
+        self.next += 1
+
+    def nearest(self, vector):
+        """(similarity, entry) of the closest stored question, or (0.0, None)"""
+        filled = len(self.entries)
+        if not filled:
+            return 0.0, None
+        scores = self.vectors[:filled] @ vector
+        best = int(np.argmax(scores))
+        return float(scores[best]), self.entries[best]
+
+
+class SemanticAnswerCache:
+    """Recent answers looked up by question meaning within a scope.
+
+    Each scope keeps its last capacity questions; at most max_scopes scopes
+    are kept, least recently used dropped first. stats counts hits and
+    misses and the model time hits saved (the original answer's latency).
+    Thread-safe, so one cache can serve every session in the process.
+    """
+
+    def __init__(self, embedder=None, threshold=SEMANTIC_CACHE_THRESHOLD, capacity=256, max_scopes=64):
+        self.embedder = embedder or QuestionEmbedder()
+        self.threshold = threshold
+        self.capacity = capacity
+        self.max_scopes = max_scopes
+        self.scopes = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "saved_seconds": 0.0, "lookup_seconds": 0.0}
+        self._lock = threading.Lock()
+
+    def _key(self, scope, question):
+        return tuple(scope) + (question_guard(question),)
+
+    def lookup(self, scope, question):
+        """Cached answer for a question this close to a recent one in scope, else None"""
+        started = time.perf_counter()
+        vector = self.embedder.embed(question)
+        key = self._key(scope, question)
+        with self._lock:
+            entries = self.scopes.get(key)
+            similarity, entry = entries.nearest(vector) if entries and vector.any() else (0.0, None)
+            hit = entry is not None and similarity >= self.threshold
+            if hit:
+                self.scopes.move_to_end(key)
+                self.stats["hits"] += 1
+                self.stats["saved_seconds"] += entry["seconds"]
+            else:
+                self.stats["misses"] += 1
+            self.stats["lookup_seconds"] += time.perf_counter() - started
+        if hit:
+            logger.info("semantic cache hit similarity=%.2f question=%r cached=%r saved=%.2fs",
+                        similarity, question, entry["question"], entry["seconds"])
+        return entry["answer"] if hit else None
+
+    def store(self, scope, question, answer, seconds=0.0):
+        """Remember an answer that took seconds to produce"""
+        vector = self.embedder.embed(question)
+        if not vector.any():
+            return
+        key = self._key(scope, question)
+        with self._lock:
+            entries = self.scopes.get(key)
+            if entries is None:
+                entries = self.scopes[key] = _ScopeEntries(self.capacity, self.embedder.dims)
+                while len(self.scopes) > self.max_scopes:
+                    self.scopes.popitem(last=False)
+            self.scopes.move_to_end(key)
+            entries.add(vector, {"question": question, "answer": answer, "seconds": seconds})
+
+    def clear(self):
+        """Forget every cached answer (stats are kept)"""
+        with self._lock:
+            self.scopes.clear()
+
+    def report(self):
+        """stats plus hit rate"""
+        with self._lock:
+            report = dict(self.stats)
+        lookups = report["hits"] + report["misses"]
+        report["hit_rate"] = report["hits"] / lookups if lookups else 0.0
+        return report
@@ -0,0 +1,221 @@
+# stub_llm_server.py
+# Local stand-in for the Anthropic Messages API, for tests, offline jobs and load tests.
+#
+#   python stub_llm_server.py --port 8765 --latency-ms 200
+#   python stub_llm_server.py --latency-ms lognormal:800:0.5 --ms-per-token 15 \
+#       --output-tokens 300 --error-rate 0.02 --error-kinds rate_limit,overloaded
+#   python pregenerate_answers.py --base-url http://127.0.0.1:8765
+#
+# POST /v1/messages returns a well-formed message whose text echoes the
+# question (padded to --output-tokens, cut at the request's max_tokens),
+# with usage counts estimated from the request size. "stream": true gets the
+# same answer as server-sent events. Latency is the time to the first token,
+# drawn from a distribution, plus --ms-per-token for each output token.
+# A share of requests (--error-rate) fails like the real API does.
+
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from prompt_budget import CHARS_PER_TOKEN, estimate_tokens
+
+# Injectable failures: HTTP status and API error type ("disconnect" drops the connection)
+ERROR_KINDS = {
+    "rate_limit": (429, "rate_limit_error"),
+    "overloaded": (529, "overloaded_error"),
+    "server": (500, "api_error"),
+    "disconnect": (None, None),
+}
+
+FILLER = "Lagos rental yields depend on location, title, access roads and tenant demand."
+
+
+def latency_sampler(spec, seed=None):
+    """Callable returning one latency in seconds, from a spec in milliseconds.
+
+    "200" or "fixed:200"; "uniform:100:400"; "normal:300:50" (mean, sd);
+    "lognormal:300:0.5" (median, sigma; a long right tail like real APIs).
+    """
+    rng = random.Random(seed)
+    kind, *args = str(spec).split(":") if ":" in str(spec) else ("fixed", spec)
+    args = [float(a) for a in args]
+    if kind == "fixed":
+        draw = lambda: args[0]
+    elif kind == "uniform":
+        draw = lambda: rng.uniform(args[0], args[1])
+    elif kind == "normal":
+        draw = lambda: rng.gauss(args[0], args[1])
+    elif kind == "lognormal":
+        draw = lambda: args[0] * rng.lognormvariate(0.0, args[1])
+    else:
+        raise ValueError(f"unknown latency distribution {kind!r}")
+    return lambda: max(0.0, draw()) / 1000
+
+
+def answer_chunks(text, size=4):
+    """Text split into stream deltas of about size words"""
+    words = text.split(" ")
+    return [" ".join(words[i:i + size]) + (" " if i + size < len(words) else "")
+            for i in range(0, len(words), size)]
+
+
+class StubMessagesHandler(BaseHTTPRequestHandler):
+    """Answers POST /v1/messages like the real API would, minus the model"""
+
+    ids = itertools.count(1)
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        if self.path.split("?")[0].rstrip("/") != "/v1/messages":
+            self._send(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        server = self.server
+        server.requests.append(body)
+        time.sleep(server.latency())
+
+        if server.error_rate and server.rng.random() < server.error_rate:
+            self._fail(server.rng.choice(server.error_kinds))
+            return
+
+        text, stop_reason = self._answer(body)
+        input_tokens = estimate_tokens(json.dumps(body.get("system", "")) + json.dumps(body.get("messages", [])))
+        message = {
+            "id": f"msg_stub_{next(self.ids)}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "stub"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": {"input_tokens": input_tokens, "output_tokens": estimate_tokens(text)},
+        }
+        server.stats["ok"] += 1
+        if body.get("stream"):
+            self._stream(message)
+        else:
+            time.sleep(server.ms_per_token * estimate_tokens(text) / 1000)
+            self._send(200, message)
+
+    def _answer(self, body):
+        """(answer text, stop reason) for a request"""
+        question = ""
+        for message in body.get("messages", []):
+            content = message.get("content")
+            question = content if isinstance(content, str) else " ".join(
+                block.get("text", "") for block in content or [] if isinstance(block, dict))
+        text = f"[stub] {question.strip().splitlines()[-1] if question.strip() else ''}"
+        while estimate_tokens(text) < self.server.output_tokens:
+            text += " " + FILLER
+        limit = body.get("max_tokens") or 0
+        if limit and estimate_tokens(text) > limit:
+            return text[:limit * CHARS_PER_TOKEN], "max_tokens"
+        return text, "end_turn"
+
+    def _stream(self, message):
+        """The message as the API's server-sent event sequence"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        text = message["content"][0]["text"]
+        usage = message["usage"]
+        start = dict(message, content=[], stop_reason=None, usage=dict(usage, output_tokens=1))
+        self._event("message_start", {"type": "message_start", "message": start})
+        self._event("content_block_start", {"type": "content_block_start", "index": 0,
+                                            "content_block": {"type": "text", "text": ""}})
+        for chunk in answer_chunks(text):
+            time.sleep(self.server.ms_per_token * estimate_tokens(chunk) / 1000)
+            self._event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                "delta": {"type": "text_delta", "text": chunk}})
+        self._event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        self._event("message_delta", {"type": "message_delta",
+                                      "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+                                      "usage": {"output_tokens": usage["output_tokens"]}})
+        self._event("message_stop", {"type": "message_stop"})
+
+    def _event(self, name, payload):
+        self.wfile.write(f"event: {name}\ndata: {json.dumps(payload)}\n\n".encode())
+        self.wfile.flush()
+
+    def _fail(self, kind):
+        self.server.stats[kind] += 1
+        status, error_type = ERROR_KINDS[kind]
+        if status is None:
+            self.close_connection = True
+            self.connection.close()
+            return
+        self._send(status, {"type": "error", "error": {"type": error_type, "message": f"injected {kind}"}},
+                   {"retry-after": "1"} if status == 429 else None)
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_stub_server(port=0, latency_ms=0, ms_per_token=0, output_tokens=0,
+                     error_rate=0.0, error_kinds=("rate_limit", "overloaded", "server"), seed=None):
+    """Configured, not yet serving, stub server on 127.0.0.1 (see server.url).
+
+    latency_ms is a number or a latency_sampler spec such as "lognormal:300:0.5".
+    """
+    unknown = set(error_kinds) - set(ERROR_KINDS)
+    if unknown:
+        raise ValueError(f"unknown error kinds {sorted(unknown)}")
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubMessagesHandler)
+    server.daemon_threads = True
+    server.latency = latency_sampler(latency_ms, seed)
+    server.ms_per_token = ms_per_token
+    server.output_tokens = output_tokens
+    server.error_rate = error_rate
+    server.error_kinds = list(error_kinds)
+    server.rng = random.Random(seed)
+    server.requests = deque(maxlen=1000)
+    server.stats = Counter()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    return server
+
+
+def start_stub_server(port=0, latency_ms=0, **options):
+    """Serve in a background thread; returns the server (see make_stub_server)"""
+    server = make_stub_server(port, latency_ms, **options)
+    threading.Thread(target=server.serve_forever, name="stub-llm", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stub of the Anthropic Messages API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", default="0",
+                        help='time to first token: ms, or "uniform:LO:HI", "normal:MEAN:SD", "lognormal:MEDIAN:SIGMA"')
+    parser.add_argument("--ms-per-token", type=float, default=0, help="generation time per output token")
+    parser.add_argument("--output-tokens", type=int, default=0, help="pad answers to about this many tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests that fail")
+    parser.add_argument("--error-kinds", default="rate_limit,overloaded,server",
+                        help=f"comma-separated, from {', '.join(ERROR_KINDS)}")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+    server = make_stub_server(args.port, args.latency_ms, args.ms_per_token, args.output_tokens,
+                              args.error_rate, args.error_kinds.split(","), args.seed)
+    print(f"Stub LLM server on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+from datetime import datetime
+
+import pandas as pd
+
+from assistants import RealtyXperienceAI
+from canonical_prompts import LANDLORD_USER_TYPES, MR_X_USER_TYPES, user_type_key
+from conversation_memory import extractive_summary
+from knowledge_base import CSVKnowledgeBase, knowledge_content_version
+from llm_backends import AnthropicBackend
+from rate_limit import AssistantRateLimiter
+from stub_llm_server import start_stub_server
+
+QUESTION = "Should I invest in a shortlet apartment in Lekki or a long-term rental?"
+
+
+def test_sessions_share_knowledge_and_greetings_until_the_files_change(tmp_path):
+    land = pd.read_csv('nigeria_land_knowledge.csv')
+    land_path = tmp_path / "land.csv"
+    land.to_csv(land_path, index=False)
+    llm = AnthropicBackend(api_key="stub", base_url="http://127.0.0.1:9", max_retries=0)
+
+    knowledge = CSVKnowledgeBase(land_path=land_path)
+    greetings = RealtyXperienceAI.build_welcome_messages(knowledge)
+    first = RealtyXperienceAI(llm=llm, knowledge_base=knowledge, welcome_messages=greetings)
+    second = RealtyXperienceAI(llm=llm, knowledge_base=knowledge, welcome_messages=greetings)
+    assert first.knowledge_base is second.knowledge_base
+    assert first.welcome_message("landlord", "guest") is second.welcome_message("landlord", "guest")
+
+    version = knowledge_content_version(land_path=land_path)
+    land.loc[land["CATEGORY"] == "Basics", "QUESTION"] = "How do I buy land in Epe safely?"
+    land.to_csv(land_path, index=False)
+    assert knowledge_content_version(land_path=land_path) != version
+
+    first.use_knowledge(CSVKnowledgeBase(land_path=land_path))
+    assert "How do I buy land in Epe safely?" in first.welcome_message("landlord", "guest")
+    assert "How do I buy land in Epe safely?" not in second.welcome_message("landlord", "guest")
+    assert first.knowledge_base.content_version != second.knowledge_base.content_version
+
+
+def test_content_version_only_rehashes_changed_files(tmp_path, monkeypatch):
+    land_path = tmp_path / "land.csv"
+    land_path.write_text("QUESTION,ANSWER\nq,a\n")
+    version = knowledge_content_version(land_path=str(land_path))
+
+    def no_reads(*args, **kwargs):
+        raise AssertionError("unchanged files were read again")
+    monkeypatch.setattr("builtins.open", no_reads)
+    assert knowledge_content_version(land_path=str(land_path)) == version
+    monkeypatch.undo()
+
+    land_path.write_text("QUESTION,ANSWER\nq,b and more\n")
+    assert knowledge_content_version(land_path=str(land_path)) != version
+
+
+def test_every_selectable_user_type_has_a_greeting():
+    for assistant, user_types in (("mr_x", MR_X_USER_TYPES), ("landlord", LANDLORD_USER_TYPES)):
+        assert {user_type_key(t) for t in user_types} == set(RealtyXperienceAI.WELCOME_PROFILES[assistant])
+
+
+def test_follow_ups_do_not_crowd_first_questions_out_of_the_answer_cache():
+    server = start_stub_server()
+    try:
+        ai = RealtyXperienceAI(llm=AnthropicBackend(api_key="stub", base_url=server.url))
+        context = {"user_type": "Guest/Buyer", "fail_on_model_error": True}
+        first = ai.mr_x_response(QUESTION, dict(context, history=[]))
+
+        for n in range(70):
+            earlier = [(f"Is a flat in Yaba worth {n} million naira?", "It can be.", datetime(2024, 1, 1))]
+            ai.mr_x_response(f"What about {n} bedroom flats in Ikeja?", dict(context, history=earlier))
+        assert ai.answer_cache.report()["hits"] == 0 and len(ai.answer_cache.scopes) == 1
+
+        assert ai.mr_x_response(QUESTION, dict(context, history=[])) == first
+        assert ai.answer_cache.report()["hits"] == 1
+    finally:
+        server.shutdown()
+
+
+def test_conversation_summaries_are_rate_limited_and_counted():
+    server = start_stub_server()
+    try:
+        limiter = AssistantRateLimiter(user_burst=2, user_rate=0.001)
+        ai = RealtyXperienceAI(llm=AnthropicBackend(api_key="stub", base_url=server.url), rate_limiter=limiter)
+        history = [(f"Is a flat in Yaba worth {n} million naira?", "It can be. " * 40, datetime(2024, 1, 1, 9, n))
+                   for n in range(8)]
+        ai._conversation("landlord", {"history": history, "current_user": "ada"})
+        ai.conversations["landlord"].wait()
+
+        assert limiter.stats["admitted"] == 1
+        assert ai.prompt_log[-1]["purpose"] == "summary" and ai.prompt_log[-1]["assistant"] == "landlord"
+        assert ai.model_router.report()["light"]["calls"] == 1
+        assert ai.conversations["landlord"].summary.startswith("[stub]")
+
+        ai._summarize_turns("", history[:2], "landlord", "ada")
+        summary = ai._summarize_turns("", history[:2], "landlord", "ada")
+        assert summary == extractive_summary("", history[:2])
+        assert limiter.stats == dict(limiter.stats, admitted=2, refused_user=1)
+        assert len(ai.prompt_log) == 2
+    finally:
+        server.shutdown()
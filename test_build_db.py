@@ -0,0 +1,67 @@
+import os
+import shutil
+import sqlite3
+from build_db import build_knowledge_db, read_metadata
+
+
+def copy_sources(tmp_path):
+    tables = {}
+    for table, name in (('PROPERTY_KNOWLEDGE', 'nigeria_property_knowledge.csv'), ('LAND_KNOWLEDGE', 'nigeria_land_knowledge.csv')):
+        tables[table] = str(tmp_path / name)
+        shutil.copyfile(name, tables[table])
+    return tables
+
+
+def test_build_skips_unchanged_and_rebuilds_only_changed_tables(tmp_path):
+    tables = copy_sources(tmp_path)
+    db_path = str(tmp_path / 'knowledge.db')
+
+    assert build_knowledge_db(db_path, tables) == ['PROPERTY_KNOWLEDGE', 'LAND_KNOWLEDGE']
+    assert read_metadata(db_path)['schema_version'] == '1'
+    assert build_knowledge_db(db_path, tables) == []
+
+    with open(tables['LAND_KNOWLEDGE']) as f:
+        lines = f.readlines()
+    with open(tables['LAND_KNOWLEDGE'], 'w') as f:
+        f.writelines(lines[:-1])
+    assert build_knowledge_db(db_path, tables) == ['LAND_KNOWLEDGE']
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM LAND_KNOWLEDGE").fetchone()[0] == len(lines) - 2
+    assert conn.execute("SELECT COUNT(*) FROM PROPERTY_KNOWLEDGE").fetchone()[0] > 0
+    conn.close()
+    assert build_knowledge_db(db_path, tables, force=True) == ['PROPERTY_KNOWLEDGE', 'LAND_KNOWLEDGE']
+    assert sorted(os.listdir(tmp_path)) == sorted(['knowledge.db', 'nigeria_property_knowledge.csv', 'nigeria_land_knowledge.csv'])
+
+
+def test_rebuilt_database_keeps_readable_permissions(tmp_path):
+    tables = copy_sources(tmp_path)
+    db_path = str(tmp_path / 'knowledge.db')
+    umask = os.umask(0o022)
+    try:
+        build_knowledge_db(db_path, tables)
+        assert os.stat(db_path).st_mode & 0o777 == 0o644
+
+        os.chmod(db_path, 0o640)
+        build_knowledge_db(db_path, tables, force=True)
+        assert os.stat(db_path).st_mode & 0o777 == 0o640
+    finally:
+        os.umask(umask)
+
+
+def test_serving_connection_reopens_after_a_rebuild(tmp_path):
+    from migrationscript import SQLiteKnowledgeBase
+    tables = copy_sources(tmp_path)
+    db_path = str(tmp_path / 'knowledge.db')
+    build_knowledge_db(db_path, tables)
+    kb = SQLiteKnowledgeBase(db_path, read_only=True)
+    assert kb.search_land_knowledge('quokka') == []
+
+    with open(tables['LAND_KNOWLEDGE']) as f:
+        text = f.read().rstrip('\n')
+    columns = text.split('\n', 1)[0].count(',') + 1
+    with open(tables['LAND_KNOWLEDGE'], 'w') as f:
+        f.write(text + '\n' + ','.join(['quokka'] * columns) + '\n')
+    assert build_knowledge_db(db_path, tables) == ['LAND_KNOWLEDGE']
+
+    assert [hit['question'] for hit in kb.search_land_knowledge('quokka')] == ['quokka']
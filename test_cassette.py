@@ -0,0 +1,69 @@
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import assistants
+from assistants import RealtyXperienceAI
+from cassette import Cassette, CassetteMiss, RecordingBackend, ReplayBackend
+from listing_snapshot import published_listings
+from llm_backends import AnthropicBackend
+from stub_llm_server import start_stub_server
+
+QUESTION = "Should I invest in a shortlet apartment in Lekki or a long-term rental?"
+MESSAGES = [{"role": "user", "content": QUESTION}]
+
+
+def record_chat(path, *questions):
+    """Answer questions as the MR X chat page would, recording the model calls"""
+    server = start_stub_server(latency_ms=50)
+    try:
+        backend = RecordingBackend(AnthropicBackend(api_key="stub", base_url=server.url), Cassette(path))
+        ai = RealtyXperienceAI(llm=backend)
+        return [ai.mr_x_response(q, {"listing_digest": "", "user_type": "Guest/Buyer"}) for q in questions]
+    finally:
+        server.shutdown()
+
+
+def test_replay_serves_recorded_calls_with_scaled_latency(tmp_path):
+    path = tmp_path / "chat.jsonl"
+    answer, = record_chat(path, QUESTION)
+    assert answer.startswith("[stub]") and len(Cassette(path)) == 1
+
+    entry = next(iter(Cassette(path).entries.values()))[0]
+    assert entry["seconds"] >= 0.05 and entry["response"]["output_tokens"]
+    request = entry["request"]
+
+    replay = ReplayBackend(Cassette(path), latency_scale=0)
+    assert replay.complete(**request).text == answer
+    streamed = replay.stream(**request)
+    assert "".join(streamed) == answer and streamed.response.input_tokens == entry["response"]["input_tokens"]
+
+    with pytest.raises(CassetteMiss):
+        replay.complete("stub-model", 100, "", MESSAGES)
+
+
+def test_mr_x_chat_replays_offline(tmp_path, monkeypatch, request):
+    path = tmp_path / "chat.jsonl"
+    answer, = record_chat(path, QUESTION)
+
+    monkeypatch.setattr(assistants, "CLAUDE_CASSETTE", str(path))
+    monkeypatch.setattr(assistants, "CLAUDE_CASSETTE_MODE", "replay")
+    monkeypatch.setattr(assistants, "CLAUDE_CASSETTE_LATENCY_SCALE", 0.0)
+    monkeypatch.setattr(published_listings, "load", tuple)
+    published_listings.invalidate()
+    request.addfinalizer(published_listings.invalidate)
+
+    app = AppTest.from_file(os.path.join(os.path.dirname(__file__), "merge.py"), default_timeout=60)
+    app.session_state["logged_in"] = True
+    app.session_state["current_user"] = "ada"
+    app.session_state["user_type"] = "tenant"
+    app.session_state["portal_selection"] = "properties"
+    app.run()
+    app.sidebar.selectbox[0].select("MR X AI Assistant").run()
+    app.text_input(key="mr_x_input").input(QUESTION)
+    app.button(key="send_mr_x").click().run()
+
+    assert not app.exception and not app.error
+    assert isinstance(app.session_state.ai_system.llm, ReplayBackend)
+    assert any(answer in info.value for info in app.info)
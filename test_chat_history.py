@@ -0,0 +1,49 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from chat_history import CHAT_HISTORY_TURNS, MessageWriteBehind, load_earlier_turns, new_chat_history, record_turn
+from database import Base, Message
+
+
+def make_sessions(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'chat.db'}")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+def test_turns_are_windowed_in_session_and_batched_to_the_database(tmp_path):
+    sessions = make_sessions(tmp_path)
+    writer = MessageWriteBehind(sessions, batch_size=1000, flush_seconds=60)
+    history = new_chat_history()
+    for n in range(CHAT_HISTORY_TURNS + 15):
+        record_turn(history, writer, 7, "mr_x", f"question {n}", f"answer {n}")
+    record_turn(history, writer, None, "mr_x", "guest question", "guest answer")
+
+    assert len(history) == CHAT_HISTORY_TURNS and history[-1][0] == "guest question"
+    assert writer.flush() == 2 * (CHAT_HISTORY_TURNS + 15)
+    assert writer.stats["batches"] == 1
+
+    db = sessions()
+    try:
+        assert db.query(Message).count() == 2 * (CHAT_HISTORY_TURNS + 15)
+        turns, has_more = load_earlier_turns(db, 7, "mr_x", history[0][2], page_turns=10)
+        assert [t[0] for t in turns] == [f"question {n}" for n in range(6, 16)] and has_more
+        assert turns[-1][1] == "answer 15"
+        turns, has_more = load_earlier_turns(db, 7, "mr_x", history[0][2], page=1, page_turns=10)
+        assert [t[0] for t in turns] == [f"question {n}" for n in range(6)] and not has_more
+        assert load_earlier_turns(db, 7, "landlord", None) == ([], False)
+    finally:
+        db.close()
+
+
+def test_failed_batches_are_retried(tmp_path):
+    sessions = make_sessions(tmp_path)
+    broken = sessionmaker(bind=create_engine(f"sqlite:///{tmp_path / 'missing' / 'chat.db'}"))
+    writer = MessageWriteBehind(broken, batch_size=1000, flush_seconds=60, max_pending=3)
+    for n in range(4):
+        writer.add(1, "landlord", "user", f"message {n}")
+    assert writer.flush() == 0 and writer.stats["failures"] == 1
+    assert writer.stats["dropped"] == 1 and len(writer.pending) == 3
+
+    writer.session_factory = sessions
+    assert writer.flush() == 3
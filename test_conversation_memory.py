@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from conversation_memory import ConversationMemory, extractive_summary
+
+START = datetime(2024, 1, 1)
+
+
+def turns(count):
+    return [(f"Question {n} about Lekki flats?", f"Answer {n}. " + "More detail follows. " * 20, START + timedelta(minutes=n))
+            for n in range(count)]
+
+
+def test_recent_turns_fit_the_budget_and_older_ones_are_summarized():
+    folded = []
+
+    def summarize(previous, older):
+        folded.append([t[0] for t in older])
+        return extractive_summary(previous, older)
+
+    memory = ConversationMemory(summarize, recent_tokens=120, summary_tokens=60)
+    summary, recent = memory.context(turns(6))
+    assert summary == ""
+    assert [t[0] for t in recent] == ["Question 4 about Lekki flats?", "Question 5 about Lekki flats?"]
+    memory.wait()
+    assert folded == [[f"Question {n} about Lekki flats?" for n in range(4)]]
+
+    summary, recent = memory.context(turns(8))
+    assert "Question 3" in summary and len(summary) <= 60 * 4
+    memory.wait()
+    assert folded[-1] == ["Question 4 about Lekki flats?", "Question 5 about Lekki flats?"]
+    assert memory.summarized_until == turns(8)[5][2]
+
+
+def test_failed_summaries_fall_back_and_cleared_chats_start_fresh():
+    def broken(previous, older):
+        raise RuntimeError("model down")
+
+    memory = ConversationMemory(broken, recent_tokens=120)
+    memory.context(turns(5))
+    memory.wait()
+    assert "Question 2" in memory.summary
+
+    assert memory.context([]) == ("", [])
+    assert memory.summary == "" and memory.summarized_until is None
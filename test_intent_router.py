@@ -0,0 +1,21 @@
+from intent_router import IntentRouter
+
+
+def hit(question):
+    return [{"question": question, "answer": "...", "category": "", "tags": ""}]
+
+
+def test_router_answers_close_matches_from_knowledge():
+    router = IntentRouter()
+    assert router.route("What is zoning?", hit("What is zoning?")).direct
+    assert router.route("what's zoning", hit("What is zoning?")).direct
+    assert not router.route("What is zoning in Lekki for a duplex?", hit("What is zoning?")).direct
+    assert router.stats == {"knowledge": 2, "llm": 1}
+
+
+def test_router_sends_synthesis_questions_to_the_model():
+    router = IntentRouter()
+    decision = router.route("Should I buy land or a flat?", hit("Should I buy land or a flat?"))
+    assert decision.route == "llm" and decision.reason == "synthesis question"
+    assert not router.route("What are good rental yields for 5 flats?", hit("What are good rental yields?")).direct
+    assert router.route("anything", []).reason == "no knowledge match"
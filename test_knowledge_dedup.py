@@ -0,0 +1,20 @@
+import pandas as pd
+from knowledge_dedup import NearDuplicateDetector, merge_duplicates
+
+
+def test_near_duplicates_are_merged_into_the_first_row():
+    rows = pd.read_csv('nigeria_property_knowledge.csv').fillna("").to_dict("records")
+    original = rows[2]
+    rows.append(dict(original, QUESTION=original["QUESTION"].lower(), TAGS="cash_flow_naira"))
+    rows.append(dict(original, ANSWER=original["ANSWER"] + " Track it monthly."))
+
+    assert NearDuplicateDetector().clusters(rows) == [[2, len(rows) - 2, len(rows) - 1]]
+    merged, clusters = merge_duplicates(rows)
+    assert len(merged) == len(rows) - 2
+    assert merged[2]["QUESTION"] == original["QUESTION"]
+    assert merged[2]["TAGS"].endswith("_naira")
+
+
+def test_distinct_knowledge_rows_are_kept():
+    for path in ('nigeria_property_knowledge.csv', 'nigeria_land_knowledge.csv'):
+        assert NearDuplicateDetector().clusters(pd.read_csv(path)) == []
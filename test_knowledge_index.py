@@ -0,0 +1,161 @@
+import pandas as pd
+from knowledge_index import KnowledgeIndex, QueryAnalyzer, ShardedKnowledgeIndex, SynonymExpander, iter_bits
+
+
+def load_index(path):
+    return KnowledgeIndex(pd.read_csv(path))
+
+
+def test_fuzzy_search_tolerates_typos():
+    land_index = load_index('nigeria_land_knowledge.csv')
+    results = land_index.fuzzy_search("percolaton tst")
+    assert results[0][1]["question"] == "What is a percolation test?"
+
+    property_index = load_index('nigeria_property_knowledge.csv')
+    results = property_index.fuzzy_search("tenent screning")
+    assert results[0][1]["question"] == "How do I screen tenants?"
+
+
+def test_fuzzy_search_skips_noise_and_excluded_rows():
+    land_index = load_index('nigeria_land_knowledge.csv')
+    assert land_index.fuzzy_search("") == []
+    assert land_index.fuzzy_search("what is the") == []
+
+    row_id, _ = land_index.fuzzy_search("zonng", 1)[0]
+    assert all(r != row_id for r, _ in land_index.fuzzy_search("zonng", 3, exclude=[row_id]))
+
+
+def test_facet_filters_and_counts():
+    property_index = load_index('nigeria_property_knowledge.csv')
+    filters = {"CATEGORY": "Legal", "DIFFICULTY_LEVEL": "beginner"}
+    rows = property_index.filtered_rows(filters)
+    assert [r["question"] for r in rows] == [
+        "What documents do I need when buying property?",
+        "How do I verify property title?",
+    ]
+
+    counts = property_index.facet_counts({"CATEGORY": "Legal"})
+    assert counts["DIFFICULTY_LEVEL"] == {"beginner": 2, "intermediate": 1}
+    assert counts["CATEGORY"] == {"legal": 3}
+
+    mask = property_index.filter_bitmap({"TAGS": ["roi", "naira"]})
+    assert [property_index.rows[i]["question"] for i in iter_bits(mask)] == ["How do you calculate ROI for rental property?"]
+
+
+def test_analyzer_drops_stop_words_and_stems():
+    analyzed = QueryAnalyzer().analyze("How are rental taxes calculated?")
+    assert analyzed.terms == ["rental", "tax", "calculat"]
+    assert analyzed.phrase == "how are rental taxes calculated"
+    assert not QueryAnalyzer().analyze("   ")
+
+
+def test_search_ranks_multi_term_questions():
+    property_index = load_index('nigeria_property_knowledge.csv')
+    results = property_index.search("How do I calculate ROI on a rental property in Lagos?")
+    assert results[0][1]["question"] == "How do you calculate ROI for rental property?"
+
+    results = property_index.search("what is cash flow")
+    assert results[0][1]["question"] == "What is cash flow?"
+
+    assert property_index.search("") == []
+    assert property_index.search("what is the") == []
+
+
+def test_synonyms_expand_aliases_before_lookup():
+    synonyms = SynonymExpander([["certificate of occupancy", "c of o", "cofo"], ["boys quarter", "bq"]])
+    assert synonyms.expand_phrases("Is a C of O enough?") == ["Is a C of O enough?", "certificate of occupancy", "cofo"]
+    assert synonyms.expansions(["bq", "for", "rent"]) == ["boys", "quarter"]
+
+    analyzer = QueryAnalyzer(synonyms=SynonymExpander.from_csv())
+    property_index = KnowledgeIndex(pd.read_csv('nigeria_property_knowledge.csv'), analyzer)
+    results = property_index.search("What is a C of O?")
+    assert {item["question"] for _, item in results[:2]} == {
+        "What documents do I need when buying property?",
+        "How do I verify property title?",
+    }
+    results = property_index.search("is shortlet profitable")
+    assert results[0][1]["question"] == "Is short-term rental profitable?"
+
+
+def test_unified_index_searches_both_domains():
+    index = KnowledgeIndex.from_domains({
+        "property": pd.read_csv('nigeria_property_knowledge.csv'),
+        "land": pd.read_csv('nigeria_land_knowledge.csv'),
+    })
+    results = index.search("What is land banking?", 5)
+    assert {item["domain"] for _, item in results} == {"property", "land"}
+
+    land_first = index.search("What is land banking?", 1, domain_boosts={"property": 0.5})
+    assert land_first[0][1]["domain"] == "land"
+    property_first = index.search("What is land banking?", 1, domain_boosts={"land": 0.5})
+    assert property_first[0][1]["domain"] == "property"
+
+    mask = index.filter_bitmap({"DOMAIN": "land"})
+    assert all(item["domain"] == "land" for _, item in index.search("down payment", 5, mask=mask))
+    assert index.facet_counts({"DOMAIN": "property", "CATEGORY": "Legal"})["CATEGORY"] == {"legal": 3}
+
+
+def test_parallel_build_matches_single_process_build():
+    tables = {
+        "property": pd.read_csv('nigeria_property_knowledge.csv'),
+        "land": pd.read_csv('nigeria_land_knowledge.csv'),
+    }
+    serial = KnowledgeIndex.from_domains(tables, workers=1)
+    records = [dict(row, DOMAIN=domain) for domain, df in tables.items() for row in df.fillna("").to_dict("records")]
+    parallel = KnowledgeIndex.build_parallel(records, workers=2, partitions=5)
+
+    assert parallel.rows == serial.rows
+    assert parallel.words == serial.words
+    assert parallel.facet_counts() == serial.facet_counts()
+    assert parallel.filter_bitmap({"DOMAIN": "land", "TAGS": "zoning"}) == serial.filter_bitmap({"DOMAIN": "land", "TAGS": "zoning"})
+    for query in ["How do I calculate ROI?", "What is zoning?", "down payment for land", "percolaton tst"]:
+        assert parallel.search(query, 5) == serial.search(query, 5)
+        assert parallel.fuzzy_search(query, 5) == serial.fuzzy_search(query, 5)
+
+
+def test_sharded_search_matches_single_index():
+    tables = {
+        "property": pd.read_csv('nigeria_property_knowledge.csv'),
+        "land": pd.read_csv('nigeria_land_knowledge.csv'),
+    }
+    single = KnowledgeIndex.from_domains(tables, workers=1)
+    for executor in ("thread", "process"):
+        sharded = ShardedKnowledgeIndex.from_domains(tables, shards=3, executor=executor)
+        try:
+            assert sharded.facet_counts() == single.facet_counts()
+            mask = sharded.filter_bitmap({"DOMAIN": "land", "TAGS": "zoning"})
+            assert mask == single.filter_bitmap({"DOMAIN": "land", "TAGS": "zoning"})
+            for query in ["How do I calculate ROI?", "What is zoning?", "down payment for land", "percolaton tst"]:
+                assert sharded.search(query, 5) == single.search(query, 5)
+                assert sharded.search(query, 5, domain_boosts={"land": 0.5}) == single.search(query, 5, domain_boosts={"land": 0.5})
+                assert sharded.fuzzy_search(query, 5, exclude=[0, 40]) == single.fuzzy_search(query, 5, exclude=[0, 40])
+                assert sharded.search(query, 5, mask=mask) == single.search(query, 5, mask=mask)
+        finally:
+            sharded.close()
+
+
+def test_sparse_and_dense_scoring_agree(monkeypatch):
+    import knowledge_index
+    index = KnowledgeIndex.from_domains({
+        "property": pd.read_csv('nigeria_property_knowledge.csv'),
+        "land": pd.read_csv('nigeria_land_knowledge.csv'),
+    }, workers=1)
+    mask = index.filter_bitmap({"DOMAIN": "land"})
+    queries = ["How do I calculate ROI?", "What is zoning?", "down payment for land", "percolaton tst", "tenent screning"]
+
+    def run():
+        return [(index.top_hits(q, 5), index.top_hits(q, 5, mask, domain_boosts={"land": 0.5}),
+                 index.fuzzy_hits(q, 5), index.fuzzy_hits(q, 5, exclude=[0, 40], mask=mask)) for q in queries]
+
+    monkeypatch.setattr(knowledge_index, "dense_postings", lambda count, size: False)
+    sparse = run()
+    monkeypatch.setattr(knowledge_index, "dense_postings", lambda count, size: True)
+    assert run() == sparse
+
+
+def test_phrase_boost_reaches_rows_outside_the_top_scores():
+    for copies in (40, 80):
+        rows = [{"QUESTION": "What is rental zoning land", "ANSWER": "near"}] * copies
+        index = KnowledgeIndex(rows + [{"QUESTION": "zoning land rental", "ANSWER": "exact"}])
+        hits = index.top_hits("zoning land rental", 3)
+        assert hits[0][0] == copies and hits[0][2]["answer"] == "exact"
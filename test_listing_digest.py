@@ -0,0 +1,38 @@
+from listing_digest import ListingDigest, parse_listing_filters, select_listings
+
+LISTINGS = [
+    {"id": 1, "name": "Palm Court", "city": "Lagos", "location": "Lekki", "bedrooms": 3, "bathrooms": 2,
+     "property_type": "apartment", "rent_monthly": 450000},
+    {"id": 2, "name": "Cedar House", "city": "Lagos", "location": "Yaba", "bedrooms": 2, "bathrooms": 1,
+     "property_type": "flat", "rent_monthly": 200000},
+    {"id": 3, "name": "Maitama Heights", "city": "Abuja", "location": "Maitama", "bedrooms": 3, "bathrooms": 3,
+     "property_type": "duplex", "rent_monthly": 900000},
+]
+
+
+def test_parse_listing_filters():
+    places = {"lagos", "lekki", "yaba", "abuja", "maitama"}
+    assert parse_listing_filters("3 bedroom flat in Lekki under 500k", places) == {
+        "place": "lekki", "bedrooms": 3, "max_rent": 500000}
+    assert parse_listing_filters("two-bed in Abuja, budget ₦1,200,000", places) == {
+        "place": "abuja", "bedrooms": 2, "max_rent": 1200000}
+    assert parse_listing_filters("What is ROI?", places) == {}
+
+
+def test_selection_relaxes_filters_when_nothing_matches():
+    selected, applied = select_listings(LISTINGS, {"place": "lagos", "max_rent": 500000})
+    assert [l["id"] for l in selected] == [1, 2]
+    selected, applied = select_listings(LISTINGS, {"place": "abuja", "bedrooms": 5})
+    assert [l["id"] for l in selected] == [3] and applied == {"place": "abuja"}
+
+
+def test_digest_is_cached_per_filter_signature_and_snapshot():
+    snapshot = [tuple(LISTINGS)]
+    digest = ListingDigest(lambda: snapshot[0], max_tokens=60)
+    text = digest.digest("3 bedroom in Lekki")
+    assert "#1 Palm Court: 3bd/2ba apartment, Lekki, Lagos, ₦450,000/mo" in text
+    assert digest.digest("any 3 bedroom places in lekki?") is text
+    assert "#3" in digest.digest("Show me Abuja listings")
+
+    snapshot[0] = tuple(LISTINGS[1:])
+    assert "Palm Court" not in digest.digest("3 bedroom in Lekki")
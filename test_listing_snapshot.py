@@ -0,0 +1,41 @@
+import threading
+import time
+from listing_snapshot import ListingSnapshot, published_listings
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_stale_snapshot_is_served_while_refreshing_in_background():
+    rows = [[{"id": 1}]]
+    release = threading.Event()
+
+    def load():
+        if rows[0][0]["id"] == 2:
+            release.wait(2)
+        return rows[0]
+
+    snapshot = ListingSnapshot(load, ttl_seconds=0.0)
+    first = snapshot.get()
+    assert first == ({"id": 1},)
+
+    rows[0] = [{"id": 2}]
+    assert snapshot.get() is first          # stale, refresh started in the background
+    release.set()
+    assert wait_for(lambda: snapshot.get() == ({"id": 2},))
+
+
+def test_property_writes_invalidate_the_shared_snapshot():
+    rows = [[{"id": 1}]]
+    snapshot = ListingSnapshot(lambda: rows[0], ttl_seconds=3600)
+    snapshot.get()
+    rows[0] = [{"id": 1}, {"id": 2}]
+    snapshot.invalidate()
+    assert wait_for(lambda: len(snapshot.get()) == 2)
+
+    from database import property_change_listeners
+    assert published_listings.invalidate in property_change_listeners
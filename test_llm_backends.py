@@ -0,0 +1,45 @@
+import anthropic
+import pytest
+
+from llm_backends import AnthropicBackend
+from stub_llm_server import latency_sampler, start_stub_server
+
+MESSAGES = [{"role": "user", "content": "What is a C of O?"}]
+
+
+def test_stub_server_streams_with_usage_and_respects_max_tokens():
+    server = start_stub_server(output_tokens=120)
+    try:
+        backend = AnthropicBackend(api_key="stub", base_url=server.url)
+        streamed = backend.stream("stub-model", 60, "system", MESSAGES)
+        chunks = list(streamed)
+        assert len(chunks) > 1 and "".join(chunks) == streamed.response.text
+        assert streamed.response.text.startswith("[stub] What is a C of O?")
+        assert streamed.response.stop_reason == "max_tokens" and streamed.response.output_tokens <= 60
+
+        response = backend.complete("stub-model", 1000, "system", MESSAGES, temperature=0.7)
+        assert response.stop_reason == "end_turn" and response.output_tokens >= 120 and response.input_tokens > 0
+    finally:
+        server.shutdown()
+
+
+def test_stub_server_injects_api_errors():
+    server = start_stub_server(error_rate=1.0, error_kinds=["overloaded"])
+    try:
+        backend = AnthropicBackend(api_key="stub", base_url=server.url, max_retries=0)
+        with pytest.raises(anthropic.APIStatusError) as error:
+            backend.complete("stub-model", 100, "system", MESSAGES)
+        assert error.value.status_code == 529 and server.stats["overloaded"] == 1
+    finally:
+        server.shutdown()
+
+
+def test_latency_distributions():
+    assert latency_sampler(250)() == 0.25
+    uniform = latency_sampler("uniform:100:200", seed=1)
+    assert all(0.1 <= uniform() <= 0.2 for _ in range(100))
+    lognormal = latency_sampler("lognormal:100:1.0", seed=1)
+    draws = sorted(lognormal() for _ in range(1000))
+    assert 0.08 < draws[500] < 0.12 and draws[990] > 0.5
+    with pytest.raises(ValueError):
+        latency_sampler("pareto:1")
@@ -0,0 +1,35 @@
+from model_routing import MODEL_TIERS, ModelRouter
+
+
+def test_simple_questions_get_the_light_tier_and_analyses_the_heavy_one():
+    router = ModelRouter()
+    light = router.choose("What is a C of O?")
+    assert light.route == "light" and light.max_tokens == 400
+
+    heavy = router.choose("Should I buy 2 flats in Lekki or land in Ibeju-Lekki? Which has better returns over 5 years?",
+                          context_tokens=600)
+    assert heavy.route == "heavy" and heavy.model == MODEL_TIERS[2].model
+
+
+def test_tier_models_can_be_overridden_from_the_environment(monkeypatch):
+    monkeypatch.setenv("CLAUDE_LIGHT_MODEL", "claude-haiku-test")
+    router = ModelRouter()
+    assert router.choose("What is a C of O?").model == "claude-haiku-test"
+    assert [tier.model for tier in router.tiers[1:]] == [tier.model for tier in MODEL_TIERS[1:]]
+    assert MODEL_TIERS[0].model != "claude-haiku-test"
+
+
+def test_slow_tiers_are_skipped_to_meet_the_latency_budget():
+    router = ModelRouter(latency_budget=10)
+    question = "Should I buy 2 flats in Lekki or land in Ibeju-Lekki? Which has better returns over 5 years?"
+    assert router.choose(question, 600).route == "standard"
+    assert router.choose(question, 600, latency_budget=30).route == "heavy"
+
+    for _ in range(5):
+        router.record("light", 4.0, 300, 200)
+    cut = router.choose("What is a C of O?", latency_budget=2)
+    assert cut.route == "light" and cut.max_tokens == 200 and cut.reason == "latency budget"
+
+    report = router.report()
+    assert report["light"]["calls"] == 5 and report["light"]["output_tokens"] == 1000
+    assert report["light"]["p95_seconds"] == 4.0 and report["heavy"]["p50_seconds"] is None
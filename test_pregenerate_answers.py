@@ -0,0 +1,32 @@
+from assistants import RealtyXperienceAI
+from canonical_prompts import canonical_prompts
+from llm_backends import AnthropicBackend
+from pregenerate_answers import pregenerate
+from response_store import ResponseStore
+from stub_llm_server import start_stub_server
+
+
+def test_pregenerate_fills_the_store_from_a_stub_server(tmp_path):
+    server = start_stub_server(latency_ms=20)
+    try:
+        ai = RealtyXperienceAI(api_key="stub", base_url=server.url)
+        store = ResponseStore(str(tmp_path / "responses.db"))
+        jobs = canonical_prompts()
+
+        summary = pregenerate(ai, store, jobs, concurrency=4)
+        assert summary["failed"] == []
+        assert summary["generated"] == len(jobs) == store.count(ai.knowledge_base.content_version)
+        answer = store.get("mr_x", "tenant", "Predict property price movements in key areas", ai.knowledge_base.content_version)
+        assert answer.startswith("[stub]")
+        assert any("The user is a tenant." in str(r["messages"]) for r in server.requests)
+
+        assert pregenerate(ai, store, jobs)["skipped"] == len(jobs)
+    finally:
+        server.shutdown()
+
+
+def test_failed_model_calls_are_not_stored(tmp_path):
+    ai = RealtyXperienceAI(llm=AnthropicBackend(api_key="stub", base_url="http://127.0.0.1:9", max_retries=0))
+    store = ResponseStore(str(tmp_path / "responses.db"))
+    summary = pregenerate(ai, store, [("mr_x", "guest", "Analyze property investment potential in my budget")])
+    assert len(summary["failed"]) == 1 and store.count() == 0
@@ -0,0 +1,22 @@
+from prompt_budget import ContextPiece, TokenBudget, estimate_tokens, shorten
+
+
+def test_shorten_keeps_whole_leading_sentences():
+    text = "First point here. Second point is longer than the first. Third."
+    assert shorten(text, 100) == text
+    assert shorten(text, 6) == "First point here."
+    assert shorten("one enormous sentence without any break at all", 4).endswith("…")
+
+
+def test_budget_keeps_pieces_by_priority_and_reports_cuts():
+    pieces = [
+        ContextPiece("A" * 400, 0, "knowledge 1"),
+        ContextPiece("Short fact. " + "B" * 400, 1, "knowledge 2"),
+        ContextPiece("C" * 400, 2, "knowledge 3"),
+        ContextPiece("Platform has 4 listings.", 0.5, "platform"),
+    ]
+    kept, report = TokenBudget(150, min_piece_tokens=42).fit(pieces)
+    assert [p.label for p in kept] == ["knowledge 1", "platform", "knowledge 2"]
+    assert kept[2].text == "Short fact."
+    assert report["truncated"] == ["knowledge 2"] and report["dropped"] == ["knowledge 3"]
+    assert report["context_tokens"] == sum(estimate_tokens(p.text) for p in kept) <= 150
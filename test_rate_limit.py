@@ -0,0 +1,56 @@
+import threading
+import time
+
+import pytest
+
+from rate_limit import AssistantRateLimiter, RateLimited
+
+
+def test_user_bucket_refuses_bursts_beyond_the_wait_allowance():
+    limiter = AssistantRateLimiter(user_burst=2, user_rate=0.5, max_wait=0.1)
+    limiter.acquire("ada").release()
+    limiter.acquire("ada").release()
+    with pytest.raises(RateLimited) as refused:
+        limiter.acquire("ada")
+    assert refused.value.scope == "user" and 1.5 < refused.value.retry_after <= 2.0
+    limiter.acquire("bola").release()
+    assert limiter.stats["admitted"] == 3 and limiter.stats["refused_user"] == 1
+
+
+def test_signed_out_users_share_the_anonymous_bucket_in_wait_estimates():
+    limiter = AssistantRateLimiter(user_burst=1, user_rate=0.5, max_wait=0.1)
+    limiter.acquire(None).release()
+    assert 1.5 < limiter.expected_wait(None) <= 2.0
+    assert 1.5 < limiter.expected_wait("") <= 2.0 and limiter.expected_wait("bola") == 0
+
+
+def test_queue_is_served_round_robin_across_users():
+    limiter = AssistantRateLimiter(max_concurrent=1, max_wait=5)
+    holder = limiter.acquire("holder")
+    order = []
+
+    def ask(user):
+        with limiter.acquire(user):
+            order.append(user)
+
+    threads = []
+    for user in ["heavy", "heavy", "heavy", "light"]:
+        threads.append(threading.Thread(target=ask, args=(user,)))
+        threads[-1].start()
+        while limiter.queue_length() < len(threads):
+            time.sleep(0.005)
+    holder.release()
+    for thread in threads:
+        thread.join()
+    assert order == ["heavy", "light", "heavy", "heavy"]
+
+
+def test_requests_give_up_when_the_queue_does_not_move():
+    limiter = AssistantRateLimiter(user_burst=1, max_concurrent=1, max_wait=0.1)
+    holder = limiter.acquire("holder")
+    with pytest.raises(RateLimited) as refused:
+        limiter.acquire("ada")
+    assert refused.value.scope == "global" and limiter.queue_length() == 0
+    holder.release()
+    # The refused call did not use up ada's only token
+    limiter.acquire("ada").release()
@@ -0,0 +1,55 @@
+from knowledge_index import QueryAnalyzer, SynonymExpander
+from semantic_cache import QuestionEmbedder, SemanticAnswerCache
+
+
+def make_cache(**kwargs):
+    analyzer = QueryAnalyzer(synonyms=SynonymExpander.from_csv("nigeria_real_estate_synonyms.csv"))
+    return SemanticAnswerCache(QuestionEmbedder(analyzer), **kwargs)
+
+
+def test_reworded_questions_hit_within_the_same_scope():
+    cache = make_cache()
+    scope = ("mr_x", "v1", "tenant", "")
+    cache.store(scope, "How do I calculate ROI on a rental property?", "answer", seconds=2.0)
+
+    assert cache.lookup(scope, "how can i calculate the return on investment for rental properties") == "answer"
+    assert cache.lookup(scope, "How do I check a property's title before selling?") is None
+    assert cache.lookup(("landlord", "v1", "tenant", ""), "How do I calculate ROI on a rental property?") is None
+    assert cache.lookup(("mr_x", "v2", "tenant", ""), "How do I calculate ROI on a rental property?") is None
+
+    report = cache.report()
+    assert report["hits"] == 1 and report["misses"] == 3
+    assert report["hit_rate"] == 0.25 and report["saved_seconds"] == 2.0
+
+
+def test_verb_aliases_bridge_paraphrases():
+    cache = make_cache()
+    scope = ("mr_x", "v1", "", "")
+    cache.store(scope, "calculate ROI on a rental", "roi")
+    cache.store(scope, "how do I compute rental yield", "yield")
+
+    assert cache.lookup(scope, "how do I work out rental ROI") == "roi"
+    assert cache.lookup(scope, "how do I work out service charge") is None
+
+
+def test_numbers_and_negations_must_match():
+    cache = make_cache()
+    scope = ("mr_x", "v1", "", "")
+    cache.store(scope, "Rent for a 3 bedroom flat in Lekki", "three")
+    cache.store(scope, "Can I buy land with a C of O?", "with")
+
+    assert cache.lookup(scope, "Rent for a 3 bedroom apartment in Lekki") == "three"
+    assert cache.lookup(scope, "Rent for a 2 bedroom flat in Lekki") is None
+    assert cache.lookup(scope, "Can I buy land without a C of O?") is None
+
+
+def test_scopes_keep_only_recent_questions():
+    cache = make_cache(capacity=2, max_scopes=1)
+    scope = ("mr_x", "v1", "", "")
+    for question in ("What is zoning?", "What is a survey plan?", "What is land banking?"):
+        cache.store(scope, question, question)
+    assert cache.lookup(scope, "What is zoning?") is None
+    assert cache.lookup(scope, "What is land banking?") == "What is land banking?"
+
+    cache.store(("landlord", "v1", "", ""), "What is zoning?", "zoning")
+    assert cache.lookup(scope, "What is land banking?") is None